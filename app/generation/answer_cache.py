@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class CachedAnswer(BaseModel):
+    question: str
+    answer: str
+    similarity: float
+    age_seconds: float
+
+
+def context_key(
+        model: str,
+        chunk_ids: Sequence[str],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+) -> str:
+    """
+    Hash of the generation settings and the retrieved chunk ids. Chunk order is
+    ignored: the same context set answers a question the same way whatever its
+    ranking. Another prompt template or sampling setting gets its own entries.
+    """
+    settings = [model, system_prompt, temperature, max_tokens]
+    digest = hashlib.sha256(json.dumps(settings, ensure_ascii=False).encode("utf-8"))
+    for chunk_id in sorted(str(chunk_id) for chunk_id in chunk_ids):
+        digest.update(b"\0" + chunk_id.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def chunk_ids_of(context_chunks: List[dict]) -> List[str]:
+    """
+    Chunk ids of retrieval results, falling back to the point id.
+    """
+    return [str(chunk["metadata"].get("chunk_id", chunk["id"])) for chunk in context_chunks]
+
+
+class SemanticAnswerCache:
+    """
+    Local cache of LLM answers, looked up by meaning rather than exact text.
+
+    An answer is reused when the new question was answered from the same
+    retrieved chunks by the same model, and its dense embedding has a cosine
+    similarity of at least `threshold` with the cached question. Entries older
+    than `ttl_seconds` are ignored and dropped; beyond `max_entries` the least
+    recently used ones are evicted. Everything lives in one SQLite file.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            threshold: float = 0.92,
+            ttl_seconds: float = 7 * 24 * 3600,
+            max_entries: int = 10_000,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / "answers.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                context_key TEXT,
+                question TEXT,
+                answer TEXT,
+                embedding BLOB,
+                created_at REAL,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS answers_context ON answers (context_key);
+            CREATE INDEX IF NOT EXISTS answers_lru ON answers (last_used);
+            """
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(
+            self,
+            query_embedding: Sequence[float],
+            chunk_ids: Sequence[str],
+            model: str,
+            system_prompt: Optional[str] = None,
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+    ) -> Optional[CachedAnswer]:
+        """
+        Return the most similar fresh answer for this context and these
+        generation settings, or None.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, question, answer, embedding, created_at FROM answers "
+                "WHERE context_key = ? AND created_at >= ?",
+                (context_key(model, chunk_ids, system_prompt, temperature, max_tokens), now - self.ttl_seconds),
+            ).fetchall()
+            if not rows:
+                return None
+
+            # Stored embeddings are unit length, so a dot product is the cosine
+            matrix = np.stack([np.frombuffer(row[3], dtype=np.float32) for row in rows])
+            similarities = matrix @ self._normalize(query_embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            entry_id, question, answer, _, created_at = rows[best]
+            self._db.execute("UPDATE answers SET last_used = ? WHERE id = ?", (now, entry_id))
+            self._db.commit()
+
+        return CachedAnswer(
+            question=question,
+            answer=answer,
+            similarity=float(similarities[best]),
+            age_seconds=now - created_at,
+        )
+
+    def put(
+            self,
+            question: str,
+            query_embedding: Sequence[float],
+            chunk_ids: Sequence[str],
+            model: str,
+            answer: str,
+            system_prompt: Optional[str] = None,
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+    ):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO answers (context_key, question, answer, embedding, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    context_key(model, chunk_ids, system_prompt, temperature, max_tokens),
+                    question,
+                    answer,
+                    self._normalize(query_embedding).tobytes(),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM answers WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute(
+            "DELETE FROM answers WHERE id IN ("
+            "SELECT id FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM answers")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
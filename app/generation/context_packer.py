@@ -0,0 +1,212 @@
+from typing import List, Dict, Optional, Any
+
+import tiktoken
+from pydantic import BaseModel
+
+from app.text_hash import calculate_chunk_hash
+
+
+class PackedContext(BaseModel):
+    """
+    One context passage sent to the LLM: a hit, or several overlapping hits
+    of the same source row merged into one span.
+    """
+    text: str
+    chunk_ids: List[str]
+    source_row_id: Optional[int] = None
+    source: Optional[str] = None
+    title: Optional[str] = None
+    score: Optional[float] = None
+    rank: int  # position of the best hit it contains
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
+    tokens: int = 0
+
+    def render(self, position: int) -> str:
+        return f"Context {position}: {self.text} source: {self.source} title: {self.title}"
+
+
+def _text_overlap(left: str, right: str, min_overlap: int) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right`, or 0.
+    """
+    for size in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class ContextPacker:
+    """
+    Turn ranked retrieval hits into a compact, token-budgeted context.
+
+    Hits are deduplicated by chunk_id and by normalised content hash. Hits from
+    the same source row whose spans touch or overlap are merged into a single
+    passage, using the stored character offsets or, when absent, the text
+    overlap the splitters leave between neighbouring chunks. Passages are then
+    added in relevance order while they fit in `max_tokens`.
+    """
+
+    def __init__(
+            self,
+            max_tokens: int = 3000,
+            model_name: str = "gpt-4o-mini",
+            min_text_overlap: int = 20,
+    ):
+        self.max_tokens = max_tokens
+        self.model_name = model_name
+        self.min_text_overlap = min_text_overlap
+        self._encoder: Optional[tiktoken.Encoding] = None
+
+    @property
+    def encoder(self) -> tiktoken.Encoding:
+        if self._encoder is None:
+            # LiteLLM names carry a provider prefix, e.g. "openai/gpt-4o-mini"
+            try:
+                self._encoder = tiktoken.encoding_for_model(self.model_name.split("/")[-1])
+            except KeyError:
+                self._encoder = tiktoken.get_encoding("o200k_base")
+        return self._encoder
+
+    def _to_passages(self, hits: List[Dict[str, Any]]) -> List[PackedContext]:
+        passages = []
+        seen_chunk_ids = set()
+        seen_hashes = set()
+
+        for rank, hit in enumerate(hits):
+            metadata = hit.get("metadata") or {}
+            text = metadata.get("chunk_text") or hit.get("text") or ""
+            chunk_id = str(metadata.get("chunk_id", hit.get("id")))
+            content_hash = calculate_chunk_hash(text)
+            if not text or chunk_id in seen_chunk_ids or content_hash in seen_hashes:
+                continue
+            seen_chunk_ids.add(chunk_id)
+            seen_hashes.add(content_hash)
+
+            passages.append(PackedContext(
+                text=text,
+                chunk_ids=[chunk_id],
+                source_row_id=metadata.get("source_row_id"),
+                source=metadata.get("source"),
+                title=metadata.get("title"),
+                score=hit.get("score"),
+                rank=rank,
+                start_offset=metadata.get("start_offset"),
+                end_offset=metadata.get("end_offset"),
+            ))
+
+        return passages
+
+    def _merge_pair(self, left: PackedContext, right: PackedContext) -> Optional[PackedContext]:
+        """
+        Merge `right` onto the end of `left` if they touch or overlap, else None.
+        """
+        if left.end_offset is not None and right.start_offset is not None and right.end_offset is not None:
+            if right.start_offset > left.end_offset:
+                return None
+            if right.end_offset <= left.end_offset:
+                text = left.text  # right is contained in left
+            else:
+                text = left.text + right.text[left.end_offset - right.start_offset:]
+            end_offset = max(left.end_offset, right.end_offset)
+        else:
+            overlap = _text_overlap(left.text, right.text, self.min_text_overlap)
+            if overlap == 0:
+                return None
+            text = left.text + right.text[overlap:]
+            end_offset = None
+
+        best = left if left.rank <= right.rank else right
+        return best.model_copy(update={
+            "text": text,
+            "chunk_ids": left.chunk_ids + right.chunk_ids,
+            "rank": best.rank,
+            "start_offset": left.start_offset,
+            "end_offset": end_offset,
+        })
+
+    def _merge_rows(self, passages: List[PackedContext]) -> List[PackedContext]:
+        by_row: Dict[Any, List[PackedContext]] = {}
+        merged = []
+        for passage in passages:
+            if passage.source_row_id is None:
+                merged.append(passage)
+            else:
+                by_row.setdefault(passage.source_row_id, []).append(passage)
+
+        for row_passages in by_row.values():
+            with_offsets = sorted(
+                (passage for passage in row_passages if passage.start_offset is not None),
+                key=lambda passage: passage.start_offset,
+            )
+            without_offsets = [passage for passage in row_passages if passage.start_offset is None]
+
+            # Offsets give document order directly: one sweep merges every touching run
+            for passage in with_offsets:
+                if merged and merged[-1].source_row_id == passage.source_row_id:
+                    combined = self._merge_pair(merged[-1], passage)
+                    if combined is not None:
+                        merged[-1] = combined
+                        continue
+                merged.append(passage)
+
+            # Without offsets the order is unknown, so try both sides of every pair
+            pending = list(without_offsets)
+            while pending:
+                current = pending.pop(0)
+                changed = True
+                while changed:
+                    changed = False
+                    for other in pending:
+                        combined = self._merge_pair(current, other) or self._merge_pair(other, current)
+                        if combined is not None:
+                            current = combined
+                            pending.remove(other)
+                            changed = True
+                            break
+                merged.append(current)
+
+        return merged
+
+    def pack(self, hits: List[Dict[str, Any]]) -> List[PackedContext]:
+        """
+        Deduplicate, merge and budget the hits, returned in relevance order.
+        """
+        passages = sorted(self._merge_rows(self._to_passages(hits)), key=lambda passage: passage.rank)
+
+        packed = []
+        used_tokens = 0
+        for passage in passages:
+            tokens = len(self.encoder.encode(passage.render(len(packed) + 1)))
+            if used_tokens + tokens > self.max_tokens:
+                continue  # a smaller, less relevant passage may still fit
+            passage.tokens = tokens
+            packed.append(passage)
+            used_tokens += tokens
+
+        if not packed and passages:
+            # Even the best passage is over budget: keep its head rather than nothing
+            truncated = self._truncate(passages[0])
+            if truncated is not None:
+                packed.append(truncated)
+
+        return packed
+
+    def _truncate(self, passage: PackedContext) -> Optional[PackedContext]:
+        """
+        Cut the passage's text so that its rendered form fits in `max_tokens`,
+        or None if not even the context label and metadata fit.
+        """
+        text_tokens = self.encoder.encode(passage.text)
+        overhead = len(self.encoder.encode(passage.model_copy(update={"text": ""}).render(1)))
+        keep = min(len(text_tokens), self.max_tokens - overhead)
+
+        # Token boundaries may shift once the text sits inside the rendered string
+        while keep > 0:
+            truncated = passage.model_copy(update={"text": self.encoder.decode(text_tokens[:keep])})
+            tokens = len(self.encoder.encode(truncated.render(1)))
+            if tokens <= self.max_tokens:
+                truncated.tokens = tokens
+                return truncated
+            keep -= tokens - self.max_tokens
+        return None
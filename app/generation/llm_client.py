@@ -1,30 +1,73 @@
+import asyncio
 import os
-from typing import List, Optional, Dict
+import random
+import threading
+from typing import List, Optional, Dict, Union
 
 import litellm
-from litellm import completion
+from litellm import completion, acompletion
+
+from app.generation.context_packer import ContextPacker
+from app.generation.rate_limiter import AsyncTokenBucket
+from app.generation.response_cache import LLMResponseCache, request_key, cached_stream
+
+# Client errors worth retrying: request timeout, conflict, rate limited
+_RETRYABLE_CLIENT_STATUS = {408, 409, 429}
+# Server errors are transient except "not implemented"
+_NON_RETRYABLE_SERVER_STATUS = {501}
+
+DEFAULT_SYSTEM_PROMPT = (
+    "Answer only using the provided context. If the answer is not present, say you don't know. "
+    "If context metadata is available, please mention the author, title and link of context."
+)
+
+_callbacks_lock = threading.Lock()
+_callbacks_registered = False
+
+
+def _register_callbacks():
+    """
+    Install the lunary callback once per process instead of on every call.
+    """
+    global _callbacks_registered
+    with _callbacks_lock:
+        if not _callbacks_registered:
+            litellm.success_callback = ["lunary"]
+            _callbacks_registered = True
+
+
+def _is_retryable(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        if status_code in _RETRYABLE_CLIENT_STATUS:
+            return True
+        # Includes gateway errors such as 520-529 in front of the provider
+        return 500 <= status_code < 600 and status_code not in _NON_RETRYABLE_SERVER_STATUS
+    return isinstance(error, (litellm.RateLimitError, litellm.APIConnectionError, litellm.Timeout))
 
 
 def _build_qa_messages(
         question: str,
         context_chunks: List[Dict],
         system_prompt: Optional[str] = None,
+        packer: Optional[ContextPacker] = None,
 ) -> List[Dict]:
     messages = []
 
     messages.append(
         {
             "role": "system",
-            "content": system_prompt
-                       or "Answer only using the provided context. If the answer is not present, say you don't know. If context metadata is available, please mention the author, title and link of context.",
+            "content": system_prompt or DEFAULT_SYSTEM_PROMPT,
         }
     )
 
-    for i, chunk in enumerate(context_chunks):
+    # Duplicate and overlapping hits are collapsed and the rest cut to the token budget
+    contexts = (packer or ContextPacker()).pack(context_chunks)
+    if contexts:
         messages.append(
             {
                 "role": "system",
-                "content": f"Context {i + 1}: {chunk['metadata']['chunk_text']} source: {chunk['metadata']['source']} title: {chunk['metadata']['title']}",
+                "content": "\n\n".join(context.render(i + 1) for i, context in enumerate(contexts)),
             }
         )
 
@@ -44,6 +87,13 @@ class LLMClient:
             model: str,
             temperature: float = 0.2,
             max_tokens: int = 512,
+            max_concurrency: int = 8,
+            requests_per_minute: Optional[float] = None,
+            max_retries: int = 5,
+            backoff_seconds: float = 1.0,
+            max_backoff_seconds: float = 30.0,
+            response_cache: Optional[LLMResponseCache] = None,
+            context_packer: Optional[ContextPacker] = None,
     ):
 
         self._api_key = os.environ["OPENROUTER_API_KEY"]
@@ -54,6 +104,58 @@ class LLMClient:
         self.temperature = temperature
         self.max_tokens = max_tokens
 
+        # Async batch generation settings
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._async_loop = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bucket: Optional[AsyncTokenBucket] = None
+
+        # Identical requests are answered from disk; see LLMResponseCache for bypass / refresh
+        self.response_cache = response_cache
+
+        # Retrieved context is deduplicated, merged and budgeted before it is sent
+        self.context_packer = context_packer or ContextPacker(model_name=model)
+
+        _register_callbacks()
+
+    def _completion_kwargs(self, messages: List[Dict], stream: bool) -> Dict:
+        return dict(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=stream,
+            api_key=self._api_key,
+            base_url=self._api_base
+        )
+
+    def _cache_key(self, messages: List[Dict]) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return request_key(self.model, messages, self.temperature, self.max_tokens)
+
+    def _complete(self, messages: List[Dict], stream: bool):
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached_stream(cached) if stream else cached
+
+        response = completion(**self._completion_kwargs(messages, stream))
+
+        if stream:
+            # Stored once the caller has read the whole stream
+            return response if key is None else self.response_cache.record_stream(key, self.model, response)
+
+        content = response["choices"][0]["message"]["content"]
+        if key is not None:
+            self.response_cache.put(key, self.model, content)
+        return content
+
     def generate(
             self,
             question: str,
@@ -65,42 +167,88 @@ class LLMClient:
             question=question,
             context_chunks=context_chunks,
             system_prompt=system_prompt,
+            packer=self.context_packer,
         )
 
-        litellm.success_callback = ["lunary"]
-
-        response = completion(
-            model=self.model,
-            messages=messages,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            stream=stream,
-            api_key=self._api_key,
-            base_url=self._api_base
-        )
-
-        if stream:
-            return response
-        else:
-            return response["choices"][0]["message"]["content"]
+        return self._complete(messages, stream)
 
     def generate_questions(
             self,
             messages,
             stream: bool = False,
     ):
-        litellm.success_callback = ["lunary"]
-        response = completion(
-            model=self.model,
-            messages=messages,
-            temperature=self.temperature,
-            max_tokens=self.max_tokens,
-            stream=stream,
-            api_key=self._api_key,
-            base_url=self._api_base
+        return self._complete(messages, stream)
+
+    def _async_limits(self):
+        """
+        Semaphore and token bucket bound to the running event loop; they are
+        recreated if the client is reused from another asyncio.run.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = None
+            if self.requests_per_minute:
+                self._bucket = AsyncTokenBucket.per_minute(self.requests_per_minute, burst=self.max_concurrency)
+        return self._semaphore, self._bucket
+
+    async def _acomplete(self, messages: List[Dict]) -> str:
+        """
+        One completion under the concurrency limit and rate limit, retried with
+        exponential backoff and jitter on 429 / 5xx / connection errors.
+        """
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        semaphore, bucket = self._async_limits()
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                if bucket is not None:
+                    await bucket.acquire()
+                try:
+                    response = await acompletion(**self._completion_kwargs(messages, stream=False))
+                    content = response["choices"][0]["message"]["content"]
+                    if key is not None:
+                        self.response_cache.put(key, self.model, content)
+                    return content
+                except Exception as e:
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt)
+                    delay *= random.uniform(0.5, 1.0)
+                    print(f"LLM call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    async def agenerate(
+            self,
+            question: str,
+            context_chunks: List[Dict],
+            system_prompt: Optional[str] = None,
+    ) -> str:
+        messages = _build_qa_messages(
+            question=question,
+            context_chunks=context_chunks,
+            system_prompt=system_prompt,
+            packer=self.context_packer,
         )
+        return await self._acomplete(messages)
 
-        if stream:
-            return response
-        else:
-            return response["choices"][0]["message"]["content"]
+    async def agenerate_many(
+            self,
+            prompts: List[List[Dict]],
+            return_exceptions: bool = False,
+    ) -> List[Union[str, BaseException]]:
+        """
+        Run many chat prompts (lists of messages) concurrently, at most
+        `max_concurrency` in flight and `requests_per_minute` started per minute.
+        Results follow the input order. With return_exceptions, a prompt that
+        still fails after its retries yields its exception instead of failing the batch.
+        """
+        return list(await asyncio.gather(
+            *(self._acomplete(messages) for messages in prompts),
+            return_exceptions=return_exceptions,
+        ))
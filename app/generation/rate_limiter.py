@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket for asyncio callers: `rate` tokens are added per second up
+    to `capacity`, and acquire() waits until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive.")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = 1.0) -> "AsyncTokenBucket":
+        return cls(rate=requests_per_minute / 60.0, capacity=max(burst, 1.0))
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # The lock keeps callers in FIFO order while one of them waits for a refill
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Iterator, Iterable
+
+
+def request_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """
+    Canonical hash of a completion request. Keys are sorted and separators
+    fixed, so equal requests hash equally whatever dict order they were built in.
+    """
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_stream(content: str) -> Iterator[SimpleNamespace]:
+    """
+    Replay a cached answer as a one-chunk stream, shaped like litellm stream
+    chunks for `chunk.choices[0].delta.content` readers.
+    """
+    yield SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason="stop")]
+    )
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM completions keyed by request_key().
+
+    `bypass` neither reads nor writes the cache; `refresh` ignores cached
+    entries but stores the new responses, overwriting the old ones. When the
+    stored text exceeds `max_bytes`, least recently used entries are evicted.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            max_bytes: int = 256 * 1024 ** 2,
+            bypass: bool = False,
+            refresh: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / "responses.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                request_key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_used REAL
+            );
+            CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used);
+            """
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.bypass or self.refresh:
+            return None
+
+        with self._lock:
+            row = self._db.execute("SELECT content FROM responses WHERE request_key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE request_key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key: str, model: str, content: Optional[str]):
+        if self.bypass or content is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (request_key, model, content, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, content, len(content.encode("utf-8")), now, now),
+            )
+            self._evict_if_needed()
+            self._db.commit()
+
+    def record_stream(self, key: str, model: str, stream: Iterable) -> Iterator:
+        """
+        Pass a live litellm stream through unchanged and store the full text
+        once it has been consumed to the end.
+        """
+        parts = []
+        for chunk in stream:
+            content = chunk.choices[0].delta.content
+            if content:
+                parts.append(content)
+            yield chunk
+        self.put(key, model, "".join(parts))
+
+    def size_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict_if_needed(self):
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until back under 90% of max_bytes
+        target = int(self.max_bytes * 0.9)
+        evicted = []
+        for key, size in self._db.execute("SELECT request_key, size FROM responses ORDER BY last_used"):
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE request_key = ?", evicted)
+        print(f"Evicted {len(evicted)} entries from LLM response cache '{self.cache_dir}'")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
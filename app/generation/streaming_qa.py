@@ -0,0 +1,141 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Optional, Iterator
+
+from pydantic import BaseModel
+from qdrant_client import QdrantClient
+
+from app.generation.answer_cache import SemanticAnswerCache, chunk_ids_of
+from app.generation.llm_client import LLMClient, DEFAULT_SYSTEM_PROMPT
+from app.model_registry import model_registry
+from app.retrieval.query_encoder import query_encoder
+from app.retrieval_runner import RetrievalRunner
+
+
+class StreamingMetrics(BaseModel):
+    """
+    Where the latency of one answer went. All times are seconds since ask().
+    """
+    retrieval_seconds: float = 0.0
+    ttft_seconds: Optional[float] = None  # time to first token seen by the caller
+    total_seconds: float = 0.0
+    completion_tokens: int = 0  # stream chunks carrying text, about one token each
+    tokens_per_second: float = 0.0
+    cached: bool = False
+
+
+class StreamingAnswer:
+    """
+    Iterate to receive the answer text as it is generated. `text` and
+    `metrics` are complete once the iteration has finished.
+    """
+
+    def __init__(self, qa: "StreamingQA", question: str, retrieval: Future, started: float):
+        self.question = question
+        self.context_chunks: List[Dict] = []
+        self.text = ""
+        self.metrics = StreamingMetrics()
+        self._qa = qa
+        self._retrieval = retrieval
+        self._started = started
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def __iter__(self) -> Iterator[str]:
+        self.context_chunks = self._retrieval.result()
+        self.metrics.retrieval_seconds = self._elapsed()
+
+        qa = self._qa
+        query_embedding = chunk_ids = None
+        # Everything besides the context that shapes the answer
+        cache_settings = dict(
+            model=qa.llm.model,
+            system_prompt=DEFAULT_SYSTEM_PROMPT,
+            temperature=qa.llm.temperature,
+            max_tokens=qa.llm.max_tokens,
+        )
+        if qa.answer_cache is not None:
+            # Retrieval already encoded the question, so this hits the query cache
+            query_embedding = query_encoder.encode(self.question).dense
+            chunk_ids = chunk_ids_of(self.context_chunks)
+            cached = qa.answer_cache.get(query_embedding, chunk_ids, **cache_settings)
+            if cached is not None:
+                self.metrics.cached = True
+                self.metrics.ttft_seconds = self._elapsed()
+                self.text = cached.answer
+                yield cached.answer
+                self.metrics.total_seconds = self._elapsed()
+                return
+
+        parts = []
+        generation_started = None
+        stream = qa.llm.generate(question=self.question, context_chunks=self.context_chunks, stream=True)
+        for chunk in stream:
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            if generation_started is None:
+                generation_started = time.perf_counter()
+                self.metrics.ttft_seconds = self._elapsed()
+            parts.append(content)
+            self.metrics.completion_tokens += 1
+            yield content
+
+        self.metrics.total_seconds = self._elapsed()
+        if generation_started is not None and self.metrics.completion_tokens > 1:
+            # Rate after the first token, so TTFT does not count twice
+            decode_seconds = time.perf_counter() - generation_started
+            if decode_seconds > 0:
+                self.metrics.tokens_per_second = (self.metrics.completion_tokens - 1) / decode_seconds
+        self.text = "".join(parts)
+
+        if qa.answer_cache is not None and self.text:
+            qa.answer_cache.put(self.question, query_embedding, chunk_ids, answer=self.text, **cache_settings)
+
+
+class StreamingQA:
+    """
+    Question answering that streams the answer as it is generated.
+
+    Model warm-up starts in the background as soon as the object is built, and
+    ask() starts retrieval immediately on a worker thread, so the caller only
+    waits for retrieval plus the model's time to first token.
+    """
+
+    def __init__(
+            self,
+            client: QdrantClient,
+            llm: LLMClient,
+            k: int = 3,
+            answer_cache: Optional[SemanticAnswerCache] = None,
+            warm_up: bool = True,
+            layout: Optional[str] = None,
+    ):
+        self.client = client
+        self.llm = llm
+        self.k = k
+        self.answer_cache = answer_cache
+        # Name in LAYOUTS of the layout the collections were ingested with
+        self.layout = layout
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qa")
+
+        self._warm_up: Optional[threading.Thread] = None
+        if warm_up:
+            self._warm_up = threading.Thread(target=model_registry.warm_up, name="qa-warm-up", daemon=True)
+            self._warm_up.start()
+
+    def _retrieve(self, question: str) -> List[Dict]:
+        # Loading is guarded per model, so this simply waits for a warm-up in progress
+        return RetrievalRunner(
+            client=self.client, query=question, k=self.k, layout=self.layout
+        ).fetch_similarity_result()
+
+    def ask(self, question: str) -> StreamingAnswer:
+        started = time.perf_counter()
+        retrieval = self._executor.submit(self._retrieve, question)
+        return StreamingAnswer(self, question, retrieval, started)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -1,42 +1,65 @@
-import hashlib
-import json
 from pathlib import Path
-from typing import List
+from typing import List, Iterator
 
 import pandas as pd
 
 from app.ingestion.models import RawDocument
 
 
+# Every cell is read as its literal text, so a row's values (and hash) do not
+# depend on the dtypes pandas would infer for the batch it happens to be in
+_READ_CSV_KWARGS = dict(dtype=str, keep_default_na=False)
+
+
 class CsvLoaderService:
     def __init__(self, file_path: str):
         self.csv_path = Path(file_path)
         if not self.csv_path.exists():
             raise FileNotFoundError(f"CSV not found: {self.csv_path}")
 
-    def _row_to_hash(self, row):
-        normalized = json.dumps(
-            row.to_dict(),
-            sort_keys=True,
-            ensure_ascii=False,
-            separators=(",", ":")
-        )
-        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    def _hash_rows(self, df: pd.DataFrame) -> List[str]:
+        """
+        Hash every row of the DataFrame in one vectorized pass.
+        Columns are sorted first so the hash does not depend on column order.
+        """
+        hashes = pd.util.hash_pandas_object(df[sorted(df.columns)], index=False)
+        return [f"{value:016x}" for value in hashes.to_numpy()]
 
-    def csv_reader(self) -> List[RawDocument]:
-        df = pd.read_csv(self.csv_path)
+    def _records_to_documents(self, df: pd.DataFrame) -> List[RawDocument]:
+        """
+        Build RawDocuments from a DataFrame without going through iterrows.
+        Row ids are taken from the DataFrame index.
+        """
         documents: List[RawDocument] = []
+        row_hashes = self._hash_rows(df)
 
-        for idx, row in df.iterrows():
+        for idx, row, row_hash in zip(df.index, df.to_dict("records"), row_hashes):
             documents.append(
                 RawDocument(
-                    title=row.get("title") if pd.notna(row.get("title")) else None,
-                    author=row.get("author") if pd.notna(row.get("author")) else None,
-                    source=row.get("link") if pd.notna(row.get("link")) else None,
+                    title=row.get("title") or None,
+                    author=row.get("author") or None,
+                    source=row.get("link") or None,
                     text=row.get("text"),
-                    hash=self._row_to_hash(row),
+                    hash=row_hash,
                     row_id=int(idx)
                 )
             )
 
         return documents
+
+    def csv_reader(self) -> List[RawDocument]:
+        df = pd.read_csv(self.csv_path, **_READ_CSV_KWARGS)
+        return self._records_to_documents(df)
+
+    def csv_stream(self, batch_size: int = 1000) -> Iterator[List[RawDocument]]:
+        """
+        Stream the CSV in bounded row batches.
+        Only `batch_size` rows are held in memory at a time, so downstream
+        stages can start working before the whole file is read.
+        """
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer.")
+
+        with pd.read_csv(self.csv_path, chunksize=batch_size, **_READ_CSV_KWARGS) as reader:
+            for df in reader:
+                yield self._records_to_documents(df)
@@ -0,0 +1,310 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def _safe_model_name(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model name, chunk hash).
+
+    Dense vectors live in one memory-mapped matrix per model, indexed by a slot
+    number kept in SQLite. Sparse vectors are stored as packed uint32 indices and
+    float32 values. When the cache grows beyond `max_bytes`, the least recently
+    used entries are evicted and their dense slots are reused.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            max_bytes: int = 2 * 1024 ** 3,
+            dense_dtype: str = "float32",
+    ):
+        if dense_dtype not in ("float32", "float16"):
+            raise ValueError("dense_dtype must be 'float32' or 'float16'.")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.dense_dtype = np.dtype(dense_dtype)
+
+        self._lock = threading.RLock()
+        self._matrices: Dict[str, np.memmap] = {}
+        self._db = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dense_models (
+                model TEXT PRIMARY KEY, dim INTEGER, dtype TEXT, capacity INTEGER, next_slot INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS dense_entries (
+                model TEXT, chunk_hash TEXT, slot INTEGER, last_used REAL,
+                PRIMARY KEY (model, chunk_hash)
+            );
+            CREATE TABLE IF NOT EXISTS dense_free_slots (model TEXT, slot INTEGER);
+            CREATE TABLE IF NOT EXISTS sparse_entries (
+                model TEXT, chunk_hash TEXT, indices BLOB, vals BLOB, last_used REAL,
+                PRIMARY KEY (model, chunk_hash)
+            );
+            CREATE INDEX IF NOT EXISTS dense_lru ON dense_entries (last_used);
+            CREATE INDEX IF NOT EXISTS sparse_lru ON sparse_entries (last_used);
+            """
+        )
+        self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Dense vectors
+    # ------------------------------------------------------------------
+    def _matrix_path(self, model_name: str) -> Path:
+        return self.cache_dir / f"{_safe_model_name(model_name)}.dense"
+
+    def _open_matrix(self, model_name: str) -> Optional[np.memmap]:
+        if model_name in self._matrices:
+            return self._matrices[model_name]
+
+        row = self._db.execute(
+            "SELECT dim, dtype, capacity FROM dense_models WHERE model = ?", (model_name,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        dim, dtype, capacity = row
+        matrix = np.memmap(self._matrix_path(model_name), dtype=np.dtype(dtype), mode="r+", shape=(capacity, dim))
+        self._matrices[model_name] = matrix
+        return matrix
+
+    def _grow_matrix(self, model_name: str, dim: int, required_slots: int) -> np.memmap:
+        row = self._db.execute(
+            "SELECT dtype, capacity FROM dense_models WHERE model = ?", (model_name,)
+        ).fetchone()
+        dtype = np.dtype(row[0]) if row else self.dense_dtype
+        capacity = row[1] if row else 0
+
+        if row is not None and required_slots <= capacity:
+            return self._open_matrix(model_name)
+
+        new_capacity = max(1024, capacity * 2, required_slots)
+        matrix = self._matrices.pop(model_name, None)
+        if matrix is not None:
+            matrix.flush()
+            del matrix
+
+        path = self._matrix_path(model_name)
+        with open(path, "ab") as f:
+            f.truncate(new_capacity * dim * dtype.itemsize)
+
+        if row is None:
+            self._db.execute(
+                "INSERT INTO dense_models (model, dim, dtype, capacity, next_slot) VALUES (?, ?, ?, ?, 0)",
+                (model_name, dim, dtype.name, new_capacity),
+            )
+        else:
+            self._db.execute("UPDATE dense_models SET capacity = ? WHERE model = ?", (new_capacity, model_name))
+
+        return self._open_matrix(model_name)
+
+    def get_dense(self, model_name: str, chunk_hashes: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Return the cached float32 vector for each hash, or None on a miss.
+        """
+        with self._lock:
+            matrix = self._open_matrix(model_name)
+            if matrix is None:
+                return [None] * len(chunk_hashes)
+
+            slots = self._lookup(
+                "SELECT chunk_hash, slot FROM dense_entries WHERE model = ? AND chunk_hash IN ({})",
+                model_name, chunk_hashes,
+            )
+            self._touch("dense_entries", model_name, slots.keys())
+
+            # Copies: an evicted slot may be reused by another writer once the lock is released
+            return [
+                np.array(matrix[slots[chunk_hash]], dtype=np.float32, copy=True) if chunk_hash in slots else None
+                for chunk_hash in chunk_hashes
+            ]
+
+    def put_dense(self, model_name: str, chunk_hashes: Sequence[str], vectors: np.ndarray):
+        if len(chunk_hashes) == 0:
+            return
+
+        vectors = np.asarray(vectors)
+        with self._lock:
+            existing = self._lookup(
+                "SELECT chunk_hash, slot FROM dense_entries WHERE model = ? AND chunk_hash IN ({})",
+                model_name, chunk_hashes,
+            )
+            new_items = {}
+            for chunk_hash, vector in zip(chunk_hashes, vectors):
+                if chunk_hash not in existing:
+                    new_items[chunk_hash] = vector
+            if not new_items:
+                return
+
+            free_slots = [
+                slot for (slot,) in self._db.execute(
+                    "SELECT slot FROM dense_free_slots WHERE model = ? LIMIT ?", (model_name, len(new_items))
+                )
+            ]
+            row = self._db.execute("SELECT next_slot FROM dense_models WHERE model = ?", (model_name,)).fetchone()
+            next_slot = row[0] if row else 0
+            fresh_count = len(new_items) - len(free_slots)
+            slots = free_slots + list(range(next_slot, next_slot + fresh_count))
+
+            matrix = self._grow_matrix(model_name, vectors.shape[1], next_slot + fresh_count)
+            now = time.time()
+            for slot, vector in zip(slots, new_items.values()):
+                matrix[slot] = vector
+            matrix.flush()
+
+            self._db.executemany(
+                "DELETE FROM dense_free_slots WHERE model = ? AND slot = ?",
+                [(model_name, slot) for slot in free_slots],
+            )
+            self._db.execute(
+                "UPDATE dense_models SET next_slot = ? WHERE model = ?", (next_slot + fresh_count, model_name)
+            )
+            self._db.executemany(
+                "INSERT INTO dense_entries (model, chunk_hash, slot, last_used) VALUES (?, ?, ?, ?)",
+                [(model_name, chunk_hash, slot, now) for chunk_hash, slot in zip(new_items, slots)],
+            )
+            self._db.commit()
+            self._evict_if_needed()
+
+    # ------------------------------------------------------------------
+    # Sparse vectors
+    # ------------------------------------------------------------------
+    def get_sparse(self, model_name: str, chunk_hashes: Sequence[str]) -> List[Optional[Dict[str, np.ndarray]]]:
+        """
+        Return the cached {"indices": uint32, "values": float32} arrays for each hash, or None on a miss.
+        """
+        with self._lock:
+            rows = self._lookup(
+                "SELECT chunk_hash, indices, vals FROM sparse_entries WHERE model = ? AND chunk_hash IN ({})",
+                model_name, chunk_hashes,
+            )
+            self._touch("sparse_entries", model_name, rows.keys())
+
+            results: List[Optional[Dict[str, np.ndarray]]] = []
+            for chunk_hash in chunk_hashes:
+                if chunk_hash not in rows:
+                    results.append(None)
+                    continue
+                indices, values = rows[chunk_hash]
+                results.append({
+                    "indices": np.frombuffer(indices, dtype=np.uint32),
+                    "values": np.frombuffer(values, dtype=np.float32),
+                })
+            return results
+
+    def put_sparse(self, model_name: str, chunk_hashes: Sequence[str], vectors: Sequence[Dict]):
+        if len(chunk_hashes) == 0:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO sparse_entries (model, chunk_hash, indices, vals, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        model_name,
+                        chunk_hash,
+                        np.asarray(vector["indices"], dtype=np.uint32).tobytes(),
+                        np.asarray(vector["values"], dtype=np.float32).tobytes(),
+                        now,
+                    )
+                    for chunk_hash, vector in zip(chunk_hashes, vectors)
+                ],
+            )
+            self._db.commit()
+            self._evict_if_needed()
+
+    # ------------------------------------------------------------------
+    # Bookkeeping
+    # ------------------------------------------------------------------
+    def _lookup(self, query: str, model_name: str, chunk_hashes: Sequence[str]) -> Dict:
+        found = {}
+        unique_hashes = list(dict.fromkeys(chunk_hashes))
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(unique_hashes), 500):
+            part = unique_hashes[start:start + 500]
+            sql = query.format(",".join("?" * len(part)))
+            for row in self._db.execute(sql, (model_name, *part)):
+                found[row[0]] = row[1] if len(row) == 2 else row[1:]
+        return found
+
+    def _touch(self, table: str, model_name: str, chunk_hashes):
+        now = time.time()
+        self._db.executemany(
+            f"UPDATE {table} SET last_used = ? WHERE model = ? AND chunk_hash = ?",
+            [(now, model_name, chunk_hash) for chunk_hash in chunk_hashes],
+        )
+        self._db.commit()
+
+    def size_bytes(self) -> int:
+        """
+        Bytes held by live entries: dense rows plus packed sparse arrays.
+        """
+        dense_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(m.dim * CASE m.dtype WHEN 'float16' THEN 2 ELSE 4 END), 0) "
+            "FROM dense_entries e JOIN dense_models m ON e.model = m.model"
+        ).fetchone()[0]
+        sparse_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(indices) + LENGTH(vals)), 0) FROM sparse_entries"
+        ).fetchone()[0]
+        return int(dense_bytes + sparse_bytes)
+
+    def _evict_if_needed(self):
+        """
+        Drop least recently used entries until the cache is back under 90% of max_bytes.
+        """
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        candidates = self._db.execute(
+            """
+            SELECT 'dense', e.model, e.chunk_hash, e.slot, e.last_used,
+                   m.dim * CASE m.dtype WHEN 'float16' THEN 2 ELSE 4 END
+            FROM dense_entries e JOIN dense_models m ON e.model = m.model
+            UNION ALL
+            SELECT 'sparse', model, chunk_hash, NULL, last_used, LENGTH(indices) + LENGTH(vals)
+            FROM sparse_entries
+            ORDER BY 5
+            """
+        ).fetchall()
+
+        evicted = 0
+        for kind, model_name, chunk_hash, slot, _, size in candidates:
+            if total <= target:
+                break
+            if kind == "dense":
+                self._db.execute(
+                    "DELETE FROM dense_entries WHERE model = ? AND chunk_hash = ?", (model_name, chunk_hash)
+                )
+                self._db.execute("INSERT INTO dense_free_slots (model, slot) VALUES (?, ?)", (model_name, slot))
+            else:
+                self._db.execute(
+                    "DELETE FROM sparse_entries WHERE model = ? AND chunk_hash = ?", (model_name, chunk_hash)
+                )
+            total -= size
+            evicted += 1
+
+        self._db.commit()
+        print(f"Evicted {evicted} entries from embedding cache '{self.cache_dir}'")
+
+    def close(self):
+        with self._lock:
+            for matrix in self._matrices.values():
+                matrix.flush()
+            self._matrices.clear()
+            self._db.close()
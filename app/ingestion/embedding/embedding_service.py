@@ -1,10 +1,20 @@
-from typing import List
+from typing import List, Optional
 
-from fastembed import SparseTextEmbedding, SparseEmbedding
+import numpy as np
+from fastembed import SparseEmbedding
 from numpy import ndarray
-from sentence_transformers import SentenceTransformer
 
-from app.ingestion.models import ChunkedDocumentsOutput
+from app.ingestion.embedding.embedding_cache import EmbeddingCache
+from app.ingestion.models import ChunkedDocumentsOutput, ChunkedDocumentModel, ChunkBatch
+from app.text_hash import calculate_chunk_hash
+from app.model_registry import model_registry
+
+
+def _sparse_to_arrays(sparse_vec: SparseEmbedding) -> dict:
+    return {
+        "indices": np.asarray(sparse_vec.indices, dtype=np.uint32),
+        "values": np.asarray(sparse_vec.values, dtype=np.float32),
+    }
 
 
 class EmbeddingService:
@@ -12,67 +22,148 @@ class EmbeddingService:
             self,
             dense_model: str,
             sparse_model: str = "Qdrant/bm25",
+            batch_size: int = 256,
+            cache: Optional[EmbeddingCache] = None,
+            show_progress_bar: bool = True,
     ):
-        self.dense_model = SentenceTransformer(dense_model)
-        self.sparse_model = SparseTextEmbedding(model_name=sparse_model)
+        self.dense_model_name = dense_model
+        self.sparse_model_name = sparse_model
+        self.dense_model = model_registry.dense(dense_model)
+        self.sparse_model = model_registry.sparse(sparse_model)
+        self.batch_size = batch_size
+        self.cache = cache
+        self.show_progress_bar = show_progress_bar
 
     def embed_chunks_dense(self, docs: List[str]) -> ndarray:
-        return self.dense_model.encode(docs, show_progress_bar=True)
+        return self.dense_model.encode(docs, batch_size=self.batch_size, show_progress_bar=self.show_progress_bar)
 
     def embed_chunks_sparse(self, docs: List[str]) -> List[SparseEmbedding]:
-        return list(self.sparse_model.embed(docs))
+        return list(self.sparse_model.embed(docs, batch_size=self.batch_size))
 
-    def embed_documents_for_hybrid_ingestion(
-            self, chunked_docs: List[ChunkedDocumentsOutput]
-    ) -> List[ChunkedDocumentsOutput]:
+    def embed_chunks(
+            self,
+            chunks: List[ChunkedDocumentModel],
+            dense: bool = True,
+            sparse: bool = True,
+    ) -> List[ChunkedDocumentModel]:
         """
-        For each ChunkedDocumentsOutput, compute dense and sparse embeddings
-        and store them inside each ChunkedDocumentModel.
+        Embed chunks from any number of documents in one pass.
+        Chunks are sorted by text length so every fixed-size batch holds
+        similarly sized inputs and padding stays small, then the vectors
+        are scattered back onto the chunks in their original order.
+        With a cache configured, only chunks whose hash was never embedded
+        by the model are sent to it.
         """
-        embedded_documents: List[ChunkedDocumentsOutput] = []
-
-        for doc_output in chunked_docs:
-            chunk_texts = [chunk.chunk_text for chunk in doc_output.chunks]
+        if not chunks:
+            return chunks
 
-            # Compute embeddings
-            dense_embeddings = self.embed_chunks_dense(chunk_texts)
-            sparse_embeddings = self.embed_chunks_sparse(chunk_texts)
-
-            # Update each chunk with embeddings
-            for chunk, dense_vec, sparse_vec in zip(
-                    doc_output.chunks, dense_embeddings, sparse_embeddings
-            ):
+        if dense:
+            dense_vectors = self._embed_with_cache(chunks, dense=True)
+            for chunk, dense_vec in zip(chunks, dense_vectors):
                 chunk.dense_vector = dense_vec.tolist()
+
+        if sparse:
+            sparse_vectors = self._embed_with_cache(chunks, dense=False)
+            for chunk, sparse_vec in zip(chunks, sparse_vectors):
                 chunk.sparse_vector = {
-                    "indices": sparse_vec.indices.tolist() if hasattr(sparse_vec.indices, "tolist") else list(
-                        sparse_vec.indices),
-                    "values": sparse_vec.values.tolist() if hasattr(sparse_vec.values, "tolist") else list(
-                        sparse_vec.values)
+                    "indices": sparse_vec["indices"].tolist(),
+                    "values": sparse_vec["values"].tolist(),
                 }
-            # or store indices+values if needed
 
-            embedded_documents.append(doc_output)
+        return chunks
 
-        return embedded_documents
+    def embed_batch(
+            self,
+            chunks: List[ChunkedDocumentModel],
+            dense: bool = True,
+            sparse: bool = True,
+    ) -> ChunkBatch:
+        """
+        Same as embed_chunks, but return the vectors in a columnar ChunkBatch
+        instead of writing per-chunk Python lists onto the models.
+        """
+        batch = ChunkBatch.from_chunks(chunks)
+        if not chunks:
+            return batch
 
-    def embed_documents_for_dense_ingestion(
+        if dense:
+            batch.dense_vectors = np.stack(self._embed_with_cache(chunks, dense=True)).astype(np.float32, copy=False)
+
+        if sparse:
+            batch.set_sparse(self._embed_with_cache(chunks, dense=False))
+
+        return batch
+
+    def _compute_dense(self, texts: List[str]) -> List[ndarray]:
+        return list(np.asarray(self.embed_chunks_dense(texts), dtype=np.float32))
+
+    def _compute_sparse(self, texts: List[str]) -> List[dict]:
+        return [_sparse_to_arrays(sparse_vec) for sparse_vec in self.embed_chunks_sparse(texts)]
+
+    def _embed_with_cache(self, chunks: List[ChunkedDocumentModel], dense: bool) -> List:
+        """
+        Return one vector per chunk, reading cached vectors and computing the rest
+        in length-sorted order. Chunks with the same hash are embedded once.
+        """
+        chunk_hashes = [chunk.chunk_hash or calculate_chunk_hash(chunk.chunk_text) for chunk in chunks]
+        model_name = self.dense_model_name if dense else self.sparse_model_name
+        compute = self._compute_dense if dense else self._compute_sparse
+
+        if self.cache is not None:
+            get = self.cache.get_dense if dense else self.cache.get_sparse
+            vectors = get(model_name, chunk_hashes)
+        else:
+            vectors = [None] * len(chunks)
+
+        # One representative chunk per missing hash
+        missing = {}
+        for i, (chunk_hash, vector) in enumerate(zip(chunk_hashes, vectors)):
+            if vector is None and chunk_hash not in missing:
+                missing[chunk_hash] = i
+
+        if missing:
+            # Character length is a cheap proxy for token length
+            order = sorted(missing.values(), key=lambda i: len(chunks[i].chunk_text))
+            computed = dict(zip(
+                (chunk_hashes[i] for i in order),
+                compute([chunks[i].chunk_text for i in order]),
+            ))
+
+            if self.cache is not None:
+                if dense:
+                    self.cache.put_dense(model_name, list(computed), np.stack(list(computed.values())))
+                else:
+                    self.cache.put_sparse(model_name, list(computed), list(computed.values()))
+
+            vectors = [
+                computed[chunk_hash] if vector is None else vector
+                for chunk_hash, vector in zip(chunk_hashes, vectors)
+            ]
+
+        return vectors
+
+    def embed_documents_for_hybrid_ingestion(
             self, chunked_docs: List[ChunkedDocumentsOutput]
     ) -> List[ChunkedDocumentsOutput]:
         """
-        Compute only dense embeddings for ingestion.
+        For each ChunkedDocumentsOutput, compute dense and sparse embeddings
+        and store them inside each ChunkedDocumentModel.
         """
-        embedded_documents: List[ChunkedDocumentsOutput] = []
+        chunks = [chunk for doc_output in chunked_docs for chunk in doc_output.chunks]
+        self.embed_chunks(chunks, dense=True, sparse=True)
 
-        for doc_output in chunked_docs:
-            chunk_texts = [chunk.chunk_text for chunk in doc_output.chunks]
+        return chunked_docs
 
-            dense_embeddings = self.embed_chunks_dense(chunk_texts)
-
-            # Update chunks with dense vectors
-            for chunk, dense_vec in zip(doc_output.chunks, dense_embeddings):
-                chunk.dense_vector = dense_vec.tolist()
-                chunk.sparse_vector = None
+    def embed_documents_for_dense_ingestion(
+            self, chunked_docs: List[ChunkedDocumentsOutput]
+    ) -> List[ChunkedDocumentsOutput]:
+        """
+        Compute only dense embeddings for ingestion.
+        """
+        chunks = [chunk for doc_output in chunked_docs for chunk in doc_output.chunks]
+        self.embed_chunks(chunks, dense=True, sparse=False)
 
-            embedded_documents.append(doc_output)
+        for chunk in chunks:
+            chunk.sparse_vector = None
 
-        return embedded_documents
+        return chunked_docs
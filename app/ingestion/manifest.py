@@ -0,0 +1,56 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Iterable
+
+from app.ingestion.models import RawDocument
+
+
+class IngestionManifest:
+    """
+    Persistent map of RawDocument.row_id -> RawDocument.hash for the last
+    successful ingestion. Used to send only new or changed rows downstream.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._row_hashes: Dict[int, str] = {}
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._row_hashes = {int(row_id): row_hash for row_id, row_hash in json.load(f).items()}
+
+    def __len__(self) -> int:
+        return len(self._row_hashes)
+
+    def changed(self, docs: List[RawDocument]) -> List[RawDocument]:
+        """
+        Return the documents that are new or whose hash differs from the manifest.
+        """
+        return [doc for doc in docs if self._row_hashes.get(doc.row_id) != doc.hash]
+
+    def removed_row_ids(self, seen_row_ids: Iterable[int]) -> List[int]:
+        """
+        Return row ids recorded in the manifest that are no longer in the source.
+        """
+        return sorted(set(self._row_hashes) - set(seen_row_ids))
+
+    def update(self, docs: List[RawDocument]):
+        self.record({doc.row_id: doc.hash for doc in docs})
+
+    def record(self, row_hashes: Dict[int, str]):
+        self._row_hashes.update(row_hashes)
+
+    def remove(self, row_ids: Iterable[int]):
+        for row_id in row_ids:
+            self._row_hashes.pop(row_id, None)
+
+    def save(self):
+        """
+        Atomically write the manifest so a crash never leaves a partial file behind.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({str(row_id): row_hash for row_id, row_hash in sorted(self._row_hashes.items())}, f)
+        os.replace(tmp_path, self.path)
@@ -1,6 +1,7 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 
 
 class RawDocument(BaseModel):
@@ -23,6 +24,9 @@ class ChunkedDocumentModel(BaseModel):
     chunk_text: str  # text content for embedding
     source_row_id: int  # reference back to RawDocument.row_id
     chunk_id: str  # unique identifier for this chunk
+    chunk_hash: Optional[str] = None  # normalized content hash of chunk_text
+    start_offset: Optional[int] = None  # character span of the chunk in RawDocument.text
+    end_offset: Optional[int] = None
     metadata: Optional[Dict] = None  # optional per-chunk metadata
     dense_vector: Optional[List[float]] = None  # dense embedding vector
     sparse_vector: Optional[Dict[str, List[float]]] = None
@@ -34,3 +38,104 @@ class ChunkedDocumentsOutput(BaseModel):
     """
     source_row_id: int  # reference to RawDocument.row_id
     chunks: List[ChunkedDocumentModel]  # list of ingestion-ready chunks
+
+
+class ChunkBatch(BaseModel):
+    """
+    Columnar representation of many embedded chunks.
+    Dense vectors are one contiguous float32 matrix and BM25 vectors are stored
+    CSR-style: the sparse vector of chunk i is
+    sparse_indices[sparse_indptr[i]:sparse_indptr[i + 1]] (same for values).
+    Ids and metadata are kept as parallel arrays.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    chunk_ids: List[str]
+    chunk_hashes: List[Optional[str]]
+    chunk_texts: List[str]
+    source_row_ids: np.ndarray  # int64, shape (n,)
+    start_offsets: np.ndarray  # int64, shape (n,), -1 when unknown
+    end_offsets: np.ndarray  # int64, shape (n,), -1 when unknown
+    metadata: List[Optional[Dict]]
+    dense_vectors: Optional[np.ndarray] = None  # float32, shape (n, dim)
+    sparse_indptr: Optional[np.ndarray] = None  # int64, shape (n + 1,)
+    sparse_indices: Optional[np.ndarray] = None  # uint32
+    sparse_values: Optional[np.ndarray] = None  # float32
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def from_chunks(cls, chunks: List[ChunkedDocumentModel]) -> "ChunkBatch":
+        """
+        Build a batch from chunk models, taking over any vectors they carry.
+        """
+        batch = cls(
+            chunk_ids=[chunk.chunk_id for chunk in chunks],
+            chunk_hashes=[chunk.chunk_hash for chunk in chunks],
+            chunk_texts=[chunk.chunk_text for chunk in chunks],
+            source_row_ids=np.array([chunk.source_row_id for chunk in chunks], dtype=np.int64),
+            start_offsets=np.array(
+                [-1 if chunk.start_offset is None else chunk.start_offset for chunk in chunks], dtype=np.int64
+            ),
+            end_offsets=np.array(
+                [-1 if chunk.end_offset is None else chunk.end_offset for chunk in chunks], dtype=np.int64
+            ),
+            metadata=[chunk.metadata for chunk in chunks],
+        )
+
+        with_dense = [chunk for chunk in chunks if chunk.dense_vector is not None]
+        if with_dense and len(with_dense) != len(chunks):
+            missing = next(chunk for chunk in chunks if chunk.dense_vector is None)
+            raise ValueError(f"Chunk {missing.chunk_id} has no dense_vector.")
+        if with_dense:
+            batch.dense_vectors = np.array([chunk.dense_vector for chunk in chunks], dtype=np.float32)
+
+        if any(chunk.sparse_vector for chunk in chunks):
+            batch.set_sparse([chunk.sparse_vector or {"indices": [], "values": []} for chunk in chunks])
+
+        return batch
+
+    def set_sparse(self, sparse_vectors: Sequence[Dict]):
+        """
+        Pack one {"indices", "values"} dict per chunk into the CSR arrays.
+        """
+        lengths = [len(vector["indices"]) for vector in sparse_vectors]
+        self.sparse_indptr = np.zeros(len(sparse_vectors) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.sparse_indptr[1:])
+        if sparse_vectors:
+            self.sparse_indices = np.concatenate(
+                [np.asarray(vector["indices"], dtype=np.uint32) for vector in sparse_vectors]
+            )
+            self.sparse_values = np.concatenate(
+                [np.asarray(vector["values"], dtype=np.float32) for vector in sparse_vectors]
+            )
+        else:
+            self.sparse_indices = np.zeros(0, dtype=np.uint32)
+            self.sparse_values = np.zeros(0, dtype=np.float32)
+
+    def sparse_vector(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.sparse_indptr[i], self.sparse_indptr[i + 1]
+        return self.sparse_indices[start:end], self.sparse_values[start:end]
+
+    def take(self, positions: Sequence[int]) -> "ChunkBatch":
+        """
+        Return a new batch holding only the chunks at the given positions.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        batch = ChunkBatch(
+            chunk_ids=[self.chunk_ids[i] for i in positions],
+            chunk_hashes=[self.chunk_hashes[i] for i in positions],
+            chunk_texts=[self.chunk_texts[i] for i in positions],
+            source_row_ids=self.source_row_ids[positions],
+            start_offsets=self.start_offsets[positions],
+            end_offsets=self.end_offsets[positions],
+            metadata=[self.metadata[i] for i in positions],
+            dense_vectors=None if self.dense_vectors is None else self.dense_vectors[positions],
+        )
+        if self.sparse_indptr is not None:
+            batch.set_sparse([
+                {"indices": indices, "values": values}
+                for indices, values in (self.sparse_vector(i) for i in positions)
+            ])
+        return batch
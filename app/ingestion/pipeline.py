@@ -0,0 +1,86 @@
+from pathlib import Path
+from typing import List, Iterable, Optional
+
+from app.ingestion.embedding.embedding_service import EmbeddingService
+from app.ingestion.models import ChunkedDocumentsOutput
+from app.ingestion.vectorstore.base import BaseBatchIngestor
+from app.ingestion.vectorstore.streaming_upsert import StreamingUpserter, UpsertCheckpoint
+
+
+class MultiTargetIngestionPipeline:
+    """
+    Embed chunks once and fan the vectors out to every configured collection.
+    The dense model always runs once; the sparse model runs once only if at
+    least one target needs BM25 vectors.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, targets: List[BaseBatchIngestor]):
+        if not targets:
+            raise ValueError("At least one ingestion target is required.")
+        self.embedding_service = embedding_service
+        self.targets = targets
+
+    def run(self, chunked_docs: List[ChunkedDocumentsOutput], removed_row_ids: Iterable[int] = ()):
+        removed_row_ids = list(removed_row_ids)
+        chunks = [chunk for doc_output in chunked_docs for chunk in doc_output.chunks]
+        needs_sparse = any(target.requires_sparse for target in self.targets)
+
+        print(f"Embedding {len(chunks)} chunks (dense{' + sparse' if needs_sparse else ''})")
+        batch = self.embedding_service.embed_batch(chunks, dense=True, sparse=needs_sparse)
+        row_ids = [doc_output.source_row_id for doc_output in chunked_docs]
+
+        for target in self.targets:
+            print(f"Ingesting chunks to '{target.collection_name}'")
+            target.create_collection()
+            target.delete_rows(removed_row_ids)
+            target.sync_chunk_batch(batch, row_ids=row_ids)
+
+    def run_streaming(
+            self,
+            chunked_doc_batches: Iterable[List[ChunkedDocumentsOutput]],
+            batch_size: int = 256,
+            parallel: int = 3,
+            checkpoint_dir: Optional[str] = None,
+            checkpoint_fingerprint: Optional[str] = None,
+    ):
+        """
+        Embed and upload batch by batch, so only a few batches are held in memory.
+        With `checkpoint_dir`, every target records its acknowledged batches and
+        an interrupted run resumes where it stopped. Batches that were already
+        written are still split and embedded on resume; the embedding cache
+        keeps that cheap. A checkpoint written for another
+        `checkpoint_fingerprint` (see input_fingerprint) is discarded.
+
+        Points of the streamed rows that their new chunks no longer produce are
+        deleted; rows missing from the input altogether are left to delete_rows.
+        """
+        needs_sparse = any(target.requires_sparse for target in self.targets)
+        upserters = []
+        for target in self.targets:
+            target.create_collection()
+            checkpoint = None
+            if checkpoint_dir is not None:
+                checkpoint = UpsertCheckpoint(
+                    str(Path(checkpoint_dir) / f"{target.collection_name}.json"),
+                    collection_name=target.collection_name,
+                    batch_size=batch_size,
+                    fingerprint=checkpoint_fingerprint,
+                )
+                if len(checkpoint):
+                    print(f"Resuming '{target.collection_name}': {len(checkpoint)} batches already uploaded")
+            upserters.append(StreamingUpserter(target, batch_size=batch_size, parallel=parallel, checkpoint=checkpoint))
+
+        try:
+            for chunked_docs in chunked_doc_batches:
+                chunks = [chunk for doc_output in chunked_docs for chunk in doc_output.chunks]
+                batch = self.embedding_service.embed_batch(chunks, dense=True, sparse=needs_sparse)
+                row_ids = [doc_output.source_row_id for doc_output in chunked_docs]
+                for upserter in upserters:
+                    upserter.submit(batch, row_ids=row_ids)
+        except BaseException:
+            for upserter in upserters:
+                upserter.abort()
+            raise
+
+        for upserter in upserters:
+            upserter.close()
@@ -1,7 +1,35 @@
 # splitters/base.py
-from typing import List
+from typing import List, NamedTuple, Optional, Iterable, Iterator
+
+
+class TextSpan(NamedTuple):
+    """
+    A chunk together with its character offsets into the source text.
+    """
+    text: str
+    start: Optional[int]
+    end: Optional[int]
 
 
 class BaseSplitter:
     def split(self, text: str) -> List[str]:
         raise NotImplementedError
+
+    def split_with_offsets(self, text: str) -> List[TextSpan]:
+        """
+        Split text and return each chunk with its [start, end) character offsets.
+        Splitters that cannot map chunks back to the source return None offsets.
+        """
+        return [TextSpan(chunk, None, None) for chunk in self.split(text)]
+
+    def split_many(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        """
+        Split many texts, yielding the chunks of each text in input order.
+        Splitters with a cheaper batched path override this.
+        """
+        for spans in self.split_many_with_offsets(texts):
+            yield [span.text for span in spans]
+
+    def split_many_with_offsets(self, texts: Iterable[str]) -> Iterator[List[TextSpan]]:
+        for text in texts:
+            yield self.split_with_offsets(text)
@@ -1,6 +1,6 @@
 from typing import List
 
-from .base import BaseSplitter
+from .base import BaseSplitter, TextSpan
 
 
 class CharSplitter(BaseSplitter):
@@ -10,13 +10,15 @@ class CharSplitter(BaseSplitter):
         self.chunk_overlap = chunk_overlap
 
     def split(self, text: str) -> List[str]:
+        return [span.text for span in self.split_with_offsets(text)]
+
+    def split_with_offsets(self, text: str) -> List[TextSpan]:
         chunks = []
         start = 0
 
         while start < len(text):
-            end = start + self.chunk_size
-            chunk = text[start:end]
-            chunks.append(chunk)
+            end = min(start + self.chunk_size, len(text))
+            chunks.append(TextSpan(text[start:end], start, end))
             start += self.chunk_size - self.chunk_overlap
 
         return chunks
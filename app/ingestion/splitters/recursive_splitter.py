@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Tuple
 
-from .base import BaseSplitter
+from .base import BaseSplitter, TextSpan
 from .token_splitter import TokenSplitter
 
 
@@ -17,15 +17,32 @@ class RecursiveSplitter(BaseSplitter):
             chunk_overlap=chunk_overlap
         )
 
+    def _paragraphs(self, text: str) -> List[Tuple[str, int]]:
+        """
+        Return non-empty, stripped paragraphs with their start offset in `text`.
+        """
+        paragraphs = []
+        position = 0
+        for piece in text.split("\n\n"):
+            paragraph = piece.strip()
+            if paragraph:
+                paragraphs.append((paragraph, position + len(piece) - len(piece.lstrip())))
+            position += len(piece) + 2
+        return paragraphs
+
     def split(self, text: str) -> List[str]:
-        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+        return [span.text for span in self.split_with_offsets(text)]
+
+    def split_with_offsets(self, text: str) -> List[TextSpan]:
+        paragraphs = self._paragraphs(text)
+        # Every paragraph is tokenized exactly once, in one batch call
+        paragraph_tokens = self.token_splitter.encoder.encode_batch([para for para, _ in paragraphs])
         chunks = []
 
-        for para in paragraphs:
-            token_count = len(self.token_splitter.encoder.encode(para))
-            if token_count <= self.token_splitter.chunk_size:
-                chunks.append(para)
+        for (para, start), tokens in zip(paragraphs, paragraph_tokens):
+            if len(tokens) <= self.token_splitter.chunk_size:
+                chunks.append(TextSpan(para, start, start + len(para)))
             else:
-                chunks.extend(self.token_splitter.split(para))
+                chunks.extend(self.token_splitter.spans_from_tokens(para, tokens, base_offset=start))
 
         return chunks
@@ -1,17 +1,41 @@
-from typing import List
+from typing import List, Iterable, Iterator
 
 import spacy
 
-from .base import BaseSplitter
+from .base import BaseSplitter, TextSpan
+
+# Components of the trained pipelines that sentence splitting does not need
+_UNUSED_COMPONENTS = [
+    "tok2vec", "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer", "ner",
+]
 
 
 class SentenceSplitter(BaseSplitter):
-    def __init__(self, max_sentences: int = 5):
+    def __init__(
+            self,
+            max_sentences: int = 5,
+            model_name: str = "en_core_web_sm",
+            sentencizer_only: bool = False,
+            batch_size: int = 64,
+            n_process: int = 1,
+    ):
+        """
+        With `sentencizer_only`, every trained component is excluded and only
+        spaCy's rule-based sentencizer runs, which is much faster than the full
+        parser-based sentence segmentation. `batch_size` and `n_process` are
+        passed to nlp.pipe by split_many.
+        """
         self.max_sentences = max_sentences
-        self.nlp = spacy.load("en_core_web_sm")
+        self.batch_size = batch_size
+        self.n_process = n_process
 
-    def split(self, text: str) -> List[str]:
-        doc = self.nlp(text)
+        if sentencizer_only:
+            self.nlp = spacy.load(model_name, exclude=_UNUSED_COMPONENTS)
+            self.nlp.add_pipe("sentencizer")
+        else:
+            self.nlp = spacy.load(model_name)
+
+    def _group_sentences(self, doc) -> List[str]:
         sentences = [s.text.strip() for s in doc.sents]
 
         chunks = []
@@ -20,3 +44,18 @@ class SentenceSplitter(BaseSplitter):
             chunks.append(chunk)
 
         return chunks
+
+    def split(self, text: str) -> List[str]:
+        return self._group_sentences(self.nlp(text))
+
+    def split_many(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        """
+        Stream texts through nlp.pipe, yielding the chunks of each text in input order.
+        """
+        for doc in self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process):
+            yield self._group_sentences(doc)
+
+    def split_many_with_offsets(self, texts: Iterable[str]) -> Iterator[List[TextSpan]]:
+        # Chunks are re-joined sentences, not slices of the text, so they have no offsets
+        for chunks in self.split_many(texts):
+            yield [TextSpan(chunk, None, None) for chunk in chunks]
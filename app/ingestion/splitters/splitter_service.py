@@ -1,34 +1,54 @@
-import hashlib
-import re
-from typing import List
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Callable
 
 from app.ingestion.models import RawDocument, ChunkedDocumentModel, ChunkedDocumentsOutput
-from app.ingestion.splitters.base import BaseSplitter
+from app.ingestion.splitters.base import BaseSplitter, TextSpan
+from app.text_hash import calculate_chunk_hash
 
 
-def _calculate_hash_for_chunk(chunk: str) -> str:
-    """
-    Normalize chunk text and return a SHA256 hash
-    """
-    text = chunk.lower()
-    text = re.sub(r"\s+", " ", text)
-    text = text.strip()
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+# Per-process splitter service, built once by the pool initializer
+_worker_service: Optional["SplitterService"] = None
+
+
+def _init_chunk_worker(splitter: Optional[BaseSplitter], splitter_factory: Optional[Callable[[], BaseSplitter]]):
+    global _worker_service
+    _worker_service = SplitterService(splitter_factory() if splitter_factory is not None else splitter)
+
+
+def _chunk_in_worker(docs: List[RawDocument]) -> List[ChunkedDocumentsOutput]:
+    return _worker_service.chunk(docs)
 
 
 class SplitterService:
-    def __init__(self, splitter: BaseSplitter):
+    def __init__(
+            self,
+            splitter: BaseSplitter,
+            processes: Optional[int] = None,
+            batch_size: int = 16,
+            splitter_factory: Optional[Callable[[], BaseSplitter]] = None,
+    ):
+        """
+        With `processes` > 1, documents are chunked in a process pool in batches
+        of `batch_size`. Each worker builds its splitter once: from
+        `splitter_factory` if given (preferable for heavy splitters such as
+        spaCy models), otherwise from a copy of `splitter` sent at start-up.
+        """
         self._splitter_strategy = splitter
+        self._processes = processes
+        self._batch_size = batch_size
+        self._splitter_factory = splitter_factory
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
-    def _chunk(self, raw_document: RawDocument) -> ChunkedDocumentsOutput:
+    def _to_output(self, raw_document: RawDocument, spans: List[TextSpan]) -> ChunkedDocumentsOutput:
         """
-        Splits a RawDocument into chunks and returns ChunkedDocumentsOutput
+        Turns the chunks split from a RawDocument into ChunkedDocumentsOutput
         """
-        chunks_text = self._splitter_strategy.split(raw_document.text)
         chunk_models: List[ChunkedDocumentModel] = []
 
-        for i, chunk in enumerate(chunks_text):
-            chunk_hash = _calculate_hash_for_chunk(chunk)
+        for i, (chunk, start_offset, end_offset) in enumerate(spans):
+            chunk_hash = calculate_chunk_hash(chunk)
             chunk_id = f"{raw_document.row_id}_chunk_{i}_{chunk_hash[:8]}"  # unique per chunk
 
             chunk_models.append(
@@ -36,6 +56,9 @@ class SplitterService:
                     chunk_text=chunk,
                     source_row_id=raw_document.row_id,
                     chunk_id=chunk_id,
+                    chunk_hash=chunk_hash,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
                     metadata={
                         "author": raw_document.author,
                         "source": raw_document.source,
@@ -55,4 +78,37 @@ class SplitterService:
         """
         Chunk multiple RawDocuments
         """
-        return [self._chunk(doc) for doc in docs]
+        if self._processes and self._processes > 1 and len(docs) > self._batch_size:
+            return self._chunk_parallel(docs)
+
+        # Batched splitting lets splitters such as SentenceSplitter use nlp.pipe
+        spans_per_doc = self._splitter_strategy.split_many_with_offsets(doc.text for doc in docs)
+        return [self._to_output(doc, spans) for doc, spans in zip(docs, spans_per_doc)]
+
+    def _chunk_parallel(self, docs: List[RawDocument]) -> List[ChunkedDocumentsOutput]:
+        """
+        Spread documents over the process pool; output order matches the serial path.
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._processes,
+                    initializer=_init_chunk_worker,
+                    initargs=(
+                        None if self._splitter_factory is not None else self._splitter_strategy,
+                        self._splitter_factory,
+                    ),
+                )
+
+        batches = [docs[i:i + self._batch_size] for i in range(0, len(docs), self._batch_size)]
+        return [
+            chunked_doc
+            for chunked_batch in self._pool.map(_chunk_in_worker, batches)
+            for chunked_doc in chunked_batch
+        ]
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -1,8 +1,28 @@
-from typing import List
+from typing import List, Sequence, Dict
 
+import numpy as np
 import tiktoken
 
-from .base import BaseSplitter
+from .base import BaseSplitter, TextSpan
+
+# Byte length of every token id, per encoding name
+_TOKEN_BYTE_LENGTHS: Dict[str, np.ndarray] = {}
+
+
+def _token_byte_lengths(encoder: tiktoken.Encoding) -> np.ndarray:
+    """
+    Lookup table from token id to the number of UTF-8 bytes it decodes to.
+    Built once per encoding so spans can be computed without decoding.
+    """
+    if encoder.name not in _TOKEN_BYTE_LENGTHS:
+        lengths = np.zeros(encoder.n_vocab, dtype=np.int64)
+        for token in range(encoder.n_vocab):
+            try:
+                lengths[token] = len(encoder.decode_single_token_bytes(token))
+            except KeyError:
+                continue  # unused id in the vocabulary
+        _TOKEN_BYTE_LENGTHS[encoder.name] = lengths
+    return _TOKEN_BYTE_LENGTHS[encoder.name]
 
 
 class TokenSplitter(BaseSplitter):
@@ -16,19 +36,46 @@ class TokenSplitter(BaseSplitter):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.encoder = tiktoken.encoding_for_model(model_name)
+        self._token_byte_lengths = _token_byte_lengths(self.encoder)
 
     def split(self, text: str) -> List[str]:
-        tokens = self.encoder.encode(text)
-        chunks = []
+        return [span.text for span in self.split_with_offsets(text)]
+
+    def split_with_offsets(self, text: str) -> List[TextSpan]:
+        return self.spans_from_tokens(text, self.encoder.encode_to_numpy(text))
 
+    def spans_from_tokens(self, text: str, tokens: Sequence[int], base_offset: int = 0) -> List[TextSpan]:
+        """
+        Turn overlapping token windows into character spans of `text`.
+        Window boundaries are mapped to character offsets from the byte length
+        of each token, so no token slice is ever decoded. A boundary that falls
+        inside a multi-byte character moves to the end of that character.
+        """
+        if len(tokens) == 0:
+            return []
+
+        byte_offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(self._token_byte_lengths[np.asarray(tokens)], out=byte_offsets[1:])
+
+        raw = text.encode("utf-8")
+        if len(raw) == len(text):
+            # ASCII: byte offsets are character offsets
+            char_offsets = byte_offsets
+        else:
+            # Count UTF-8 lead bytes to map byte positions to character positions
+            is_lead = (np.frombuffer(raw, dtype=np.uint8) & 0xC0) != 0x80
+            chars_before_byte = np.zeros(len(raw) + 1, dtype=np.int64)
+            np.cumsum(is_lead, out=chars_before_byte[1:])
+            char_offsets = chars_before_byte[byte_offsets]
+
+        spans = []
         start = 0
         while start < len(tokens):
-            end = start + self.chunk_size
-            chunk_tokens = tokens[start:end]
-            chunk_text = self.encoder.decode(chunk_tokens)
-
-            chunks.append(chunk_text)
+            end = min(start + self.chunk_size, len(tokens))
+            char_start = int(char_offsets[start])
+            char_end = int(char_offsets[end])
+            spans.append(TextSpan(text[char_start:char_end], base_offset + char_start, base_offset + char_end))
 
             start += self.chunk_size - self.chunk_overlap
 
-        return chunks
+        return spans
@@ -0,0 +1,252 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Callable, Optional, Dict, Iterator, Tuple, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from app.ingestion.dataloader.csv_loader_service import CsvLoaderService
+from app.ingestion.models import RawDocument, ChunkedDocumentsOutput, ChunkBatch
+from app.ingestion.splitters.splitter_service import SplitterService
+from app.ingestion.vectorstore.base import BaseBatchIngestor
+
+if TYPE_CHECKING:
+    # Only annotates the constructor; importing it loads fastembed
+    from app.ingestion.embedding.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_END = object()
+
+
+class StageStats(BaseModel):
+    """
+    Per-stage counters collected while the pipeline runs.
+    """
+    name: str
+    workers: int
+    batches: int = 0
+    items: int = 0  # documents handled by the stage
+    busy_seconds: float = 0.0  # summed over workers
+
+    @property
+    def throughput(self) -> float:
+        """
+        Documents per second while the stage's workers were busy.
+        """
+        if self.busy_seconds == 0:
+            return 0.0
+        return self.items / (self.busy_seconds / self.workers)
+
+
+class StagedIngestionPipeline:
+    """
+    Run load -> split -> embed -> upsert concurrently.
+
+    Stages are connected by bounded queues, so a slow stage applies backpressure
+    upstream and at most `queue_size` batches wait between two stages. Each
+    stage runs on its own worker threads; model inference and network calls
+    release the GIL, so embedding overlaps with uploads and end-to-end time
+    approaches that of the slowest stage.
+    """
+
+    def __init__(
+            self,
+            loader: CsvLoaderService,
+            splitter_service: SplitterService,
+            embedding_service: "EmbeddingService",
+            targets: List[BaseBatchIngestor],
+            load_batch_size: int = 64,
+            queue_size: int = 4,
+            split_workers: int = 1,
+            embed_workers: int = 1,
+            upsert_workers: int = 2,
+            doc_filter: Optional[Callable[[List[RawDocument]], List[RawDocument]]] = None,
+    ):
+        if not targets:
+            raise ValueError("At least one ingestion target is required.")
+
+        self.loader = loader
+        self.splitter_service = splitter_service
+        self.embedding_service = embedding_service
+        self.targets = targets
+        self.load_batch_size = load_batch_size
+        self.queue_size = queue_size
+        self.workers = {
+            "load": 1,
+            "split": split_workers,
+            "embed": embed_workers,
+            "upsert": upsert_workers,
+        }
+        self.doc_filter = doc_filter
+        self._needs_sparse = any(target.requires_sparse for target in targets)
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    # ------------------------------------------------------------------
+    # Stage functions: one input batch -> one output batch
+    # ------------------------------------------------------------------
+    def _load(self) -> Iterator[List[RawDocument]]:
+        for raw_docs in self.loader.csv_stream(batch_size=self.load_batch_size):
+            if self.doc_filter is not None:
+                raw_docs = self.doc_filter(raw_docs)
+            if raw_docs:
+                yield raw_docs
+
+    def _split(self, raw_docs: List[RawDocument]) -> List[ChunkedDocumentsOutput]:
+        return self.splitter_service.chunk(raw_docs)
+
+    def _embed(self, chunked_docs: List[ChunkedDocumentsOutput]) -> Tuple[List[int], ChunkBatch]:
+        chunks = [chunk for doc_output in chunked_docs for chunk in doc_output.chunks]
+        batch = self.embedding_service.embed_batch(chunks, dense=True, sparse=self._needs_sparse)
+        return [doc_output.source_row_id for doc_output in chunked_docs], batch
+
+    def _upsert(self, embedded: Tuple[List[int], ChunkBatch]) -> None:
+        row_ids, batch = embedded
+        # Concurrency comes from the upsert workers: a process pool per small batch would dominate
+        for target in self.targets:
+            target.sync_chunk_batch(batch, row_ids=row_ids, parallel=1)
+
+    # ------------------------------------------------------------------
+    # Queue plumbing
+    # ------------------------------------------------------------------
+    def _put(self, out_queue: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, in_queue: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error: BaseException):
+        self._errors.append(error)
+        self._stop.set()
+
+    def _run_source(self, stats: StageStats, out_queue: queue.Queue, downstream_workers: int):
+        try:
+            batches = self._load()
+            while True:
+                started = time.perf_counter()
+                raw_docs = next(batches, _END)
+                stats.busy_seconds += time.perf_counter() - started
+                if raw_docs is _END or not self._put(out_queue, raw_docs):
+                    break
+                stats.batches += 1
+                stats.items += len(raw_docs)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(downstream_workers):
+                self._put(out_queue, _END)
+
+    def _run_stage(
+            self,
+            fn: Callable,
+            stats: StageStats,
+            in_queue: queue.Queue,
+            out_queue: Optional[queue.Queue],
+            lock: threading.Lock,
+            remaining_workers: List[int],
+            downstream_workers: int,
+    ):
+        try:
+            while True:
+                batch = self._get(in_queue)
+                if batch is _END:
+                    break
+
+                started = time.perf_counter()
+                result = fn(batch)
+                elapsed = time.perf_counter() - started
+
+                with lock:
+                    stats.busy_seconds += elapsed
+                    stats.batches += 1
+                    # Embedded batches travel as (row_ids, ChunkBatch)
+                    stats.items += len(batch[0]) if isinstance(batch, tuple) else len(batch)
+
+                if out_queue is not None and not self._put(out_queue, result):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # The last worker of a stage tells every downstream worker to stop
+            with lock:
+                remaining_workers[0] -= 1
+                last = remaining_workers[0] == 0
+            if last and out_queue is not None:
+                for _ in range(downstream_workers):
+                    self._put(out_queue, _END)
+
+    def run(self) -> Dict[str, StageStats]:
+        """
+        Ingest the whole CSV and return the per-stage statistics.
+        """
+        for target in self.targets:
+            target.create_collection()
+
+        stage_names = ["load", "split", "embed", "upsert"]
+        stage_fns = {"split": self._split, "embed": self._embed, "upsert": self._upsert}
+        stats = {name: StageStats(name=name, workers=self.workers[name]) for name in stage_names}
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in stage_names[1:]]
+
+        threads = [
+            threading.Thread(
+                target=self._run_source,
+                args=(stats["load"], queues[0], self.workers["split"]),
+                name="ingest-load",
+                daemon=True,
+            )
+        ]
+        for position, name in enumerate(stage_names[1:]):
+            is_last = position == len(stage_names) - 2
+            lock = threading.Lock()
+            remaining_workers = [self.workers[name]]
+            downstream_workers = 0 if is_last else self.workers[stage_names[position + 2]]
+            for worker in range(self.workers[name]):
+                threads.append(
+                    threading.Thread(
+                        target=self._run_stage,
+                        args=(
+                            stage_fns[name],
+                            stats[name],
+                            queues[position],
+                            None if is_last else queues[position + 1],
+                            lock,
+                            remaining_workers,
+                            downstream_workers,
+                        ),
+                        name=f"ingest-{name}-{worker}",
+                        daemon=True,
+                    )
+                )
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started
+
+        if self._errors:
+            raise self._errors[0]
+
+        logger.info("Staged ingestion finished in %.1fs", wall_seconds)
+        for stage in stats.values():
+            logger.info(
+                "  %-7s workers=%d batches=%d docs=%d busy=%.1fs throughput=%.1f docs/s",
+                stage.name, stage.workers, stage.batches, stage.items, stage.busy_seconds, stage.throughput,
+            )
+
+        return stats
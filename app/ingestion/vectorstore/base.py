@@ -0,0 +1,221 @@
+import uuid
+from typing import List, Dict, Set, Iterable, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    FilterSelector,
+    Filter,
+    FieldCondition,
+    MatchAny,
+    PayloadSchemaType,
+    PointIdsList,
+)
+
+from app.ingestion.models import ChunkedDocumentModel, ChunkedDocumentsOutput, ChunkBatch
+from app.text_hash import calculate_chunk_hash
+from app.ingestion.vectorstore.collection_layout import CollectionLayout
+
+# Fixed namespace so the same chunk always maps to the same point id
+POINT_ID_NAMESPACE = uuid.UUID("6f1c1d2e-8a4b-5c3d-9e0f-a1b2c3d4e5f6")
+
+
+def point_id(chunk_id: str, chunk_hash: Optional[str], chunk_text: str) -> str:
+    """
+    Derive a stable point id from chunk_id and the chunk content hash.
+    Re-ingesting an unchanged chunk yields the same id, so upserts are idempotent.
+    """
+    chunk_hash = chunk_hash or calculate_chunk_hash(chunk_text)
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{chunk_id}:{chunk_hash}"))
+
+
+def point_id_for_chunk(chunk: ChunkedDocumentModel) -> str:
+    return point_id(chunk.chunk_id, chunk.chunk_hash, chunk.chunk_text)
+
+
+def batch_point_ids(batch: ChunkBatch) -> List[str]:
+    return [
+        point_id(chunk_id, chunk_hash, chunk_text)
+        for chunk_id, chunk_hash, chunk_text in zip(batch.chunk_ids, batch.chunk_hashes, batch.chunk_texts)
+    ]
+
+
+def batch_payloads(batch: ChunkBatch) -> List[Dict]:
+    """
+    Payload stored with each point: chunk metadata plus source info.
+    """
+    payloads = []
+    for i in range(len(batch)):
+        payload: Dict = batch.metadata[i].copy() if batch.metadata[i] else {}
+        payload.update({
+            "source_row_id": int(batch.source_row_ids[i]),
+            "chunk_id": batch.chunk_ids[i],
+            "chunk_text": batch.chunk_texts[i]  # optional: include for RAG retrieval
+        })
+        if batch.start_offsets[i] >= 0:
+            payload.update({
+                "start_offset": int(batch.start_offsets[i]),
+                "end_offset": int(batch.end_offsets[i])
+            })
+        payloads.append(payload)
+    return payloads
+
+
+class BaseBatchIngestor:
+    # Whether points need the BM25 sparse vector in addition to the dense one
+    requires_sparse: bool = False
+    # How log messages refer to where the points go
+    store_name: str = "Qdrant collection"
+
+    def __init__(
+            self,
+            collection_name: str,
+            client: QdrantClient,
+            dense_vector_size: int = 384,
+            layout: Optional[CollectionLayout] = None,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.dense_vector_size = dense_vector_size
+        self.layout = layout or CollectionLayout()
+
+    def create_collection(self):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Persist anything still buffered once ingestion is over. Qdrant stores
+        each write as it is made, so there is nothing to do here.
+        """
+
+    def _vectors(self, batch: ChunkBatch) -> Iterable:
+        """
+        Vectors of the batch in a form accepted by QdrantClient.upload_collection.
+        """
+        raise NotImplementedError
+
+    def _create_source_row_index(self):
+        """
+        Index source_row_id so per-row deletes do not scan the whole collection.
+        """
+        self.client.create_payload_index(
+            collection_name=self.collection_name,
+            field_name="source_row_id",
+            field_schema=PayloadSchemaType.INTEGER,
+        )
+
+    def _upload_points(self, batch: ChunkBatch, parallel: int = 3, batch_size: int = 64):
+        """
+        Write the points of a batch and wait until they are stored.
+        """
+        self.client.upload_collection(
+            collection_name=self.collection_name,
+            vectors=self._vectors(batch),
+            payload=batch_payloads(batch),
+            ids=batch_point_ids(batch),
+            batch_size=batch_size,
+            parallel=parallel,
+            wait=True
+        )
+
+    def _delete_points(self, point_ids: List[str]):
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(points=point_ids),
+            wait=True,
+        )
+
+    def upsert_chunk_batch(self, batch: ChunkBatch, parallel: int = 3):
+        """
+        Upload a columnar ChunkBatch straight from its arrays. `parallel` > 1
+        starts a pool of upload processes for this call, which only pays off
+        for large batches.
+        """
+        if len(batch) == 0:
+            print("No points to upload.")
+            return
+
+        self._upload_points(batch, parallel=parallel)
+        print(f"Uploaded {len(batch)} chunks to {self.store_name} '{self.collection_name}'")
+
+    def batch_upsert(self, docs: List[ChunkedDocumentsOutput]):
+        """
+        Upload all chunks from ChunkedDocumentsOutput to the Qdrant collection
+        """
+        chunks = [chunk for doc_output in docs for chunk in doc_output.chunks]
+        self.upsert_chunk_batch(ChunkBatch.from_chunks(chunks))
+
+    def _existing_point_ids(self, row_ids: List[int]) -> Set[str]:
+        """
+        Return ids of the points currently stored for the given source rows.
+        """
+        point_ids: Set[str] = set()
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key="source_row_id", match=MatchAny(any=list(row_ids)))]
+                ),
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            point_ids.update(str(point.id) for point in points)
+
+            if offset is None:
+                break
+
+        return point_ids
+
+    def sync_chunk_batch(self, batch: ChunkBatch, row_ids: Optional[Iterable[int]] = None, parallel: int = 3):
+        """
+        Make the collection match the batch, per source_row_id: upsert every
+        point of the batch and delete points whose chunk no longer exists.
+        `row_ids` defaults to the rows present in the batch; pass it to also
+        clear rows that now have no chunks. Other rows are left untouched.
+
+        Points whose id is already stored are upserted too: the id only covers
+        the chunk text, so a changed title, author, link or offset of the row
+        would otherwise keep its old payload.
+        """
+        row_ids = sorted(set(batch.source_row_ids.tolist() if row_ids is None else row_ids))
+        if not row_ids:
+            print("No points to upload.")
+            return
+
+        stale_ids = sorted(self._existing_point_ids(row_ids) - set(batch_point_ids(batch)))
+        if stale_ids:
+            self._delete_points(stale_ids)
+        print(f"Removed {len(stale_ids)} stale chunks from {self.store_name} '{self.collection_name}'")
+
+        self.upsert_chunk_batch(batch, parallel=parallel)
+
+    def sync_upsert(self, docs: List[ChunkedDocumentsOutput]):
+        """
+        Same as sync_chunk_batch, for chunk models that carry their vectors.
+        """
+        chunks = [chunk for doc_output in docs for chunk in doc_output.chunks]
+        self.sync_chunk_batch(
+            ChunkBatch.from_chunks(chunks),
+            row_ids=[doc_output.source_row_id for doc_output in docs],
+        )
+
+    def delete_rows(self, row_ids: List[int]):
+        """
+        Delete every point that belongs to the given source rows.
+        """
+        if not row_ids:
+            return
+
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[FieldCondition(key="source_row_id", match=MatchAny(any=list(row_ids)))]
+                )
+            ),
+            wait=True,
+        )
+        print(f"Deleted points of {len(row_ids)} rows from {self.store_name} '{self.collection_name}'")
@@ -0,0 +1,161 @@
+from typing import Optional, Literal, Dict
+
+from pydantic import BaseModel
+from qdrant_client.models import (
+    VectorParams,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    QuantizationSearchParams,
+    SearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    CompressionRatio,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+)
+
+# Bytes per stored dense dimension for each quantization, used for memory estimates
+_QUANTIZED_BYTES_PER_DIM = {
+    "scalar": 1.0,
+    "binary": 1 / 8,
+}
+
+
+class CollectionLayout(BaseModel):
+    """
+    How a collection stores and searches its dense vectors.
+
+    Covers quantization, what is kept on disk, HNSW build parameters and the
+    search-time parameters that go with them. The defaults reproduce the plain
+    float32, in-RAM layout Qdrant uses when nothing is configured.
+    """
+    name: str = "float32"
+    quantization: Optional[Literal["scalar", "product", "binary"]] = None
+    # Keep quantized vectors in RAM even when the originals are on disk
+    quantization_always_ram: bool = True
+    product_compression: Literal["x4", "x8", "x16", "x32", "x64"] = "x16"
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    hnsw_on_disk: Optional[bool] = None
+    # Below these sizes (in KB) Qdrant brute-forces instead of building / using HNSW
+    full_scan_threshold_kb: Optional[int] = None
+    indexing_threshold_kb: Optional[int] = None
+
+    search_hnsw_ef: Optional[int] = None
+    rescore: bool = True
+    oversampling: Optional[float] = None
+
+    def vector_params(self, size: int) -> VectorParams:
+        return VectorParams(
+            size=size,
+            distance=Distance.COSINE,
+            on_disk=self.on_disk_vectors or None,
+            hnsw_config=self.hnsw_config(),
+        )
+
+    def hnsw_config(self) -> Optional[HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None and self.hnsw_on_disk is None \
+                and self.full_scan_threshold_kb is None:
+            return None
+
+        return HnswConfigDiff(
+            m=self.hnsw_m,
+            ef_construct=self.hnsw_ef_construct,
+            on_disk=self.hnsw_on_disk,
+            full_scan_threshold=self.full_scan_threshold_kb,
+        )
+
+    def optimizers_config(self) -> Optional[OptimizersConfigDiff]:
+        if self.indexing_threshold_kb is None:
+            return None
+        return OptimizersConfigDiff(indexing_threshold=self.indexing_threshold_kb)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "product":
+            return ProductQuantization(
+                product=ProductQuantizationConfig(
+                    compression=CompressionRatio(self.product_compression),
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self) -> Optional[SearchParams]:
+        """
+        Search-time parameters to pass along with every query against this layout.
+        """
+        quantization = None
+        if self.quantization is not None:
+            quantization = QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+
+        if self.search_hnsw_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=self.search_hnsw_ef, quantization=quantization)
+
+    def collection_kwargs(self) -> Dict:
+        """
+        Keyword arguments for QdrantClient.create_collection besides the vectors config.
+        """
+        return {
+            "on_disk_payload": self.on_disk_payload or None,
+            "quantization_config": self.quantization_config(),
+            "optimizers_config": self.optimizers_config(),
+        }
+
+    def estimated_memory_bytes(self, num_points: int, dim: int) -> Dict[str, int]:
+        """
+        Rough RAM / disk split for the dense part of a collection.
+        Vectors are float32; the HNSW graph stores about 2 * m links of 4 bytes per point.
+        """
+        original = num_points * dim * 4
+        m = self.hnsw_m or 16
+        graph = num_points * m * 2 * 4
+
+        if self.quantization == "product":
+            quantized = int(original / int(self.product_compression[1:]))
+        elif self.quantization is not None:
+            quantized = int(num_points * dim * _QUANTIZED_BYTES_PER_DIM[self.quantization])
+        else:
+            quantized = 0
+
+        ram = 0 if self.on_disk_vectors else original
+        ram += 0 if self.hnsw_on_disk else graph
+        ram += quantized if self.quantization_always_ram or not self.on_disk_vectors else 0
+        disk = original + graph + quantized
+        return {"ram": ram, "disk": disk}
+
+
+# Layouts worth comparing with the layout benchmark, cheapest RAM last
+LAYOUTS: Dict[str, CollectionLayout] = {
+    layout.name: layout
+    for layout in [
+        CollectionLayout(name="float32"),
+        CollectionLayout(name="float32-m32", hnsw_m=32, hnsw_ef_construct=200, search_hnsw_ef=128),
+        CollectionLayout(name="scalar-int8", quantization="scalar", oversampling=2.0),
+        CollectionLayout(name="scalar-int8-ondisk", quantization="scalar", oversampling=2.0,
+                         on_disk_vectors=True, on_disk_payload=True),
+        CollectionLayout(name="product-x16", quantization="product", oversampling=3.0,
+                         on_disk_vectors=True, on_disk_payload=True),
+        CollectionLayout(name="binary", quantization="binary", oversampling=3.0,
+                         on_disk_vectors=True, on_disk_payload=True),
+    ]
+}
@@ -1,71 +1,31 @@
-import uuid
-from typing import List, Dict
+from typing import Dict
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
+import numpy as np
 
-from app.ingestion.models import ChunkedDocumentsOutput
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import BaseBatchIngestor
 
 
-class DenseBatchIngestor:
-    def __init__(
-            self,
-            collection_name: str,
-            client: QdrantClient,
-            dense_vector_size: int = 384,
-    ):
-        self.client = client
-        self.collection_name = collection_name
-        self.dense_vector_size = dense_vector_size
-
+class DenseBatchIngestor(BaseBatchIngestor):
     def create_collection(self):
         if not self.client.collection_exists(self.collection_name):
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config={
-                    "dense": VectorParams(
-                        size=self.dense_vector_size,
-                        distance=Distance.COSINE,
-                    )
+                    "dense": self.layout.vector_params(self.dense_vector_size)
                 },
+                **self.layout.collection_kwargs(),
             )
-            print(f"Dense collection created: {self.collection_name}")
+            self._create_source_row_index()
+            print(f"Dense collection created: {self.collection_name} (layout: {self.layout.name})")
         else:
             print(f"Collection already exists: {self.collection_name}")
 
-    def batch_upsert(self, docs: List[ChunkedDocumentsOutput]):
+    def _vectors(self, batch: ChunkBatch) -> Dict[str, np.ndarray]:
         """
-        Upload all chunks from ChunkedDocumentsOutput to a dense-only Qdrant collection
+        The dense matrix is handed to the client as is, without per-point lists
         """
-        points: List[PointStruct] = []
-
-        for doc_output in docs:
-            for chunk in doc_output.chunks:
-                if chunk.dense_vector is None:
-                    raise ValueError(f"Chunk {chunk.chunk_id} has no dense_vector.")
-
-                # Prepare payload: minimal metadata + source info
-                payload: Dict = chunk.metadata.copy() if chunk.metadata else {}
-                payload.update({
-                    "source_row_id": chunk.source_row_id,
-                    "chunk_id": chunk.chunk_id,
-                    "chunk_text": chunk.chunk_text  # optional: include for RAG retrieval
-                })
-
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    payload=payload,
-                    vector={"dense": chunk.dense_vector}
-                )
-                points.append(point)
+        if batch.dense_vectors is None:
+            raise ValueError(f"Chunk {batch.chunk_ids[0]} has no dense_vector.")
 
-        if points:
-            self.client.upload_points(
-                collection_name=self.collection_name,
-                points=points,
-                parallel=3,
-                wait=True
-            )
-            print(f"Uploaded {len(points)} chunks to Qdrant collection '{self.collection_name}'")
-        else:
-            print("No points to upload.")
+        return {"dense": batch.dense_vectors}
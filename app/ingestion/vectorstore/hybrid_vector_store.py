@@ -1,97 +1,45 @@
-import uuid
-from typing import List, Dict
+from typing import Dict, Iterator
 
-from qdrant_client import QdrantClient
 from qdrant_client.http.models import (
-    Distance,
-    VectorParams,
     SparseVectorParams,
-    PointStruct,
     SparseVector,
 )
 
-from app.ingestion.models import ChunkedDocumentsOutput
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import BaseBatchIngestor
 
 
-class HybridBatchIngestor:
-    def __init__(
-            self,
-            collection_name: str,
-            client: QdrantClient,
-            dense_vector_size: int = 384,
-    ):
-        self.client = client
-        self.collection_name = collection_name
-        self.dense_vector_size = dense_vector_size
+class HybridBatchIngestor(BaseBatchIngestor):
+    requires_sparse = True
 
     def create_collection(self):
         if not self.client.collection_exists(self.collection_name):
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config={
-                    "dense": VectorParams(
-                        size=self.dense_vector_size,
-                        distance=Distance.COSINE,
-                    )
+                    "dense": self.layout.vector_params(self.dense_vector_size)
                 },
                 sparse_vectors_config={
                     "bm25": SparseVectorParams()
                 },
+                **self.layout.collection_kwargs(),
             )
-            print(f"Hybrid collection created: {self.collection_name}")
+            self._create_source_row_index()
+            print(f"Hybrid collection created: {self.collection_name} (layout: {self.layout.name})")
         else:
             print(f"Collection already exists: {self.collection_name}")
 
-    def batch_upsert(self, docs: List[ChunkedDocumentsOutput]):
+    def _vectors(self, batch: ChunkBatch) -> Iterator[Dict]:
         """
-        Upload all chunks from multiple ChunkedDocumentsOutput to a hybrid Qdrant collection
+        Yield dense + BM25 vectors per point, reading rows of the batch arrays
         """
-        points: List[PointStruct] = []
-
-        for doc_output in docs:
-            for chunk in doc_output.chunks:
-                # Prepare payload
-                payload: Dict = chunk.metadata.copy() if chunk.metadata else {}
-                payload.update({
-                    "source_row_id": chunk.source_row_id,
-                    "chunk_id": chunk.chunk_id,
-                    "chunk_text": chunk.chunk_text
-                })
-
-                bm25_vector: SparseVector = None
-                if chunk.sparse_vector:
-                    if isinstance(chunk.sparse_vector, dict):
-                        bm25_vector = SparseVector(
-                            indices=chunk.sparse_vector.get("indices", []),
-                            values=chunk.sparse_vector.get("values", [])
-                        )
-                    else:
-                        raise ValueError(
-                            f"Chunk {chunk.chunk_id} has invalid sparse_vector format."
-                        )
-
-                # Validate dense vector
-                if not chunk.dense_vector:
-                    raise ValueError(f"Chunk {chunk.chunk_id} has no dense_vector.")
-
-                # Create point
-                point = PointStruct(
-                    id=str(uuid.uuid4()),
-                    payload=payload,
-                    vector={
-                        "dense": chunk.dense_vector,
-                        "bm25": bm25_vector
-                    }
-                )
-                points.append(point)
-
-        if points:
-            self.client.upload_points(
-                collection_name=self.collection_name,
-                points=points,
-                parallel=3,
-                wait=True
-            )
-            print(f"Uploaded {len(points)} chunks to Qdrant collection '{self.collection_name}'")
-        else:
-            print("No points to upload.")
+        # Validate dense vector
+        if batch.dense_vectors is None:
+            raise ValueError(f"Chunk {batch.chunk_ids[0]} has no dense_vector.")
+
+        for i in range(len(batch)):
+            vector = {"dense": batch.dense_vectors[i]}
+            if batch.sparse_indptr is not None and batch.sparse_indptr[i + 1] > batch.sparse_indptr[i]:
+                indices, values = batch.sparse_vector(i)
+                vector["bm25"] = SparseVector(indices=indices.tolist(), values=values.tolist())
+            yield vector
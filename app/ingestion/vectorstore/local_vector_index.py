@@ -0,0 +1,340 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Literal, Tuple, Set, Any
+
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization: vector ~= codes * scale.
+    """
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class LocalVectorIndex:
+    """
+    In-process cosine index over one dense vector per point, a stand-in for a
+    Qdrant collection where no server is available.
+
+    Vectors are normalised on write and stored in a memory-mapped matrix, one
+    slot per point: float32, or int8 with a per-slot scale. The matrix file
+    doubles in size when it is full, and slots of deleted points are reused, so
+    a write costs time proportional to its own size. Ids and payloads go to an
+    append-only journal; save() compacts it into a single snapshot. Top-k runs
+    as blocked matrix multiplication with argpartition over each block.
+    """
+
+    def __init__(
+            self,
+            index_dir: str,
+            dim: int = 384,
+            dtype: Literal["float32", "int8"] = "float32",
+            block_size: int = 16384,
+    ):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.dtype = dtype
+        self.block_size = block_size
+        self._vector_dtype = np.dtype(np.int8 if dtype == "int8" else np.float32)
+
+        self._lock = threading.Lock()
+        # Per slot; None marks a free slot
+        self._ids: List[Optional[str]] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._positions: Dict[str, int] = {}
+        # source_row_id -> ids of its points, so per-row syncs do not scan the index
+        self._row_points: Dict[Any, Set[str]] = {}
+        self._free_slots: List[int] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._journal = None
+
+        self._check_settings()
+        self._open_matrices()
+        self._replay_journal()
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    @property
+    def _journal_path(self) -> Path:
+        return self.index_dir / "points.jsonl"
+
+    def _check_settings(self):
+        settings_path = self.index_dir / "index.json"
+        settings = {"dim": self.dim, "dtype": self.dtype}
+        if not settings_path.exists():
+            with open(settings_path, "w", encoding="utf-8") as f:
+                json.dump(settings, f)
+            return
+
+        with open(settings_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        if stored != settings:
+            raise ValueError(
+                f"Index {self.index_dir} holds {stored['dtype']} vectors of size {stored['dim']}, "
+                f"not {self.dtype} of size {self.dim}."
+            )
+
+    @property
+    def capacity(self) -> int:
+        path = self.index_dir / "vectors.bin"
+        return path.stat().st_size // (self.dim * self._vector_dtype.itemsize) if path.exists() else 0
+
+    def _open_matrices(self):
+        capacity = self.capacity
+        if capacity == 0:
+            return
+        self._vectors = np.memmap(
+            self.index_dir / "vectors.bin", dtype=self._vector_dtype, mode="r+", shape=(capacity, self.dim)
+        )
+        if self.dtype == "int8":
+            self._scales = np.memmap(self.index_dir / "scales.bin", dtype=np.float32, mode="r+", shape=(capacity,))
+        if len(self._live) < capacity:
+            self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+
+    def _grow(self, required_slots: int):
+        """
+        Make room for `required_slots` slots, at least doubling the capacity.
+        """
+        capacity = self.capacity
+        if required_slots <= capacity:
+            return
+
+        new_capacity = max(1024, capacity * 2, required_slots)
+        for matrix in (self._vectors, self._scales):
+            if matrix is not None:
+                matrix.flush()
+        self._vectors = self._scales = None
+
+        with open(self.index_dir / "vectors.bin", "ab") as f:
+            f.truncate(new_capacity * self.dim * self._vector_dtype.itemsize)
+        if self.dtype == "int8":
+            with open(self.index_dir / "scales.bin", "ab") as f:
+                f.truncate(new_capacity * 4)
+        self._open_matrices()
+
+    def _replay_journal(self):
+        if not self._journal_path.exists():
+            return
+
+        with open(self._journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn last line of an interrupted write
+                if "upsert" in entry:
+                    for position, point_id, payload in entry["upsert"]:
+                        self._assign(position, point_id, payload)
+                else:
+                    for point_id in entry["delete"]:
+                        self._release(point_id)
+
+        self._free_slots = [position for position, point_id in enumerate(self._ids) if point_id is None]
+
+    def _append_journal(self, entry: Dict[str, Any]):
+        if self._journal is None:
+            self._journal = open(self._journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal.flush()
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+    def _assign(self, position: int, point_id: str, payload: Dict[str, Any]):
+        if position >= len(self._ids):
+            padding = position + 1 - len(self._ids)
+            self._ids.extend([None] * padding)
+            self._payloads.extend([None] * padding)
+        previous = self._payloads[position]
+        if previous is not None:
+            self._row_points.get(previous.get("source_row_id"), set()).discard(self._ids[position])
+        self._payloads[position] = payload
+        self._ids[position] = point_id
+        self._positions[point_id] = position
+        self._live[position] = True
+        self._row_points.setdefault(payload.get("source_row_id"), set()).add(point_id)
+
+    def _release(self, point_id: str) -> Optional[int]:
+        position = self._positions.pop(point_id, None)
+        if position is not None:
+            row_id = self._payloads[position].get("source_row_id")
+            row_points = self._row_points.get(row_id, set())
+            row_points.discard(point_id)
+            if not row_points:
+                self._row_points.pop(row_id, None)
+            self._ids[position] = None
+            self._payloads[position] = None
+            self._live[position] = False
+        return position
+
+    def _slot_for(self, point_id: str) -> int:
+        if point_id in self._positions:
+            return self._positions[point_id]
+        if self._free_slots:
+            return self._free_slots.pop()
+        self._ids.append(None)
+        self._payloads.append(None)
+        return len(self._ids) - 1
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]]):
+        """
+        Insert or replace points. Vectors are on disk and the points journaled
+        when this returns.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Expected vectors of shape ({len(ids)}, {self.dim}), got {vectors.shape}.")
+
+        vectors = _normalize(vectors)
+        if self.dtype == "int8":
+            vectors, scales = _quantize(vectors)
+
+        with self._lock:
+            positions = []
+            for point_id in ids:
+                position = self._slot_for(point_id)
+                self._positions[point_id] = position
+                positions.append(position)
+
+            self._grow(len(self._ids))
+            self._vectors[positions] = vectors
+            self._vectors.flush()
+            if self.dtype == "int8":
+                self._scales[positions] = scales
+                self._scales.flush()
+
+            # Journaled only once the vectors are written, so a replayed point always has one
+            for position, point_id, payload in zip(positions, ids, payloads):
+                self._assign(position, point_id, payload)
+            self._append_journal({"upsert": [list(entry) for entry in zip(positions, ids, payloads)]})
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            deleted = []
+            for point_id in ids:
+                position = self._release(point_id)
+                if position is not None:
+                    self._free_slots.append(position)
+                    deleted.append(point_id)
+            if deleted:
+                self._append_journal({"delete": deleted})
+
+    def save(self):
+        """
+        Compact the journal into one snapshot of the live points. Needed only to
+        keep the journal short: every write is already persisted.
+        """
+        with self._lock:
+            for matrix in (self._vectors, self._scales):
+                if matrix is not None:
+                    matrix.flush()
+
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+            tmp_path = self._journal_path.with_suffix(".jsonl.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                live_points = [
+                    [position, point_id, self._payloads[position]]
+                    for position, point_id in enumerate(self._ids)
+                    if point_id is not None
+                ]
+                f.write(json.dumps({"upsert": live_points}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self._journal_path)
+
+    def close(self):
+        self.save()
+
+    def ids_for_rows(self, row_ids: Iterable[int]) -> Set[str]:
+        with self._lock:
+            return {point_id for row_id in set(row_ids) for point_id in self._row_points.get(row_id, ())}
+
+    def retrieve(self, ids: Iterable[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        (id, payload) of the requested points that exist, in request order.
+        """
+        with self._lock:
+            return [
+                (point_id, self._payloads[self._positions[point_id]])
+                for point_id in ids
+                if point_id in self._positions
+            ]
+
+    def search(
+            self,
+            query_vectors: np.ndarray,
+            k: int = 3,
+            score_threshold: Optional[float] = None,
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Exact cosine top-k for every row of `query_vectors`, best first, as
+        (id, score, payload). Each block of the matrix is scored for all
+        queries at once and only each query's running top k is kept.
+        """
+        queries = _normalize(np.atleast_2d(query_vectors))
+        with self._lock:
+            n = len(self._ids)
+            vectors, scales = self._vectors, self._scales
+            live = self._live[:n].copy()
+            ids, payloads = self._ids[:n], self._payloads[:n]
+        k = min(k, int(live.sum()))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_positions = np.empty((len(queries), 0), dtype=np.int64)
+        rows = np.arange(len(queries))[:, None]
+
+        for start in range(0, n, self.block_size):
+            block = vectors[start:min(start + self.block_size, n)]
+            scores = queries @ block.T.astype(np.float32, copy=False)
+            if self.dtype == "int8":
+                scores *= scales[start:start + len(block)]
+            # Free slots keep stale vectors; they must never be returned
+            scores[:, ~live[start:start + len(block)]] = -np.inf
+
+            # Per query: the block's top k, then the top k of (running best + block best)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            candidate_scores = np.concatenate([best_scores, scores[rows, top]], axis=1)
+            candidate_positions = np.concatenate([best_positions, top + start], axis=1)
+
+            if candidate_scores.shape[1] > k:
+                keep = np.argpartition(-candidate_scores, k - 1, axis=1)[:, :k]
+                candidate_scores = candidate_scores[rows, keep]
+                candidate_positions = candidate_positions[rows, keep]
+            best_scores, best_positions = candidate_scores, candidate_positions
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_scores = best_scores[rows, order]
+        best_positions = best_positions[rows, order]
+
+        results = []
+        for query_scores, query_positions in zip(best_scores.tolist(), best_positions.tolist()):
+            results.append([
+                (ids[position], score, payloads[position])
+                for score, position in zip(query_scores, query_positions)
+                if score != -np.inf and (score_threshold is None or score >= score_threshold)
+            ])
+        return results
@@ -0,0 +1,51 @@
+from typing import List, Set
+
+import numpy as np
+
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import BaseBatchIngestor, batch_payloads, batch_point_ids
+from app.ingestion.vectorstore.local_vector_index import LocalVectorIndex
+
+
+class LocalDenseBatchIngestor(BaseBatchIngestor):
+    """
+    DenseBatchIngestor writing to a LocalVectorIndex instead of Qdrant. Point
+    ids and payloads are the same as in the Qdrant collections. Every write is
+    journaled as it is made; the journal is compacted once per run, when the
+    collection is opened and on close().
+    """
+
+    store_name = "local index"
+
+    def __init__(self, collection_name: str, index: LocalVectorIndex):
+        super().__init__(collection_name, client=None, dense_vector_size=index.dim)
+        self.index = index
+
+    def create_collection(self):
+        self.index.save()
+        print(f"Local dense index: {self.index.index_dir} ({len(self.index)} points, {self.index.dtype})")
+
+    def close(self):
+        self.index.close()
+
+    def _vectors(self, batch: ChunkBatch) -> np.ndarray:
+        if batch.dense_vectors is None:
+            raise ValueError(f"Chunk {batch.chunk_ids[0]} has no dense_vector.")
+
+        return batch.dense_vectors
+
+    def _upload_points(self, batch: ChunkBatch, parallel: int = 3, batch_size: int = 64):
+        self.index.upsert(batch_point_ids(batch), self._vectors(batch), batch_payloads(batch))
+
+    def _delete_points(self, point_ids: List[str]):
+        self.index.delete(point_ids)
+
+    def _existing_point_ids(self, row_ids: List[int]) -> Set[str]:
+        return self.index.ids_for_rows(row_ids)
+
+    def delete_rows(self, row_ids: List[int]):
+        if not row_ids:
+            return
+
+        self._delete_points(sorted(self.index.ids_for_rows(row_ids)))
+        print(f"Deleted points of {len(row_ids)} rows from {self.store_name} '{self.collection_name}'")
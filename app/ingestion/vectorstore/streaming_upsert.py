@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Set, Optional, Iterable, Dict, Any
+
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import BaseBatchIngestor, batch_point_ids
+
+
+def input_fingerprint(paths: Iterable[str], config: Dict[str, Any]) -> str:
+    """
+    Hash of the input files' contents and the settings that shape the batches
+    (splitter, models, batch size). A checkpoint is only valid for the same
+    fingerprint: any change means the numbered batches hold different points.
+    """
+    digest = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class UpsertCheckpoint:
+    """
+    Records which numbered upsert batches a collection has acknowledged.
+    Batches are numbered in the order they are submitted, so a re-run over the
+    same input skips everything that was already written.
+    """
+
+    def __init__(self, path: str, collection_name: str, batch_size: int, fingerprint: Optional[str] = None):
+        self.path = Path(path)
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._done: Set[int] = set()
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state["collection_name"] != collection_name or state["batch_size"] != batch_size:
+                raise ValueError(
+                    f"Checkpoint {self.path} was written for collection '{state['collection_name']}' "
+                    f"with batch_size={state['batch_size']}; delete it to start over."
+                )
+            if state.get("fingerprint") != fingerprint:
+                # The input or its configuration changed: batch numbers no longer mean the same points
+                print(f"Discarding checkpoint {self.path}: input or configuration changed since it was written")
+                self.path.unlink()
+                return
+            # Everything below the watermark is done, plus the listed batches above it
+            self._done = set(range(state["watermark"])) | set(state["done_above_watermark"])
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, batch_number: int) -> bool:
+        return batch_number in self._done
+
+    def mark_done(self, batch_number: int):
+        with self._lock:
+            self._done.add(batch_number)
+            self._save()
+
+    def _save(self):
+        watermark = 0
+        while watermark in self._done:
+            watermark += 1
+        state = {
+            "collection_name": self.collection_name,
+            "batch_size": self.batch_size,
+            "fingerprint": self.fingerprint,
+            "watermark": watermark,
+            "done_above_watermark": sorted(n for n in self._done if n > watermark),
+        }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """
+        Remove the checkpoint once the whole ingestion went through.
+        """
+        with self._lock:
+            self._done.clear()
+            if self.path.exists():
+                self.path.unlink()
+
+
+class StreamingUpserter:
+    """
+    Upload ChunkBatches to one collection in fixed-size batches as they arrive.
+    At most `parallel` batches are in flight, so memory stays constant however
+    large the input is. With a checkpoint, every acknowledged batch is recorded
+    and already written batches are skipped on the next run.
+    """
+
+    def __init__(
+            self,
+            ingestor: BaseBatchIngestor,
+            batch_size: int = 256,
+            parallel: int = 3,
+            checkpoint: Optional[UpsertCheckpoint] = None,
+    ):
+        if checkpoint is not None and checkpoint.batch_size != batch_size:
+            raise ValueError("Checkpoint batch_size does not match the upsert batch_size.")
+
+        self.ingestor = ingestor
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.checkpoint = checkpoint
+        self.uploaded_points = 0
+        self.deleted_points = 0
+        self.skipped_batches = 0
+
+        self._next_batch_number = 0
+        self._executor = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="upsert")
+        self._in_flight: Set[Future] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _upload(self, batch_number: int, batch: ChunkBatch):
+        self.ingestor._upload_points(batch, parallel=1, batch_size=len(batch))
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(batch_number)
+        return len(batch)
+
+    def _wait_for_slot(self):
+        while len(self._in_flight) >= self.parallel:
+            done, self._in_flight = wait(self._in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.uploaded_points += future.result()  # re-raises upload errors
+
+    def _delete_stale(self, batch: ChunkBatch, row_ids: Iterable[int]):
+        """
+        Delete stored points of the batch's rows that the batch no longer
+        contains, e.g. chunks of a row that got shorter.
+        """
+        row_ids = sorted(set(row_ids))
+        if not row_ids:
+            return
+        stale_ids = sorted(self.ingestor._existing_point_ids(row_ids) - set(batch_point_ids(batch)))
+        if stale_ids:
+            self.ingestor._delete_points(stale_ids)
+            self.deleted_points += len(stale_ids)
+
+    def submit(self, batch: ChunkBatch, row_ids: Optional[Iterable[int]] = None):
+        """
+        Upload a batch holding every chunk of its rows. `row_ids` defaults to the
+        rows present in the batch; pass it to also clear rows that now have no
+        chunks. Stale points of those rows are deleted before the upload.
+        """
+        self._delete_stale(batch, batch.source_row_ids.tolist() if row_ids is None else row_ids)
+
+        for start in range(0, len(batch), self.batch_size):
+            batch_number = self._next_batch_number
+            self._next_batch_number += 1
+
+            if self.checkpoint is not None and self.checkpoint.is_done(batch_number):
+                self.skipped_batches += 1
+                continue
+
+            self._wait_for_slot()
+            part = batch.take(range(start, min(start + self.batch_size, len(batch))))
+            self._in_flight.add(self._executor.submit(self._upload, batch_number, part))
+
+    def abort(self):
+        """
+        Stop without clearing the checkpoint, so the next run resumes from here.
+        Uploads already running are allowed to finish and be recorded.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def close(self):
+        """
+        Wait for the remaining uploads and drop the checkpoint.
+        """
+        try:
+            for future in self._in_flight:
+                self.uploaded_points += future.result()
+        finally:
+            self._in_flight.clear()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        print(
+            f"Uploaded {self.uploaded_points} chunks to {self.ingestor.store_name} '{self.ingestor.collection_name}' "
+            f"({self.skipped_batches} batches already done, {self.deleted_points} stale chunks removed)"
+        )
+
+
+def stream_upsert(
+        ingestor: BaseBatchIngestor,
+        batches: Iterable[ChunkBatch],
+        batch_size: int = 256,
+        parallel: int = 3,
+        checkpoint: Optional[UpsertCheckpoint] = None,
+):
+    """
+    Upload an iterator of ChunkBatches to one collection with bounded memory.
+    """
+    with StreamingUpserter(ingestor, batch_size=batch_size, parallel=parallel, checkpoint=checkpoint) as upserter:
+        for batch in batches:
+            upserter.submit(batch)
@@ -1,43 +1,208 @@
+import argparse
+import logging
 from pathlib import Path
 
 from qdrant_client import QdrantClient
 
 from app.ingestion.dataloader.csv_loader_service import CsvLoaderService
+from app.ingestion.embedding.embedding_cache import EmbeddingCache
 from app.ingestion.embedding.embedding_service import EmbeddingService
+from app.ingestion.manifest import IngestionManifest
+from app.ingestion.pipeline import MultiTargetIngestionPipeline
 from app.ingestion.splitters.recursive_splitter import RecursiveSplitter
 from app.ingestion.splitters.splitter_service import SplitterService
+from app.ingestion.vectorstore.collection_layout import LAYOUTS
+from app.ingestion.vectorstore.streaming_upsert import input_fingerprint
+from app.ingestion.staged_pipeline import StagedIngestionPipeline
 from app.ingestion.vectorstore.dense_vector_store import DenseBatchIngestor
 from app.ingestion.vectorstore.hybrid_vector_store import HybridBatchIngestor
+from app.ingestion.vectorstore.local_vector_index import LocalVectorIndex
+from app.ingestion.vectorstore.local_vector_store import LocalDenseBatchIngestor
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Ingest articles into the Qdrant collections.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only ingest rows that are new or changed since the last run, and drop removed rows.",
+    )
+    parser.add_argument(
+        "--manifest-path",
+        default=None,
+        help="Where the row hash manifest is kept between incremental runs "
+             "(default: data/ingestion_manifest.json, or inside the local index directory).",
+    )
+    parser.add_argument(
+        "--embedding-cache-dir",
+        default=str(Path(__file__).parent / "../data/embedding_cache"),
+        help="On-disk embedding cache, so unchanged chunks are never embedded twice.",
+    )
+    parser.add_argument(
+        "--no-embedding-cache",
+        action="store_true",
+        help="Embed every chunk from scratch without reading or writing the cache.",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Run load, split, embed and upsert concurrently with bounded queues between them.",
+    )
+    parser.add_argument(
+        "--split-processes",
+        type=int,
+        default=None,
+        help="Chunk documents in a pool of this many processes.",
+    )
+    parser.add_argument("--split-workers", type=int, default=1)
+    parser.add_argument("--embed-workers", type=int, default=1)
+    parser.add_argument("--upsert-workers", type=int, default=2)
+    parser.add_argument(
+        "--resumable",
+        action="store_true",
+        help="Stream fixed-size upserts and checkpoint each one, so an interrupted run resumes where it stopped.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=str(Path(__file__).parent / "../data/checkpoints"),
+        help="Where --resumable keeps its per-collection checkpoints.",
+    )
+    parser.add_argument(
+        "--layout",
+        default="float32",
+        choices=list(LAYOUTS),
+        help="Quantization / on-disk / HNSW layout for newly created collections (see app.layout_benchmark).",
+    )
+    parser.add_argument(
+        "--backend",
+        default="qdrant",
+        choices=["qdrant", "local"],
+        help="Write to the Qdrant collections, or to a dense-only in-process index that needs no server.",
+    )
+    parser.add_argument(
+        "--local-index-dir",
+        default=str(Path(__file__).parent / "../data/local_index"),
+        help="Where --backend local keeps its memory-mapped vectors and payloads.",
+    )
+    parser.add_argument("--local-index-dtype", default="float32", choices=["float32", "int8"])
+    args = parser.parse_args()
+    if args.manifest_path is None:
+        # Each backend records what it holds, so switching backends never skips rows
+        if args.backend == "local":
+            args.manifest_path = str(Path(args.local_index_dir) / "ingestion_manifest.json")
+        else:
+            args.manifest_path = str(Path(__file__).parent / "../data/ingestion_manifest.json")
+    if args.resumable and (args.incremental or args.staged):
+        parser.error("--resumable is a full rebuild and cannot be combined with --incremental or --staged")
+    return args
+
 
 if __name__ == '__main__':
+    args = _parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     data_folder = Path(__file__).parent / "../data"
     input_doc_path = data_folder / "articles.csv"
     csv_loader_service = CsvLoaderService(input_doc_path)
-    raw_csv_docs = csv_loader_service.csv_reader()
-    qdrant_client = QdrantClient(url="http://localhost:6333")
     token_splitter = RecursiveSplitter()
 
-    splitter_service = SplitterService(token_splitter)
-    chunked_docs = splitter_service.chunk(raw_csv_docs)
+    splitter_service = SplitterService(token_splitter, processes=args.split_processes)
+    manifest = IngestionManifest(args.manifest_path)
 
     embedding_service = EmbeddingService(
-        dense_model="sentence-transformers/all-MiniLM-L6-v2"
+        dense_model="sentence-transformers/all-MiniLM-L6-v2",
+        cache=None if args.no_embedding_cache else EmbeddingCache(args.embedding_cache_dir),
+        show_progress_bar=not args.staged,
     )
+    if args.backend == "local":
+        local_index = LocalVectorIndex(args.local_index_dir, dtype=args.local_index_dtype)
+        targets = [LocalDenseBatchIngestor("articles_dense_collection", index=local_index)]
+    else:
+        qdrant_client = QdrantClient(url="http://localhost:6333")
+        targets = [
+            HybridBatchIngestor("articles_hybrid_collection", client=qdrant_client, layout=LAYOUTS[args.layout]),
+            DenseBatchIngestor("articles_dense_collection", client=qdrant_client, layout=LAYOUTS[args.layout]),
+        ]
+
+    seen_row_ids = set()
+    ingested_hashes = {}
+
+    def select_docs(raw_csv_docs):
+        """
+        Track every row seen in the source and keep only the rows to ingest.
+        """
+        seen_row_ids.update(doc.row_id for doc in raw_csv_docs)
+        if args.incremental:
+            raw_csv_docs = manifest.changed(raw_csv_docs)
+        ingested_hashes.update((doc.row_id, doc.hash) for doc in raw_csv_docs)
+        return raw_csv_docs
+
+    # The split process pool must be shut down and the targets closed however ingestion ends
+    try:
+        if args.resumable:
+            pipeline = MultiTargetIngestionPipeline(embedding_service, targets=targets)
+            pipeline.run_streaming(
+                (
+                    splitter_service.chunk(select_docs(raw_csv_docs))
+                    for raw_csv_docs in csv_loader_service.csv_stream(batch_size=256)
+                ),
+                parallel=args.upsert_workers,
+                checkpoint_dir=args.checkpoint_dir,
+                checkpoint_fingerprint=input_fingerprint(
+                    [input_doc_path],
+                    {
+                        "csv_batch_size": 256,
+                        "splitter": type(token_splitter).__name__,
+                        "chunk_size": token_splitter.token_splitter.chunk_size,
+                        "chunk_overlap": token_splitter.token_splitter.chunk_overlap,
+                        "dense_model": embedding_service.dense_model_name,
+                        "backend": args.backend,
+                        "layout": args.layout,
+                        "local_index_dtype": args.local_index_dtype,
+                    },
+                ),
+            )
+
+            # Rows ingested before but no longer in the source are dropped, in every mode
+            removed_row_ids = manifest.removed_row_ids(seen_row_ids)
+            for target in targets:
+                target.delete_rows(removed_row_ids)
+        elif args.staged:
+            staged_pipeline = StagedIngestionPipeline(
+                loader=csv_loader_service,
+                splitter_service=splitter_service,
+                embedding_service=embedding_service,
+                targets=targets,
+                split_workers=args.split_workers,
+                embed_workers=args.embed_workers,
+                upsert_workers=args.upsert_workers,
+                doc_filter=select_docs,
+            )
+            staged_pipeline.run()
+
+            removed_row_ids = manifest.removed_row_ids(seen_row_ids)
+            for target in targets:
+                target.delete_rows(removed_row_ids)
+        else:
+            chunked_docs = []
+            for raw_csv_docs in csv_loader_service.csv_stream(batch_size=1000):
+                chunked_docs.extend(splitter_service.chunk(select_docs(raw_csv_docs)))
 
-    # 1. Create hybrid collection
-    print("Ingesting raw documents to hybrid vector store")
-    hybrid_collection_name = "articles_hybrid_collection"
-    hybrid_batch_ingestor = HybridBatchIngestor(hybrid_collection_name, client=qdrant_client)
-    ingestion_ready_docs = embedding_service.embed_documents_for_hybrid_ingestion(chunked_docs)
+            removed_row_ids = manifest.removed_row_ids(seen_row_ids)
+            if args.incremental and not chunked_docs and not removed_row_ids:
+                print("Nothing changed since the last ingestion.")
+                raise SystemExit(0)
 
-    hybrid_batch_ingestor.create_collection()
-    hybrid_batch_ingestor.batch_upsert(ingestion_ready_docs)
+            pipeline = MultiTargetIngestionPipeline(embedding_service, targets=targets)
+            pipeline.run(chunked_docs, removed_row_ids=removed_row_ids)
+    finally:
+        splitter_service.close()
+        for target in targets:
+            target.close()
 
-    # 2. Create dense collection
-    print("Ingesting raw documents to dense only vector store")
-    dense_collection_name = "articles_dense_collection"
-    dense_batch_ingestor = DenseBatchIngestor(dense_collection_name, client=qdrant_client)
-    ingestion_ready_docs = embedding_service.embed_documents_for_dense_ingestion(chunked_docs)
+    print(f"Rows ingested: {len(ingested_hashes)}, rows removed from source: {len(removed_row_ids)}")
 
-    dense_batch_ingestor.create_collection()
-    dense_batch_ingestor.batch_upsert(ingestion_ready_docs)
+    # Record what is now in the collections, only after every upload succeeded
+    manifest.record(ingested_hashes)
+    manifest.remove(removed_row_ids)
+    manifest.save()
@@ -0,0 +1,148 @@
+import argparse
+import time
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+import pandas as pd
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, CollectionStatus, SearchParams
+
+from app.ingestion.vectorstore.collection_layout import CollectionLayout, LAYOUTS
+from app.ingestion.vectorstore.dense_vector_store import DenseBatchIngestor
+from app.model_registry import model_registry
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare collection layouts on Recall@k, query latency and memory footprint."
+    )
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    parser.add_argument("--source-collection", default="articles_dense_collection")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument(
+        "--allow-full-scan",
+        action="store_true",
+        help="Keep Qdrant's default thresholds; small collections are then brute-forced instead of using HNSW.",
+    )
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections afterwards.")
+    return parser.parse_args()
+
+
+def _load_source_points(client: QdrantClient, collection_name: str) -> List[PointStruct]:
+    """
+    Copy every point of the already ingested collection, so layouts are compared on identical vectors.
+    """
+    points = []
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=collection_name,
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=["dense"],
+        )
+        points.extend(
+            PointStruct(id=record.id, vector={"dense": record.vector["dense"]}, payload=record.payload)
+            for record in records
+        )
+        if offset is None:
+            break
+    return points
+
+
+def _wait_until_indexed(client: QdrantClient, collection_name: str, timeout: float = 300.0):
+    started = time.perf_counter()
+    while client.get_collection(collection_name).status != CollectionStatus.GREEN:
+        if time.perf_counter() - started > timeout:
+            raise TimeoutError(f"Collection {collection_name} was not indexed within {timeout}s")
+        time.sleep(0.5)
+
+
+def _search(client: QdrantClient, collection_name: str, query_vector: List[float], k: int,
+            search_params) -> List[str]:
+    response = client.query_points(
+        collection_name=collection_name,
+        query=query_vector,
+        using="dense",
+        limit=k,
+        search_params=search_params,
+        with_payload=["chunk_id"],
+    )
+    return [point.payload.get("chunk_id") for point in response.points]
+
+
+def benchmark_layout(
+        client: QdrantClient,
+        layout: CollectionLayout,
+        points: List[PointStruct],
+        query_vectors: np.ndarray,
+        expected_chunk_ids: List[str],
+        k: int,
+) -> Dict:
+    collection_name = f"bench_{layout.name}"
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+
+    dim = len(points[0].vector["dense"])
+    DenseBatchIngestor(collection_name, client=client, dense_vector_size=dim, layout=layout).create_collection()
+    client.upload_points(collection_name=collection_name, points=points, batch_size=256, wait=True)
+    _wait_until_indexed(client, collection_name)
+
+    search_params = layout.search_params()
+    exact_params = SearchParams(exact=True)
+    queries = [vector.tolist() for vector in query_vectors]
+
+    # Warm-up so the first timed query does not pay for cold caches
+    _search(client, collection_name, queries[0], k, search_params)
+
+    latencies = []
+    hits = 0
+    overlap = 0.0
+    for query, expected_chunk_id in zip(queries, expected_chunk_ids):
+        started = time.perf_counter()
+        retrieved = _search(client, collection_name, query, k, search_params)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        hits += expected_chunk_id in retrieved
+        exact = _search(client, collection_name, query, k, exact_params)
+        overlap += len(set(retrieved) & set(exact)) / max(len(exact), 1)
+
+    memory = layout.estimated_memory_bytes(len(points), dim)
+    return {
+        "layout": layout.name,
+        f"recall@{k}": hits / len(queries),
+        f"ann_overlap@{k}": overlap / len(queries),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "est_ram_mb": memory["ram"] / 1024 ** 2,
+        "est_disk_mb": memory["disk"] / 1024 ** 2,
+    }
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+
+    data_folder = Path(__file__).parent / "../data"
+    eval_dataset = pd.read_csv(data_folder / "rag_eval_dataset.csv")
+    client = QdrantClient(url="http://localhost:6333")
+    dense_model = model_registry.dense()
+
+    points = _load_source_points(client, args.source_collection)
+    print(f"Copied {len(points)} points from '{args.source_collection}'")
+    query_vectors = dense_model.encode(eval_dataset["question"].tolist(), batch_size=64)
+    expected_chunk_ids = eval_dataset["source_chunk_id"].astype(str).tolist()
+
+    rows = []
+    for layout_name in args.layouts:
+        layout = LAYOUTS[layout_name]
+        if not args.allow_full_scan:
+            # A few thousand points stay under Qdrant's default thresholds; force HNSW so layouts differ
+            layout = layout.model_copy(update={"full_scan_threshold_kb": 10, "indexing_threshold_kb": 10})
+        rows.append(benchmark_layout(client, layout, points, query_vectors, expected_chunk_ids, args.k))
+        if not args.keep:
+            client.delete_collection(f"bench_{layout.name}")
+
+    # RAM / disk are estimates for the dense vectors and HNSW graph, payload excluded
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda value: f"{value:.3f}"))
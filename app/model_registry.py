@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Dict, Tuple, Callable, Any, List, Iterable
+
+from fastembed import SparseTextEmbedding
+from pydantic import BaseModel
+from sentence_transformers import SentenceTransformer
+
+DEFAULT_DENSE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_SPARSE_MODEL = "Qdrant/bm25"
+
+
+class ModelLoadStats(BaseModel):
+    """
+    How long a model took to load, and to run its first (warm-up) inference.
+    """
+    kind: str
+    model_name: str
+    load_seconds: float
+    warm_up_seconds: float = 0.0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of embedding models.
+
+    Each model is loaded lazily, once per process, the first time it is asked
+    for. Loading is guarded per model, so two threads asking for the same model
+    wait for a single load while different models load in parallel.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._stats: Dict[Tuple[str, str], ModelLoadStats] = {}
+        self._lock = threading.Lock()
+        self._model_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def _get(self, kind: str, model_name: str, loader: Callable[[str], Any]):
+        key = (kind, model_name)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model_lock = self._model_locks.setdefault(key, threading.Lock())
+
+        with model_lock:
+            # Another thread may have finished loading while we waited
+            if key in self._models:
+                return self._models[key]
+
+            started = time.perf_counter()
+            model = loader(model_name)
+            load_seconds = time.perf_counter() - started
+            print(f"Loaded {kind} model '{model_name}' in {load_seconds:.2f}s")
+
+            self._stats[key] = ModelLoadStats(kind=kind, model_name=model_name, load_seconds=load_seconds)
+            self._models[key] = model
+            return model
+
+    def dense(self, model_name: str = DEFAULT_DENSE_MODEL) -> SentenceTransformer:
+        return self._get("dense", model_name, SentenceTransformer)
+
+    def sparse(self, model_name: str = DEFAULT_SPARSE_MODEL) -> SparseTextEmbedding:
+        return self._get("sparse", model_name, lambda name: SparseTextEmbedding(model_name=name))
+
+    def is_loaded(self, kind: str, model_name: str) -> bool:
+        return (kind, model_name) in self._models
+
+    def warm_up(
+            self,
+            dense_models: Iterable[str] = (DEFAULT_DENSE_MODEL,),
+            sparse_models: Iterable[str] = (DEFAULT_SPARSE_MODEL,),
+    ) -> List[ModelLoadStats]:
+        """
+        Load the given models and run one tiny inference through each, so the
+        first real query does not pay for loading or lazy initialisation.
+        """
+        for model_name in dense_models:
+            model = self.dense(model_name)
+            started = time.perf_counter()
+            model.encode("warm up")
+            self._stats[("dense", model_name)].warm_up_seconds = time.perf_counter() - started
+
+        for model_name in sparse_models:
+            model = self.sparse(model_name)
+            started = time.perf_counter()
+            list(model.embed(["warm up"]))
+            self._stats[("sparse", model_name)].warm_up_seconds = time.perf_counter() - started
+
+        return self.load_stats()
+
+    def load_stats(self) -> List[ModelLoadStats]:
+        return list(self._stats.values())
+
+
+# Shared by every component in the process
+model_registry = ModelRegistry()
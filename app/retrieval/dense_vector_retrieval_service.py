@@ -1,16 +1,46 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import SearchParams, QueryResponse, QueryRequest, WithPayloadInterface
+
+from app.retrieval.payloads import point_to_result, hydrate_results, ahydrate_results
 
 
 class DenseVectorRetrievalService:
     def __init__(
         self,
-        client: QdrantClient,
+        client: Union[QdrantClient, AsyncQdrantClient],
         collection_name: str = "articles_dense_collection",
+        search_params: Optional[SearchParams] = None,
+        with_payload: WithPayloadInterface = True,
     ):
+        # similarity_search needs a QdrantClient, asimilarity_search an AsyncQdrantClient
         self.client = client
         self.collection_name = collection_name
+        # HNSW ef / quantization rescoring matching the collection layout
+        self.search_params = search_params
+        # Payload fields returned with each hit, e.g. ["chunk_id"]; hydrate() fills in the rest
+        self.with_payload = with_payload
+
+    def _query_kwargs(self, query_vector: List[float], k: int, score_threshold: float) -> Dict[str, Any]:
+        return dict(
+            collection_name=self.collection_name,
+            query=query_vector,   # dense vector
+            using="dense",
+            limit=k,
+            score_threshold=score_threshold,
+            search_params=self.search_params,
+            with_payload=self.with_payload,
+        )
+
+    def _query_request(self, query_vector: List[float], k: int, score_threshold: float) -> QueryRequest:
+        kwargs = self._query_kwargs(query_vector, k, score_threshold)
+        kwargs.pop("collection_name")
+        return QueryRequest(params=kwargs.pop("search_params"), **kwargs)
+
+    @staticmethod
+    def _to_results(response: QueryResponse) -> List[Dict[str, Any]]:
+        return [point_to_result(point) for point in response.points]
 
     def similarity_search(
         self,
@@ -19,30 +49,55 @@ class DenseVectorRetrievalService:
         score_threshold: float = 0.5,
     ) -> List[Dict[str, Any]]:
 
-        response = self.client.query_points(
-            collection_name=self.collection_name,
-            query=query_vector,   # dense vector
-            using="dense",
-            limit=k,
-            score_threshold=score_threshold,
-            with_payload=True,
-        )
+        response = self.client.query_points(**self._query_kwargs(query_vector, k, score_threshold))
+        return self._to_results(response)
 
-        results = []
-        for point in response.points:
-            payload = point.payload
-
-            results.append({
-                "id": point.id,
-                "score": point.score,
-                "text": payload.get("text"),
-                "metadata": {
-                    key: value
-                    for key, value in payload.items()
-                    if key != "text"
-                },
-            })
+    async def asimilarity_search(
+        self,
+        query_vector: List[float],
+        k: int = 3,
+        score_threshold: float = 0.5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as similarity_search, awaiting an AsyncQdrantClient.
+        """
+        response = await self.client.query_points(**self._query_kwargs(query_vector, k, score_threshold))
+        return self._to_results(response)
 
+    def similarity_search_batch(
+        self,
+        query_vectors: List[List[float]],
+        k: int = 3,
+        score_threshold: float = 0.5,
+        batch_size: int = 64,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for many query vectors with one query_batch_points round trip per
+        `batch_size` queries. Returns one result list per query, in input order.
+        """
+        results = []
+        for start in range(0, len(query_vectors), batch_size):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(query_vector, k, score_threshold)
+                    for query_vector in query_vectors[start:start + batch_size]
+                ],
+            )
+            results.extend(self._to_results(response) for response in responses)
         return results
 
+    def hydrate(self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True) -> List[Dict[str, Any]]:
+        """
+        Fetch the full payload (text, metadata) of final hits found with a narrow
+        payload selector, in one batched retrieve. Results are updated in place.
+        """
+        return hydrate_results(self.client, self.collection_name, results, with_payload)
 
+    async def ahydrate(
+            self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as hydrate, awaiting an AsyncQdrantClient.
+        """
+        return await ahydrate_results(self.client, self.collection_name, results, with_payload)
@@ -0,0 +1,169 @@
+from typing import List, Dict, Any, Optional, Union, Literal
+
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Prefetch,
+    FusionQuery,
+    Fusion,
+    SparseVector,
+    SearchParams,
+    QueryResponse,
+    QueryRequest,
+    WithPayloadInterface,
+)
+
+from app.retrieval.payloads import point_to_result, hydrate_results, ahydrate_results
+
+
+class FusedRetrievalService:
+    """
+    Dense, sparse and hybrid candidates ranked in a single query_points call.
+
+    The hybrid collection carries both the dense and the BM25 vectors, so all
+    three candidate lists are expressed as prefetches of one request and fused
+    server-side with RRF or DBSF. Scores are therefore on one scale, and a
+    chunk found by several prefetches appears once.
+    """
+
+    def __init__(
+            self,
+            client: Union[QdrantClient, AsyncQdrantClient],
+            collection_name: str = "articles_hybrid_collection",
+            fusion: Literal["rrf", "dbsf"] = "rrf",
+            search_params: Optional[SearchParams] = None,
+            with_payload: WithPayloadInterface = True,
+    ):
+        # similarity_search needs a QdrantClient, asimilarity_search an AsyncQdrantClient
+        self.client = client
+        self.collection_name = collection_name
+        self.fusion = Fusion(fusion)
+        # HNSW ef / quantization rescoring for the dense prefetches
+        self.search_params = search_params
+        # Payload fields returned with each hit, e.g. ["chunk_id"]; hydrate() fills in the rest
+        self.with_payload = with_payload
+
+    def _query_kwargs(
+            self,
+            query_dense: List[float],
+            query_sparse: Dict[str, List[float]],
+            k: int,
+            dense_limit: int,
+            sparse_limit: int,
+    ) -> Dict[str, Any]:
+        sparse_vector = SparseVector(
+            indices=query_sparse["indices"],
+            values=query_sparse["values"]
+        )
+        prefetch_dense = Prefetch(query=query_dense, using="dense", limit=dense_limit, params=self.search_params)
+        prefetch_sparse = Prefetch(query=sparse_vector, using="bm25", limit=sparse_limit)
+
+        # Inner fusion of the two, as the hybrid strategy ranks them
+        prefetch_hybrid = Prefetch(
+            prefetch=[prefetch_dense, prefetch_sparse],
+            query=FusionQuery(fusion=self.fusion),
+            limit=max(dense_limit, sparse_limit),
+        )
+
+        return dict(
+            collection_name=self.collection_name,
+            prefetch=[prefetch_dense, prefetch_sparse, prefetch_hybrid],
+            query=FusionQuery(fusion=self.fusion),
+            # Head room for dropping duplicate chunk_ids
+            limit=2 * k,
+            with_payload=self.with_payload,
+        )
+
+    def _query_request(self, *args) -> QueryRequest:
+        kwargs = self._query_kwargs(*args)
+        kwargs.pop("collection_name")
+        return QueryRequest(**kwargs)
+
+    @staticmethod
+    def _to_results(response: QueryResponse, k: int) -> List[Dict[str, Any]]:
+        results = []
+        seen_chunk_ids = set()
+        for point in response.points:
+            chunk_id = (point.payload or {}).get("chunk_id", point.id)
+            if chunk_id in seen_chunk_ids:
+                continue
+            seen_chunk_ids.add(chunk_id)
+
+            results.append(point_to_result(point))
+            if len(results) == k:
+                break
+
+        return results
+
+    def similarity_search(
+            self,
+            query_dense: List[float],
+            query_sparse: Dict[str, List[float]],
+            k: int = 3,
+            dense_limit: int = 20,
+            sparse_limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        response = self.client.query_points(
+            **self._query_kwargs(query_dense, query_sparse, k, dense_limit, sparse_limit)
+        )
+        return self._to_results(response, k)
+
+    async def asimilarity_search(
+            self,
+            query_dense: List[float],
+            query_sparse: Dict[str, List[float]],
+            k: int = 3,
+            dense_limit: int = 20,
+            sparse_limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as similarity_search, awaiting an AsyncQdrantClient.
+        """
+        response = await self.client.query_points(
+            **self._query_kwargs(query_dense, query_sparse, k, dense_limit, sparse_limit)
+        )
+        return self._to_results(response, k)
+
+    def similarity_search_batch(
+            self,
+            queries_dense: List[List[float]],
+            queries_sparse: List[Dict[str, List[float]]],
+            k: int = 3,
+            dense_limit: int = 20,
+            sparse_limit: int = 20,
+            batch_size: int = 64,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Fused search for many queries with one query_batch_points round trip per
+        `batch_size` queries. Returns one result list per query, in input order.
+        """
+        if len(queries_dense) != len(queries_sparse):
+            raise ValueError("queries_dense and queries_sparse must have the same length.")
+
+        results = []
+        for start in range(0, len(queries_dense), batch_size):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(query_dense, query_sparse, k, dense_limit, sparse_limit)
+                    for query_dense, query_sparse in zip(
+                        queries_dense[start:start + batch_size], queries_sparse[start:start + batch_size]
+                    )
+                ],
+            )
+            results.extend(self._to_results(response, k) for response in responses)
+        return results
+
+    def hydrate(self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True) -> List[Dict[str, Any]]:
+        """
+        Fetch the full payload (text, metadata) of final hits found with a narrow
+        payload selector, in one batched retrieve. Results are updated in place.
+        """
+        return hydrate_results(self.client, self.collection_name, results, with_payload)
+
+    async def ahydrate(
+            self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as hydrate, awaiting an AsyncQdrantClient.
+        """
+        return await ahydrate_results(self.client, self.collection_name, results, with_payload)
@@ -1,26 +1,36 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 
-from qdrant_client import QdrantClient
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http.models import Prefetch, FusionQuery, Fusion
-from qdrant_client.models import SparseVector
+from qdrant_client.models import SparseVector, SearchParams, QueryResponse, QueryRequest, WithPayloadInterface
+
+from app.retrieval.payloads import point_to_result, hydrate_results, ahydrate_results
 
 
 class HybridQueryService:
-    def __init__(self, client: QdrantClient, collection_name="articles_hybrid_collection"):
+    def __init__(
+            self,
+            client: Union[QdrantClient, AsyncQdrantClient],
+            collection_name="articles_hybrid_collection",
+            search_params: Optional[SearchParams] = None,
+            with_payload: WithPayloadInterface = True,
+    ):
+        # similarity_search needs a QdrantClient, asimilarity_search an AsyncQdrantClient
         self.client = client
         self.collection_name = collection_name
+        # HNSW ef / quantization rescoring for the dense prefetch
+        self.search_params = search_params
+        # Payload fields returned with each hit, e.g. ["chunk_id"]; hydrate() fills in the rest
+        self.with_payload = with_payload
 
-    def similarity_search(
+    def _query_kwargs(
             self,
             query_dense: List[float],
             query_sparse: Dict[str, List[float]],
-            k: int = 5,
-            dense_limit: int = 20,
-            sparse_limit: int = 20
-    ) -> List[Dict[str, Any]]:
-        """
-        Perform a hybrid search via RRF fusion of dense + sparse prefetch queries.
-        """
+            k: int,
+            dense_limit: int,
+            sparse_limit: int,
+    ) -> Dict[str, Any]:
         # Build sparse vector
         sparse_vector = SparseVector(
             indices=query_sparse["indices"],
@@ -38,29 +48,102 @@ class HybridQueryService:
         prefetch_dense = Prefetch(
             query=query_dense,
             using="dense",
-            limit=dense_limit
+            limit=dense_limit,
+            params=self.search_params
         )
 
-        # Execute the hybrid query
-        results = self.client.query_points(
+        return dict(
             collection_name=self.collection_name,
             prefetch=[prefetch_sparse, prefetch_dense],
             query=FusionQuery(fusion=Fusion.RRF),
             limit=k,
             score_threshold=0.5,
-            with_payload=True
+            with_payload=self.with_payload
         )
 
-        return [
-            {
-                "id": point.id,
-                "score": point.score,
-                "text": point.payload.get("text"),
-                "metadata": {
-                    k: v
-                    for k, v in point.payload.items()
-                    if k != "text"
-                },
-            }
-            for point in results.points
-        ]
+    def _query_request(self, *args) -> QueryRequest:
+        kwargs = self._query_kwargs(*args)
+        kwargs.pop("collection_name")
+        return QueryRequest(**kwargs)
+
+    @staticmethod
+    def _to_results(results: QueryResponse) -> List[Dict[str, Any]]:
+        return [point_to_result(point) for point in results.points]
+
+    def similarity_search(
+            self,
+            query_dense: List[float],
+            query_sparse: Dict[str, List[float]],
+            k: int = 5,
+            dense_limit: int = 20,
+            sparse_limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform a hybrid search via RRF fusion of dense + sparse prefetch queries.
+        """
+        # Execute the hybrid query
+        results = self.client.query_points(
+            **self._query_kwargs(query_dense, query_sparse, k, dense_limit, sparse_limit)
+        )
+        return self._to_results(results)
+
+    async def asimilarity_search(
+            self,
+            query_dense: List[float],
+            query_sparse: Dict[str, List[float]],
+            k: int = 5,
+            dense_limit: int = 20,
+            sparse_limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as similarity_search, awaiting an AsyncQdrantClient.
+        """
+        results = await self.client.query_points(
+            **self._query_kwargs(query_dense, query_sparse, k, dense_limit, sparse_limit)
+        )
+        return self._to_results(results)
+
+    def similarity_search_batch(
+            self,
+            queries_dense: List[List[float]],
+            queries_sparse: List[Dict[str, List[float]]],
+            k: int = 5,
+            dense_limit: int = 20,
+            sparse_limit: int = 20,
+            batch_size: int = 64,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Hybrid search for many queries with one query_batch_points round trip per
+        `batch_size` queries. Returns one result list per query, in input order.
+        """
+        if len(queries_dense) != len(queries_sparse):
+            raise ValueError("queries_dense and queries_sparse must have the same length.")
+
+        results = []
+        for start in range(0, len(queries_dense), batch_size):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    self._query_request(query_dense, query_sparse, k, dense_limit, sparse_limit)
+                    for query_dense, query_sparse in zip(
+                        queries_dense[start:start + batch_size], queries_sparse[start:start + batch_size]
+                    )
+                ],
+            )
+            results.extend(self._to_results(response) for response in responses)
+        return results
+
+    def hydrate(self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True) -> List[Dict[str, Any]]:
+        """
+        Fetch the full payload (text, metadata) of final hits found with a narrow
+        payload selector, in one batched retrieve. Results are updated in place.
+        """
+        return hydrate_results(self.client, self.collection_name, results, with_payload)
+
+    async def ahydrate(
+            self, results: List[Dict[str, Any]], with_payload: WithPayloadInterface = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as hydrate, awaiting an AsyncQdrantClient.
+        """
+        return await ahydrate_results(self.client, self.collection_name, results, with_payload)
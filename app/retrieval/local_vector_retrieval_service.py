@@ -0,0 +1,96 @@
+import asyncio
+from typing import List, Dict, Any, Optional, Union, Sequence
+
+import numpy as np
+
+from app.ingestion.vectorstore.local_vector_index import LocalVectorIndex
+from app.retrieval.payloads import make_result
+
+# with_payload as accepted by the Qdrant services: all, nothing, or a list of fields
+PayloadSelector = Union[bool, Sequence[str]]
+
+
+def _select(payload: Dict[str, Any], with_payload: PayloadSelector) -> Dict[str, Any]:
+    if with_payload is True:
+        return payload
+    if not with_payload:
+        return {}
+    return {key: payload[key] for key in with_payload if key in payload}
+
+
+class LocalVectorRetrievalService:
+    """
+    DenseVectorRetrievalService over a LocalVectorIndex: same methods and the
+    same result dicts, answered in process without a Qdrant server.
+    """
+
+    def __init__(
+        self,
+        index: LocalVectorIndex,
+        collection_name: str = "articles_dense_collection",
+        with_payload: PayloadSelector = True,
+    ):
+        self.index = index
+        self.collection_name = collection_name
+        self.with_payload = with_payload
+
+    def _to_results(self, hits) -> List[Dict[str, Any]]:
+        return [
+            make_result(point_id, score, _select(payload, self.with_payload))
+            for point_id, score, payload in hits
+        ]
+
+    def similarity_search(
+        self,
+        query_vector: List[float],
+        k: int = 3,
+        score_threshold: float = 0.5,
+    ) -> List[Dict[str, Any]]:
+        return self.similarity_search_batch([query_vector], k=k, score_threshold=score_threshold)[0]
+
+    async def asimilarity_search(
+        self,
+        query_vector: List[float],
+        k: int = 3,
+        score_threshold: float = 0.5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Same as similarity_search, run off the event loop.
+        """
+        return await asyncio.to_thread(self.similarity_search, query_vector, k, score_threshold)
+
+    def similarity_search_batch(
+        self,
+        query_vectors: Union[List[List[float]], np.ndarray],
+        k: int = 3,
+        score_threshold: float = 0.5,
+        batch_size: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search all query vectors in one pass over the index. Returns one result
+        list per query, in input order. `batch_size` is accepted for interface
+        compatibility; every query shares each block of the matrix anyway.
+        """
+        if len(query_vectors) == 0:
+            return []
+
+        hits = self.index.search(np.asarray(query_vectors, dtype=np.float32), k=k, score_threshold=score_threshold)
+        return [self._to_results(query_hits) for query_hits in hits]
+
+    def hydrate(self, results: List[Dict[str, Any]], with_payload: PayloadSelector = True) -> List[Dict[str, Any]]:
+        """
+        Fill in the payload fields left out by a narrow with_payload. Results are
+        updated in place.
+        """
+        payloads = dict(self.index.retrieve(str(result["id"]) for result in results))
+        for result in results:
+            payload = payloads.get(str(result["id"]))
+            if payload is not None:
+                merged = {**result["metadata"], **_select(payload, with_payload)}
+                result.update(make_result(result["id"], result["score"], merged))
+        return results
+
+    async def ahydrate(
+            self, results: List[Dict[str, Any]], with_payload: PayloadSelector = True
+    ) -> List[Dict[str, Any]]:
+        return self.hydrate(results, with_payload)
@@ -0,0 +1,77 @@
+from typing import List, Dict, Any
+
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import WithPayloadInterface
+
+# Payload fields worth returning when only the ranking matters
+ID_ONLY_PAYLOAD = ["chunk_id", "source_row_id"]
+
+
+def make_result(point_id, score: float, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build a result dict from a point id, score and payload, for backends that
+    do not return Qdrant points.
+    """
+    # The payload is used as metadata without copying unless it carries "text"
+    metadata = payload
+    if "text" in payload:
+        metadata = {key: value for key, value in payload.items() if key != "text"}
+
+    return {
+        "id": point_id,
+        "score": score,
+        "text": payload.get("text"),
+        "metadata": metadata,
+    }
+
+
+def point_to_result(point) -> Dict[str, Any]:
+    """
+    Shape a scored point like every retrieval service returns it.
+    """
+    return make_result(point.id, point.score, point.payload or {})
+
+
+def _apply_records(results: List[Dict[str, Any]], records) -> List[Dict[str, Any]]:
+    payloads = {str(record.id): record.payload or {} for record in records}
+    for result in results:
+        payload = payloads.get(str(result["id"]))
+        if payload is not None:
+            result.update(make_result(result["id"], result["score"], {**result["metadata"], **payload}))
+    return results
+
+
+def hydrate_results(
+        client: QdrantClient,
+        collection_name: str,
+        results: List[Dict[str, Any]],
+        with_payload: WithPayloadInterface = True,
+) -> List[Dict[str, Any]]:
+    """
+    Fill in text and metadata for results fetched with a narrow payload
+    selector, using one batched retrieve for all of them. Results are updated
+    in place, so a flattened list of several queries' results works too.
+    """
+    ids = list(dict.fromkeys(result["id"] for result in results))
+    if not ids:
+        return results
+
+    records = client.retrieve(collection_name=collection_name, ids=ids, with_payload=with_payload)
+    return _apply_records(results, records)
+
+
+async def ahydrate_results(
+        client: AsyncQdrantClient,
+        collection_name: str,
+        results: List[Dict[str, Any]],
+        with_payload: WithPayloadInterface = True,
+) -> List[Dict[str, Any]]:
+    """
+    Same as hydrate_results, awaiting an AsyncQdrantClient.
+    """
+    ids = list(dict.fromkeys(result["id"] for result in results))
+    if not ids:
+        return results
+
+    records = await client.retrieve(collection_name=collection_name, ids=ids, with_payload=with_payload)
+    return _apply_records(results, records)
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+from typing import List, Dict
+
+from pydantic import BaseModel
+
+from app.model_registry import model_registry, DEFAULT_DENSE_MODEL, DEFAULT_SPARSE_MODEL
+
+
+class QueryEmbedding(BaseModel):
+    """
+    A query encoded once by every model, shared by all retrieval strategies.
+    """
+    query: str
+    dense: List[float]
+    sparse: Dict[str, List]  # {"indices": [...], "values": [...]}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a query. Both models lowercase their input and ignore
+    extra whitespace, so these variants encode to the same vectors.
+    """
+    return " ".join(query.split()).lower()
+
+
+class QueryEncoder:
+    """
+    Encode queries with the dense and BM25 models, keeping the most recently
+    used embeddings in a bounded LRU cache so repeated questions skip encoding.
+    """
+
+    def __init__(
+            self,
+            dense_model: str = DEFAULT_DENSE_MODEL,
+            sparse_model: str = DEFAULT_SPARSE_MODEL,
+            cache_size: int = 1024,
+    ):
+        self.dense_model_name = dense_model
+        self.sparse_model_name = sparse_model
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        self._cache: "OrderedDict[str, QueryEmbedding]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, query: str) -> QueryEmbedding:
+        return self._encode_batch([query])[0]
+
+    def _encode_batch(self, queries: List[str]) -> List[QueryEmbedding]:
+        """
+        One dense and one sparse model call for the whole list.
+        """
+        dense_vecs = model_registry.dense(self.dense_model_name).encode(queries)
+        sparse_vecs = model_registry.sparse(self.sparse_model_name).embed(queries)
+        return [
+            QueryEmbedding(
+                query=query,
+                dense=dense_vec.tolist(),
+                sparse={"indices": sparse_vec.indices.tolist(), "values": sparse_vec.values.tolist()},
+            )
+            for query, dense_vec, sparse_vec in zip(queries, dense_vecs, sparse_vecs)
+        ]
+
+    def _remember(self, key: str, embedding: QueryEmbedding):
+        # Caller holds the lock
+        self._cache[key] = embedding
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def encode(self, query: str) -> QueryEmbedding:
+        key = normalize_query(query)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Encode outside the lock so concurrent queries do not serialise on it
+        embedding = self._encode(query)
+
+        with self._lock:
+            self._remember(key, embedding)
+        return embedding
+
+    def encode_many(self, queries: List[str]) -> List[QueryEmbedding]:
+        """
+        Encode a list of queries, sending only the cache misses to the models
+        in a single batch. Results follow the input order.
+        """
+        keys = [normalize_query(query) for query in queries]
+        found: Dict[str, QueryEmbedding] = {}
+        with self._lock:
+            for key in keys:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = cached
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        # Each distinct query is encoded once, even if repeated in the list
+        missing: Dict[str, str] = {}
+        for query, key in zip(queries, keys):
+            if key not in found and key not in missing:
+                missing[key] = query
+
+        if missing:
+            embeddings = self._encode_batch(list(missing.values()))
+            with self._lock:
+                for key, embedding in zip(missing, embeddings):
+                    self._remember(key, embedding)
+                    found[key] = embedding
+
+        return [found[key] for key in keys]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared so the cache outlives the per-question RetrievalRunner
+query_encoder = QueryEncoder()
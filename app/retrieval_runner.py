@@ -1,25 +1,97 @@
-from typing import Dict, List
+import argparse
+import asyncio
+from typing import Dict, List, Optional, Literal, Tuple
 
-from fastembed import SparseTextEmbedding
-from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import SearchParams
 
+from app.ingestion.vectorstore.collection_layout import LAYOUTS
+from app.model_registry import model_registry
 from app.retrieval.dense_vector_retrieval_service import DenseVectorRetrievalService
+from app.retrieval.fused_retrieval_service import FusedRetrievalService
 from app.retrieval.hybrid_vector_retrieval_service import HybridQueryService
+from app.retrieval.payloads import ID_ONLY_PAYLOAD
+from app.retrieval.query_encoder import QueryEncoder, QueryEmbedding, query_encoder
+
+
+def _merge_top_results(dense_results: List[Dict], hybrid_results: List[Dict], k: int) -> List[Dict]:
+    """
+    Client-side merge used when fused=False. Cosine and RRF scores are on
+    different scales and duplicates are kept; the fused mode has neither issue.
+    Both strategies fetch ids only; callers hydrate the merged top k, each hit
+    from its own collection (see _split_by_source).
+    """
+    all_results = dense_results + hybrid_results
+
+    # Sort by score descending
+    top_results = sorted(
+        all_results,
+        key=lambda match: match.get("score", 0),
+        reverse=True
+    )
+
+    # Return top k
+    return top_results[:k]
+
+
+def layout_search_params(layout: Optional[str], search_params: Optional[SearchParams] = None) -> Optional[SearchParams]:
+    """
+    `search_params` if given, else those of the named layout in LAYOUTS, i.e.
+    the `--layout` the collections were ingested with.
+    """
+    if search_params is not None or layout is None:
+        return search_params
+    return LAYOUTS[layout].search_params()
+
+
+def _split_by_source(top_results: List[Dict], dense_results: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Split merged hits into those found in the dense collection and those found
+    in the hybrid collection, so each is hydrated from the collection it came from.
+    """
+    from_dense = {id(result) for result in dense_results}
+    dense_hits = [result for result in top_results if id(result) in from_dense]
+    hybrid_hits = [result for result in top_results if id(result) not in from_dense]
+    return dense_hits, hybrid_hits
 
 
 class RetrievalRunner:
-    def __init__(self, client: QdrantClient, query: str, k=3):
+    def __init__(
+            self,
+            client: QdrantClient,
+            query: str,
+            k=3,
+            search_params: Optional[SearchParams] = None,
+            encoder: Optional[QueryEncoder] = None,
+            fused: bool = True,
+            fusion: Literal["rrf", "dbsf"] = "rrf",
+            layout: Optional[str] = None,
+    ):
         self._client = client
         self._query = query
         self._k = k
-        self._dense_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
-        self._sparse_model = SparseTextEmbedding("Qdrant/bm25")
+        # One server-side fused query instead of two queries merged client-side
+        self._fused = fused
+        self._fusion = fusion
+        # Quantized or HNSW-tuned collections are searched with the parameters of their layout
+        self._search_params = layout_search_params(layout, search_params)
+        # Shared encoder: models load once per process and repeated queries hit its cache
+        self._encoder = encoder or query_encoder
+        self._query_embedding: Optional[QueryEmbedding] = None
+
+    def _embed_query(self) -> QueryEmbedding:
+        """
+        Encode the query once per model; every retrieval strategy reuses the result.
+        """
+        if self._query_embedding is None:
+            self._query_embedding = self._encoder.encode(self._query)
+        return self._query_embedding
 
     def _fetch_similarity_result_using_dense_vectors_only(self) -> List[Dict]:
-        service = DenseVectorRetrievalService(self._client)
-        query_dense = self._dense_model.encode(self._query).tolist()
-        matches = service.similarity_search(query_dense)
+        service = DenseVectorRetrievalService(
+            self._client, search_params=self._search_params, with_payload=ID_ONLY_PAYLOAD
+        )
+        matches = service.similarity_search(self._embed_query().dense)
         # for match in matches:
         #     print(f"Vector Store: Dense")
         #     print(f"Score: {match['score']}")
@@ -30,17 +102,11 @@ class RetrievalRunner:
         return matches
 
     def _fetch_similarity_result_using_hybrid_vectors(self) -> List[Dict]:
-        query_dense = self._dense_model.encode(self._query).tolist()
-        sparse_model = SparseTextEmbedding("Qdrant/bm25")
-
-        # Dense vector
-        query_dense = self._dense_model.encode(self._query).tolist()
+        query_embedding = self._embed_query()
+        query_dense = query_embedding.dense
+        query_sparse = query_embedding.sparse
 
-        # Sparse vector
-        sparse_vec = next(sparse_model.embed(self._query))
-        query_sparse = {"indices": sparse_vec.indices, "values": sparse_vec.values}
-
-        service = HybridQueryService(self._client)
+        service = HybridQueryService(self._client, search_params=self._search_params, with_payload=ID_ONLY_PAYLOAD)
 
         results = service.similarity_search(query_dense=query_dense, query_sparse=query_sparse, k=5)
 
@@ -53,31 +119,145 @@ class RetrievalRunner:
 
         return results
 
+    def _fetch_similarity_result_using_fusion(self) -> List[Dict]:
+        query_embedding = self._embed_query()
+        service = FusedRetrievalService(self._client, fusion=self._fusion, search_params=self._search_params)
+        return service.similarity_search(
+            query_dense=query_embedding.dense, query_sparse=query_embedding.sparse, k=self._k
+        )
+
     def fetch_similarity_result(self) -> List[Dict]:
+        if self._fused:
+            return self._fetch_similarity_result_using_fusion()
+
         dense_results = self._fetch_similarity_result_using_dense_vectors_only()
         hybrid_results = self._fetch_similarity_result_using_hybrid_vectors()
 
-        all_results = dense_results + hybrid_results
+        top_results = _merge_top_results(dense_results, hybrid_results, self._k)
+        dense_hits, hybrid_hits = _split_by_source(top_results, dense_results)
+        DenseVectorRetrievalService(self._client).hydrate(dense_hits)
+        HybridQueryService(self._client).hydrate(hybrid_hits)
+        return top_results
+
+
+def fetch_similarity_results_batch(
+        client: QdrantClient,
+        queries: List[str],
+        k=3,
+        search_params: Optional[SearchParams] = None,
+        encoder: Optional[QueryEncoder] = None,
+        fused: bool = True,
+        fusion: Literal["rrf", "dbsf"] = "rrf",
+        layout: Optional[str] = None,
+) -> List[List[Dict]]:
+    """
+    RetrievalRunner.fetch_similarity_result for many queries at once: one
+    encoding call per model, and one batched request per strategy.
+    """
+    search_params = layout_search_params(layout, search_params)
+    query_embeddings = (encoder or query_encoder).encode_many(queries)
+    queries_dense = [query_embedding.dense for query_embedding in query_embeddings]
+    queries_sparse = [query_embedding.sparse for query_embedding in query_embeddings]
+
+    if fused:
+        service = FusedRetrievalService(client, fusion=fusion, search_params=search_params)
+        return service.similarity_search_batch(queries_dense, queries_sparse, k=k)
+
+    dense_service = DenseVectorRetrievalService(client, search_params=search_params, with_payload=ID_ONLY_PAYLOAD)
+    hybrid_service = HybridQueryService(client, search_params=search_params, with_payload=ID_ONLY_PAYLOAD)
+    dense_results = dense_service.similarity_search_batch(queries_dense)
+    hybrid_results = hybrid_service.similarity_search_batch(queries_dense, queries_sparse, k=5)
+    top_results = [
+        _merge_top_results(dense, hybrid, k)
+        for dense, hybrid in zip(dense_results, hybrid_results)
+    ]
+
+    # One retrieve per collection hydrates the final hits of every query
+    dense_hits, hybrid_hits = _split_by_source(
+        [result for results in top_results for result in results],
+        [result for results in dense_results for result in results],
+    )
+    dense_service.hydrate(dense_hits)
+    hybrid_service.hydrate(hybrid_hits)
+    return top_results
+
 
-        # Sort by score descending
-        top_results = sorted(
-            all_results,
-            key=lambda match: match.get("score", 0),
-            reverse=True
+class AsyncRetrievalRunner:
+    """
+    Asyncio counterpart of RetrievalRunner. One instance serves any number of
+    queries from one event loop. A fused query is a single round trip; with
+    fused=False the dense and hybrid searches run concurrently, so latency is
+    max(dense, hybrid) rather than their sum.
+    """
+
+    def __init__(
+            self,
+            client: AsyncQdrantClient,
+            k=3,
+            search_params: Optional[SearchParams] = None,
+            encoder: Optional[QueryEncoder] = None,
+            fused: bool = True,
+            fusion: Literal["rrf", "dbsf"] = "rrf",
+            layout: Optional[str] = None,
+    ):
+        search_params = layout_search_params(layout, search_params)
+        self._k = k
+        self._encoder = encoder or query_encoder
+        self._fused = fused
+        self._fused_service = FusedRetrievalService(client, fusion=fusion, search_params=search_params)
+        self._dense_service = DenseVectorRetrievalService(
+            client, search_params=search_params, with_payload=ID_ONLY_PAYLOAD
         )
+        self._hybrid_service = HybridQueryService(client, search_params=search_params, with_payload=ID_ONLY_PAYLOAD)
 
-        # Return top 3
-        return top_results[:3]
+    async def _embed_query(self, query: str) -> QueryEmbedding:
+        # Encoding is CPU bound; keep it off the event loop
+        return await asyncio.to_thread(self._encoder.encode, query)
+
+    async def fetch_similarity_result(self, query: str) -> List[Dict]:
+        query_embedding = await self._embed_query(query)
+        if self._fused:
+            return await self._fused_service.asimilarity_search(
+                query_dense=query_embedding.dense, query_sparse=query_embedding.sparse, k=self._k
+            )
+
+        dense_results, hybrid_results = await asyncio.gather(
+            self._dense_service.asimilarity_search(query_embedding.dense),
+            self._hybrid_service.asimilarity_search(
+                query_dense=query_embedding.dense, query_sparse=query_embedding.sparse, k=5
+            ),
+        )
+        top_results = _merge_top_results(dense_results, hybrid_results, self._k)
+        dense_hits, hybrid_hits = _split_by_source(top_results, dense_results)
+        await asyncio.gather(self._dense_service.ahydrate(dense_hits), self._hybrid_service.ahydrate(hybrid_hits))
+        return top_results
+
+    async def fetch_many(self, queries: List[str]) -> List[List[Dict]]:
+        """
+        Retrieve for several queries concurrently; results follow the input order.
+        """
+        return list(await asyncio.gather(*(self.fetch_similarity_result(query) for query in queries)))
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Retrieve the top chunks for a sample question.")
+    parser.add_argument(
+        "--layout",
+        default="float32",
+        choices=list(LAYOUTS),
+        help="Layout the collections were ingested with, so queries use its search parameters.",
+    )
+    args = parser.parse_args()
+
     query = "What factors beyond individual diet and exercise contribute to rising obesity rates, and how do these factors interact?"
     client = QdrantClient(url="http://localhost:6333")
+    for stats in model_registry.warm_up():
+        print(f"{stats.kind} model {stats.model_name}: load {stats.load_seconds:.2f}s, warm-up {stats.warm_up_seconds:.2f}s")
 
-    retrieval_runner = RetrievalRunner(query=query, client=client)
+    retrieval_runner = RetrievalRunner(query=query, client=client, layout=args.layout)
     results = retrieval_runner.fetch_similarity_result()
     for match in results:
-        print(f"Vector Store: Hybrid")
+        print(f"Vector Store: Fused")
         print(f"Score: {match['score']}")
         print(f"Text: {match['metadata']['chunk_text']}")
         print(f"Metadata: {match['metadata']['source']}")
@@ -0,0 +1,12 @@
+import hashlib
+import re
+
+
+def calculate_chunk_hash(chunk: str) -> str:
+    """
+    Normalize chunk text and return a SHA256 hash
+    """
+    text = chunk.lower()
+    text = re.sub(r"\s+", " ", text)
+    text = text.strip()
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -1,25 +1,54 @@
+import argparse
+from pathlib import Path
+
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
 
+from app.generation.answer_cache import SemanticAnswerCache
 from app.generation.llm_client import LLMClient
-from app.retrieval_runner import RetrievalRunner
+from app.generation.streaming_qa import StreamingQA
+from app.ingestion.vectorstore.collection_layout import LAYOUTS
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Answer a question from the ingested articles.")
+    parser.add_argument(
+        "--layout",
+        default="float32",
+        choices=list(LAYOUTS),
+        help="Layout the collections were ingested with, so queries use its search parameters.",
+    )
+    args = parser.parse_args()
+
     load_dotenv()
     llm = LLMClient(
         model="openai/gpt-4o-mini",
         max_tokens=10000
     )
 
-    question = "How does the conceptual metaphor “ARGUMENT IS WAR” shape the way people think about arguments? How do they correlated it with ARGUMENT IS A DANCE?"
     client = QdrantClient(url="http://localhost:6333")
-    runner = RetrievalRunner(client=client, query=question)
+    answer_cache = SemanticAnswerCache(str(Path(__file__).parent / "data/answer_cache"))
 
-    results = runner.fetch_similarity_result()
-    reply = llm.generate(question=question, context_chunks=results)
+    # Model warm-up starts here, while the question is being prepared
+    qa = StreamingQA(client=client, llm=llm, answer_cache=answer_cache, layout=args.layout)
+
+    question = "How does the conceptual metaphor “ARGUMENT IS WAR” shape the way people think about arguments? How do they correlated it with ARGUMENT IS A DANCE?"
+    answer = qa.ask(question)
 
     print("-" * 80)
     print(f"Question: {question}")
     print("-" * 80)
-    print(f"System Reply: {reply}")
+    print("System Reply: ", end="", flush=True)
+    for text in answer:
+        print(text, end="", flush=True)
+    print()
     print("-" * 80)
+
+    metrics = answer.metrics
+    print(
+        f"retrieval {metrics.retrieval_seconds * 1000:.0f} ms | "
+        f"TTFT {(metrics.ttft_seconds or 0) * 1000:.0f} ms | "
+        f"{metrics.tokens_per_second:.1f} tokens/s | "
+        f"total {metrics.total_seconds * 1000:.0f} ms"
+        + (" | answer cache hit" if metrics.cached else "")
+    )
+    qa.close()
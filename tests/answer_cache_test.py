@@ -0,0 +1,92 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app.generation import answer_cache as answer_cache_module
+from app.generation.answer_cache import SemanticAnswerCache, context_key
+
+MODEL = "openai/gpt-4o-mini"
+CHUNK_IDS = ["c1", "c2"]
+QUESTION_EMBEDDING = [1.0, 0.0, 0.0]
+# cos = 0.95 and 0.6 against QUESTION_EMBEDDING
+PARAPHRASE_EMBEDDING = [0.95, 0.3122499, 0.0]
+OTHER_EMBEDDING = [0.6, 0.8, 0.0]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fixture to provide a settable clock for TTL and LRU order."""
+    state = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(answer_cache_module, "time", SimpleNamespace(time=lambda: state.now))
+    return state
+
+
+@pytest.fixture
+def answer_cache(tmp_path, clock):
+    """Fixture to provide an empty answer cache with a one-hour TTL."""
+    cache = SemanticAnswerCache(str(tmp_path / "answer_cache"), threshold=0.9, ttl_seconds=3600)
+    yield cache
+    cache.close()
+
+
+class TestSemanticAnswerCache:
+
+    def test_similar_question_hits_and_dissimilar_misses(self, answer_cache):
+        answer_cache.put("What is X?", QUESTION_EMBEDDING, CHUNK_IDS, MODEL, "X is Y.")
+
+        hit = answer_cache.get(PARAPHRASE_EMBEDDING, CHUNK_IDS, MODEL)
+
+        assert hit.answer == "X is Y." and hit.question == "What is X?"
+        assert hit.similarity == pytest.approx(0.95, abs=1e-4)
+        assert answer_cache.get(OTHER_EMBEDDING, CHUNK_IDS, MODEL) is None
+
+    def test_context_must_match_in_any_order(self, answer_cache):
+        answer_cache.put("What is X?", QUESTION_EMBEDDING, CHUNK_IDS, MODEL, "X is Y.")
+
+        assert answer_cache.get(QUESTION_EMBEDDING, list(reversed(CHUNK_IDS)), MODEL) is not None
+        assert answer_cache.get(QUESTION_EMBEDDING, ["c1", "c3"], MODEL) is None
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, "openai/gpt-4o") is None
+
+    def test_generation_settings_are_part_of_the_key(self, answer_cache):
+        answer_cache.put("What is X?", QUESTION_EMBEDDING, CHUNK_IDS, MODEL, "X is Y.",
+                         system_prompt="Answer briefly.", temperature=0.2, max_tokens=512)
+
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, MODEL, system_prompt="Answer briefly.",
+                                temperature=0.2, max_tokens=512) is not None
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, MODEL, system_prompt="Answer in French.",
+                                temperature=0.2, max_tokens=512) is None
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, MODEL, system_prompt="Answer briefly.",
+                                temperature=0.7, max_tokens=512) is None
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, MODEL, system_prompt="Answer briefly.",
+                                temperature=0.2, max_tokens=64) is None
+
+    def test_expired_answers_are_ignored_and_dropped(self, answer_cache, clock):
+        answer_cache.put("What is X?", QUESTION_EMBEDDING, CHUNK_IDS, MODEL, "X is Y.")
+
+        clock.now += 3601
+        assert answer_cache.get(QUESTION_EMBEDDING, CHUNK_IDS, MODEL) is None
+
+        answer_cache.put("What is Z?", OTHER_EMBEDDING, CHUNK_IDS, MODEL, "Z is W.")
+        assert len(answer_cache) == 1
+
+    def test_least_recently_used_answers_are_evicted(self, tmp_path, clock):
+        cache = SemanticAnswerCache(str(tmp_path / "answer_cache"), threshold=0.9, max_entries=2)
+        ticks = itertools.count()
+        for name in ["a", "b"]:
+            clock.now = 1000.0 + next(ticks)
+            cache.put(name, QUESTION_EMBEDDING, [name], MODEL, name.upper())
+        clock.now = 1000.0 + next(ticks)
+        cache.get(QUESTION_EMBEDDING, ["a"], MODEL)  # "b" is now the least recently used
+
+        clock.now = 1000.0 + next(ticks)
+        cache.put("c", QUESTION_EMBEDDING, ["c"], MODEL, "C")
+
+        assert len(cache) == 2
+        assert cache.get(QUESTION_EMBEDDING, ["b"], MODEL) is None
+        assert cache.get(QUESTION_EMBEDDING, ["a"], MODEL).answer == "A"
+        cache.close()
+
+    def test_context_key_ignores_chunk_order_only(self):
+        assert context_key(MODEL, ["a", "b"]) == context_key(MODEL, ["b", "a"])
+        assert context_key(MODEL, ["a", "b"]) != context_key(MODEL, ["a", "b"], system_prompt="Other template.")
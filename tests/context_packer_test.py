@@ -0,0 +1,91 @@
+import pytest
+import tiktoken
+
+from app.generation.context_packer import ContextPacker
+
+DOCUMENT = (
+    "Lakoff and Johnson argue that ARGUMENT IS WAR shapes how we argue: claims are attacked, "
+    "positions are defended and debates are won or lost. Imagine instead a culture where "
+    "ARGUMENT IS A DANCE, where participants are performers aiming for a balanced, pleasing exchange."
+)
+
+
+@pytest.fixture
+def packer():
+    """Fixture to provide a packer with an offline byte-level encoder (one token per byte)."""
+    packer = ContextPacker(max_tokens=10000)
+    packer._encoder = tiktoken.Encoding(
+        "bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    return packer
+
+
+def _hit(chunk_id, start, end, score, source_row_id=1, offsets=True):
+    metadata = {
+        "chunk_id": chunk_id,
+        "chunk_text": DOCUMENT[start:end],
+        "source": "https://example.org",
+        "title": "Metaphors We Live By",
+        "source_row_id": source_row_id,
+    }
+    if offsets:
+        metadata.update(start_offset=start, end_offset=end)
+    return {"score": score, "metadata": metadata}
+
+
+class TestContextPacker:
+
+    def test_duplicates_are_dropped(self, packer):
+        hits = [_hit("a", 0, 80, 0.9), _hit("a", 0, 80, 0.8), _hit("b", 0, 80, 0.7, source_row_id=2)]
+
+        packed = packer.pack(hits)
+
+        assert [context.chunk_ids for context in packed] == [["a"]]
+
+    def test_overlapping_chunks_are_merged_by_offsets(self, packer):
+        hits = [_hit("b", 60, 160, 0.9), _hit("a", 0, 80, 0.8), _hit("c", 200, 250, 0.7)]
+
+        packed = packer.pack(hits)
+
+        assert packed[0].chunk_ids == ["a", "b"]
+        assert packed[0].text == DOCUMENT[0:160]
+        assert packed[0].score == 0.9
+        assert packed[1].text == DOCUMENT[200:250]
+
+    def test_overlapping_chunks_are_merged_by_text(self, packer):
+        hits = [_hit("b", 60, 160, 0.9, offsets=False), _hit("a", 0, 80, 0.8, offsets=False)]
+
+        packed = packer.pack(hits)
+
+        assert len(packed) == 1
+        assert packed[0].text == DOCUMENT[0:160]
+
+    def test_budget_keeps_most_relevant_passages(self, packer):
+        hits = [
+            _hit("a", 0, 100, 0.9, source_row_id=1),
+            _hit("b", 0, 150, 0.8, source_row_id=2),
+            _hit("c", 0, 40, 0.7, source_row_id=3),
+        ]
+        packer.max_tokens = 300
+
+        packed = packer.pack(hits)
+
+        assert [context.chunk_ids for context in packed] == [["a"], ["c"]]
+        assert sum(context.tokens for context in packed) <= packer.max_tokens
+
+    def test_top_passage_is_truncated_when_nothing_fits(self, packer):
+        packer.max_tokens = 100
+
+        packed = packer.pack([_hit("a", 0, 200, 0.9)])
+
+        rendered = packed[0].render(1)
+        assert DOCUMENT.startswith(packed[0].text) and packed[0].text
+        assert packed[0].tokens == len(packer.encoder.encode(rendered)) <= packer.max_tokens
+
+    def test_nothing_is_sent_when_not_even_the_label_fits(self, packer):
+        packer.max_tokens = 20
+
+        assert packer.pack([_hit("a", 0, 100, 0.9)]) == []
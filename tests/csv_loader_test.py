@@ -0,0 +1,42 @@
+import pytest
+
+from app.ingestion.dataloader.csv_loader_service import CsvLoaderService
+
+# Column types pandas would infer differently per batch: an empty author, a
+# numeric title, and a title that only some batches see as a float
+CSV_CONTENT = """title,author,link,text
+1,,https://example.org/a,First article text.
+2.5,Jane Doe,https://example.org/b,"Second article, with a comma."
+Metaphors,,https://example.org/c,Third article text.
+3,John Roe,,Fourth article text.
+"""
+
+
+@pytest.fixture
+def csv_loader(tmp_path):
+    """Fixture to provide a loader over a small CSV with mixed column types."""
+    csv_path = tmp_path / "articles.csv"
+    csv_path.write_text(CSV_CONTENT, encoding="utf-8")
+    return CsvLoaderService(str(csv_path))
+
+
+class TestCsvLoaderService:
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 3, 1000])
+    def test_row_hashes_do_not_depend_on_batch_size(self, csv_loader, batch_size):
+        expected = {doc.row_id: doc.hash for doc in csv_loader.csv_reader()}
+
+        streamed = {
+            doc.row_id: doc.hash
+            for batch in csv_loader.csv_stream(batch_size=batch_size)
+            for doc in batch
+        }
+
+        assert streamed == expected
+
+    def test_empty_cells_become_none(self, csv_loader):
+        docs = csv_loader.csv_reader()
+
+        assert docs[0].title == "1"
+        assert docs[0].author is None
+        assert docs[3].source is None
@@ -0,0 +1,121 @@
+import itertools
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.ingestion.embedding import embedding_cache as embedding_cache_module
+from app.ingestion.embedding.embedding_cache import EmbeddingCache
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DIM = 8
+# Bytes one float32 dense entry counts towards max_bytes
+ENTRY_BYTES = DIM * 4
+
+
+@pytest.fixture(autouse=True)
+def ordered_clock(monkeypatch):
+    """Fixture to make every timestamp distinct, so LRU order is deterministic."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache_module, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "embedding_cache")
+
+
+def _vectors(n: int, offset: int = 0) -> np.ndarray:
+    return np.arange(offset * DIM, (offset + n) * DIM, dtype=np.float32).reshape(n, DIM)
+
+
+class TestEmbeddingCache:
+
+    def test_dense_hit_and_miss(self, cache_dir):
+        cache = EmbeddingCache(cache_dir)
+        cache.put_dense(MODEL, ["a", "b"], _vectors(2))
+
+        a, missing, b = cache.get_dense(MODEL, ["a", "missing", "b"])
+
+        np.testing.assert_array_equal(a, _vectors(2)[0])
+        np.testing.assert_array_equal(b, _vectors(2)[1])
+        assert missing is None
+        assert cache.get_dense("other-model", ["a"]) == [None]
+        cache.close()
+
+    def test_dense_hits_survive_reuse_of_their_slot(self, cache_dir):
+        cache = EmbeddingCache(cache_dir, max_bytes=2 * ENTRY_BYTES)
+        cache.put_dense(MODEL, ["a"], _vectors(1))
+        hit = cache.get_dense(MODEL, ["a"])[0]
+
+        for i, hash_ in enumerate(["b", "c", "d"], start=1):
+            cache.put_dense(MODEL, [hash_], _vectors(1, offset=i))  # "a" is evicted and its slot reused
+
+        assert cache.get_dense(MODEL, ["a"]) == [None]
+        np.testing.assert_array_equal(hit, _vectors(1)[0])
+        cache.close()
+
+    def test_sparse_hit_and_miss(self, cache_dir):
+        cache = EmbeddingCache(cache_dir)
+        cache.put_sparse(MODEL, ["a"], [{"indices": [3, 7], "values": [0.5, 1.5]}])
+
+        hit, missing = cache.get_sparse(MODEL, ["a", "missing"])
+
+        np.testing.assert_array_equal(hit["indices"], np.array([3, 7], dtype=np.uint32))
+        np.testing.assert_array_equal(hit["values"], np.array([0.5, 1.5], dtype=np.float32))
+        assert missing is None
+        cache.close()
+
+    def test_least_recently_used_entries_are_evicted(self, cache_dir):
+        cache = EmbeddingCache(cache_dir, max_bytes=10 * ENTRY_BYTES)
+        hashes = [f"h{i}" for i in range(10)]
+        for i, hash_ in enumerate(hashes):
+            cache.put_dense(MODEL, [hash_], _vectors(1, offset=i))
+        cache.get_dense(MODEL, ["h0"])  # h1 and h2 are now the least recently used
+
+        # Over max_bytes: entries are evicted until the cache is under 90% of it
+        cache.put_dense(MODEL, ["new"], _vectors(1, offset=10))
+
+        hits = cache.get_dense(MODEL, hashes + ["new"])
+        assert [hash_ for hash_, vector in zip(hashes + ["new"], hits) if vector is None] == ["h1", "h2"]
+        assert cache.size_bytes() <= cache.max_bytes
+        cache.close()
+
+    def test_evicted_slots_are_reused(self, cache_dir):
+        cache = EmbeddingCache(cache_dir, max_bytes=2 * ENTRY_BYTES)
+        for i, hash_ in enumerate(["a", "b", "c"]):
+            cache.put_dense(MODEL, [hash_], _vectors(1, offset=i))  # "c" evicts "a" and "b"
+
+        cache.put_dense(MODEL, ["d"], _vectors(1, offset=3))
+
+        next_slot = cache._db.execute("SELECT next_slot FROM dense_models WHERE model = ?", (MODEL,)).fetchone()[0]
+        assert next_slot == 3
+        c, d = cache.get_dense(MODEL, ["c", "d"])
+        np.testing.assert_array_equal(c, _vectors(3)[2])
+        np.testing.assert_array_equal(d, _vectors(1, offset=3)[0])
+        cache.close()
+
+    def test_entries_survive_reopen(self, cache_dir):
+        cache = EmbeddingCache(cache_dir)
+        cache.put_dense(MODEL, ["a"], _vectors(1))
+        cache.put_sparse(MODEL, ["a"], [{"indices": [1], "values": [2.0]}])
+        cache.close()
+
+        reopened = EmbeddingCache(cache_dir)
+
+        np.testing.assert_array_equal(reopened.get_dense(MODEL, ["a"])[0], _vectors(1)[0])
+        assert reopened.get_sparse(MODEL, ["a"])[0]["indices"].tolist() == [1]
+        reopened.close()
+
+    def test_reopened_cache_grows_past_its_capacity(self, cache_dir):
+        cache = EmbeddingCache(cache_dir)
+        cache.put_dense(MODEL, [f"h{i}" for i in range(1000)], _vectors(1000))
+        cache.close()
+
+        reopened = EmbeddingCache(cache_dir)
+        reopened.put_dense(MODEL, [f"h{i}" for i in range(1000, 1100)], _vectors(100, offset=1000))
+
+        first, last = reopened.get_dense(MODEL, ["h0", "h1099"])
+        np.testing.assert_array_equal(first, _vectors(1)[0])
+        np.testing.assert_array_equal(last, _vectors(1, offset=1099)[0])
+        reopened.close()
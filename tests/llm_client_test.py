@@ -0,0 +1,124 @@
+import asyncio
+from typing import List, Dict
+
+import pytest
+
+pytest.importorskip("litellm")
+
+from app.generation import llm_client  # noqa: E402
+from app.generation.llm_client import LLMClient, _is_retryable  # noqa: E402
+
+
+class StatusError(Exception):
+    """Provider error carrying an HTTP status, as litellm's exceptions do."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _prompt(i: int) -> List[Dict]:
+    return [{"role": "user", "content": f"prompt {i}"}]
+
+
+def _completion_response(content: str):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Fixture to provide an LLMClient with near-zero backoff and test credentials."""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setenv("LUNARY_PUBLIC_KEY", "test")
+    monkeypatch.setenv("OPENROUTER_API_BASE", "http://localhost")
+    return LLMClient(model="openai/gpt-4o-mini", max_concurrency=3, backoff_seconds=0.001, max_retries=3)
+
+
+class TestIsRetryable:
+
+    @pytest.mark.parametrize("status_code", [408, 409, 429, 500, 502, 503, 504, 520, 529])
+    def test_transient_statuses_are_retried(self, status_code):
+        assert _is_retryable(StatusError(status_code))
+
+    @pytest.mark.parametrize("status_code", [400, 401, 403, 404, 422, 501])
+    def test_permanent_statuses_are_not_retried(self, status_code):
+        assert not _is_retryable(StatusError(status_code))
+
+    def test_errors_without_status_are_not_retried(self):
+        assert not _is_retryable(ValueError("bad request"))
+
+
+class TestAgenerateMany:
+
+    def test_results_follow_input_order(self, monkeypatch, client):
+        in_flight = []
+        peak = []
+
+        async def fake_acompletion(**kwargs):
+            content = kwargs["messages"][0]["content"]
+            in_flight.append(content)
+            peak.append(len(in_flight))
+            # Later prompts finish first
+            await asyncio.sleep(0.001 * (10 - int(content.split()[-1])))
+            in_flight.remove(content)
+            return _completion_response(content)
+
+        monkeypatch.setattr(llm_client, "acompletion", fake_acompletion)
+
+        results = asyncio.run(client.agenerate_many([_prompt(i) for i in range(10)]))
+
+        assert results == [f"prompt {i}" for i in range(10)]
+        assert max(peak) <= client.max_concurrency
+
+    @pytest.mark.parametrize("status_code", [429, 503, 520])
+    def test_transient_errors_are_retried_with_backoff(self, monkeypatch, client, status_code):
+        calls = []
+        sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def fake_acompletion(**kwargs):
+            calls.append(kwargs)
+            if len(calls) <= 2:
+                raise StatusError(status_code)
+            return _completion_response("answer")
+
+        async def recording_sleep(seconds):
+            sleeps.append(seconds)
+            await real_sleep(0)
+
+        monkeypatch.setattr(llm_client, "acompletion", fake_acompletion)
+        monkeypatch.setattr(llm_client.asyncio, "sleep", recording_sleep)
+
+        assert asyncio.run(client.agenerate_many([_prompt(0)])) == ["answer"]
+        assert len(calls) == 3
+        # Exponential with jitter: attempt n waits between half and all of backoff * 2**n
+        assert client.backoff_seconds * 0.5 <= sleeps[0] <= client.backoff_seconds
+        assert client.backoff_seconds <= sleeps[1] <= client.backoff_seconds * 2
+
+    def test_permanent_error_is_raised_without_retry(self, monkeypatch, client):
+        calls = []
+
+        async def fake_acompletion(**kwargs):
+            calls.append(kwargs)
+            raise StatusError(400)
+
+        monkeypatch.setattr(llm_client, "acompletion", fake_acompletion)
+
+        with pytest.raises(StatusError):
+            asyncio.run(client.agenerate_many([_prompt(0)]))
+        assert len(calls) == 1
+
+    def test_exhausted_retries_are_returned_as_exceptions(self, monkeypatch, client):
+        async def fake_acompletion(**kwargs):
+            if kwargs["messages"][0]["content"] == "prompt 1":
+                raise StatusError(503)
+            return _completion_response(kwargs["messages"][0]["content"])
+
+        monkeypatch.setattr(llm_client, "acompletion", fake_acompletion)
+
+        first, second, third = asyncio.run(
+            client.agenerate_many([_prompt(i) for i in range(3)], return_exceptions=True)
+        )
+
+        assert (first, third) == ("prompt 0", "prompt 2")
+        assert isinstance(second, StatusError)
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.generation.response_cache import LLMResponseCache, request_key
+
+MESSAGES = [
+    {"role": "system", "content": "Answer only using the provided context."},
+    {"role": "user", "content": "What is a conceptual metaphor?"},
+]
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    """Fixture to provide an empty on-disk response cache."""
+    cache = LLMResponseCache(str(tmp_path / "llm_cache"))
+    yield cache
+    cache.close()
+
+
+def _completion_response(content: str):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+def _stream_chunks(parts):
+    for part in parts:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+
+
+class TestLLMResponseCache:
+
+    def test_request_key_is_canonical(self):
+        reordered = [{"content": message["content"], "role": message["role"]} for message in MESSAGES]
+
+        assert request_key("m", MESSAGES, 0.2, 512) == request_key("m", reordered, 0.2, 512)
+        assert request_key("m", MESSAGES, 0.2, 512) != request_key("m", MESSAGES, 0.3, 512)
+        assert request_key("m", MESSAGES, 0.2, 512) != request_key("m", MESSAGES, 0.2, 256)
+
+    def test_put_get_survives_reopen(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path))
+        cache.put("key", "m", "answer")
+        cache.close()
+
+        reopened = LLMResponseCache(str(tmp_path))
+        assert reopened.get("key") == "answer"
+        assert reopened.get("other") is None
+
+    def test_bypass_and_refresh(self, response_cache):
+        response_cache.put("key", "m", "old")
+
+        response_cache.refresh = True
+        assert response_cache.get("key") is None
+        response_cache.put("key", "m", "new")
+
+        response_cache.refresh = False
+        response_cache.bypass = True
+        assert response_cache.get("key") is None
+        response_cache.put("key", "m", "ignored")
+
+        response_cache.bypass = False
+        assert response_cache.get("key") == "new"
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = LLMResponseCache(str(tmp_path), max_bytes=100)
+        cache.put("a", "m", "x" * 40)
+        cache.put("b", "m", "x" * 40)
+        cache.get("a")
+        cache.put("c", "m", "x" * 40)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.size_bytes() <= 100
+
+    def test_record_stream_stores_full_text(self, response_cache):
+        chunks = list(response_cache.record_stream("key", "m", _stream_chunks(["Hel", None, "lo"])))
+
+        assert len(chunks) == 3
+        assert response_cache.get("key") == "Hello"
+
+
+class TestLLMClientWithResponseCache:
+
+    @pytest.fixture
+    def llm(self, monkeypatch, response_cache):
+        pytest.importorskip("litellm")
+        from app.generation import llm_client
+
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        monkeypatch.setenv("LUNARY_PUBLIC_KEY", "test")
+        monkeypatch.setenv("OPENROUTER_API_BASE", "http://localhost")
+
+        calls = []
+
+        def fake_completion(**kwargs):
+            calls.append(kwargs)
+            if kwargs["stream"]:
+                return _stream_chunks(["streamed ", "answer"])
+            return _completion_response("answer")
+
+        monkeypatch.setattr(llm_client, "completion", fake_completion)
+        client = llm_client.LLMClient(model="openai/gpt-4o-mini", response_cache=response_cache)
+        return client, calls
+
+    def test_second_call_is_served_from_cache(self, llm):
+        client, calls = llm
+
+        assert client.generate_questions(MESSAGES) == "answer"
+        assert client.generate_questions(MESSAGES) == "answer"
+        assert len(calls) == 1
+
+    def test_stream_is_cached_after_consumption(self, llm):
+        client, calls = llm
+
+        first = "".join(chunk.choices[0].delta.content for chunk in client.generate_questions(MESSAGES, stream=True))
+        second = "".join(chunk.choices[0].delta.content for chunk in client.generate_questions(MESSAGES, stream=True))
+
+        assert first == second == "streamed answer"
+        assert len(calls) == 1
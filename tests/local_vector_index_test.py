@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import batch_point_ids
+from app.ingestion.vectorstore.local_vector_index import LocalVectorIndex
+from app.ingestion.vectorstore.local_vector_store import LocalDenseBatchIngestor
+from app.retrieval.local_vector_retrieval_service import LocalVectorRetrievalService
+
+DIM = 16
+
+
+@pytest.fixture
+def vectors():
+    """Fixture to provide random unnormalised vectors."""
+    return np.random.default_rng(7).normal(size=(500, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def index(tmp_path, vectors):
+    """Fixture to provide a float32 index with small blocks, so top-k spans several of them."""
+    index = LocalVectorIndex(str(tmp_path / "index"), dim=DIM, block_size=64)
+    index.upsert([f"p{i}" for i in range(len(vectors))], vectors, [{"chunk_id": f"c{i}"} for i in range(len(vectors))])
+    return index
+
+
+def _exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return [[f"p{i}" for i in np.argsort(-scores)[:k]] for scores in queries @ vectors.T]
+
+
+def _batch(row_ids, dense_vectors):
+    n = len(row_ids)
+    return ChunkBatch(
+        chunk_ids=[f"row{row_id}-chunk{i}" for i, row_id in enumerate(row_ids)],
+        chunk_hashes=[None] * n,
+        chunk_texts=[f"text {i} of row {row_id}" for i, row_id in enumerate(row_ids)],
+        source_row_ids=np.array(row_ids, dtype=np.int64),
+        start_offsets=np.full(n, -1, dtype=np.int64),
+        end_offsets=np.full(n, -1, dtype=np.int64),
+        metadata=[{"source": "s", "title": "t"}] * n,
+        dense_vectors=dense_vectors,
+    )
+
+
+class TestLocalVectorIndex:
+
+    def test_batched_search_matches_exact_search(self, index, vectors):
+        queries = np.random.default_rng(8).normal(size=(20, DIM)).astype(np.float32)
+
+        results = index.search(queries, k=5)
+
+        assert [[point_id for point_id, _, _ in hits] for hits in results] == _exact_top_k(vectors, queries, 5)
+        assert all(hits[0][1] >= hits[-1][1] for hits in results)
+
+    def test_int8_index_keeps_the_top_hit(self, tmp_path, vectors):
+        index = LocalVectorIndex(str(tmp_path / "int8"), dim=DIM, dtype="int8", block_size=64)
+        index.upsert([f"p{i}" for i in range(len(vectors))], vectors, [{}] * len(vectors))
+
+        results = index.search(vectors[:20], k=1)
+
+        assert [hits[0][0] for hits in results] == [f"p{i}" for i in range(20)]
+        assert results[0][0][1] == pytest.approx(1.0, abs=0.01)
+
+    def test_save_and_reload_memory_maps(self, index, vectors):
+        index.upsert(["p0"], vectors[1:2], [{"chunk_id": "replaced"}])
+        index.delete(["p2"])
+        index.save()
+
+        reloaded = LocalVectorIndex(str(index.index_dir), dim=DIM, block_size=64)
+
+        assert isinstance(reloaded._vectors, np.memmap)
+        assert len(reloaded) == len(vectors) - 1
+        assert reloaded.retrieve(["p0", "p2"]) == [("p0", {"chunk_id": "replaced"})]
+        assert reloaded.search(vectors[3:4], k=1)[0][0][0] == "p3"
+
+    def test_unsaved_writes_are_replayed_from_the_journal(self, index, vectors):
+        index.delete(["p1"])
+        index.upsert(["new"], vectors[1:2], [{"chunk_id": "new"}])
+
+        reopened = LocalVectorIndex(str(index.index_dir), dim=DIM, block_size=64)
+
+        assert len(reopened) == len(vectors)
+        assert reopened.search(vectors[1:2], k=1)[0][0][:1] == ("new",)
+
+    def test_capacity_grows_geometrically_and_deleted_slots_are_reused(self, tmp_path, vectors):
+        index = LocalVectorIndex(str(tmp_path / "index"), dim=DIM, block_size=64)
+        capacities = set()
+        for i in range(3000):
+            index.upsert([f"p{i}"], vectors[i % len(vectors)][None], [{}])
+            capacities.add(index.capacity)
+        assert sorted(capacities) == [1024, 2048, 4096]
+
+        deleted = {f"p{i}" for i in range(10)}
+        index.delete(deleted)
+        index.upsert(["reused"], vectors[:1], [{}])
+
+        assert len(index._ids) == 3000  # no new slot for "reused"
+        returned = {point_id for hits in index.search(vectors[:10], k=20) for point_id, _, _ in hits}
+        assert "reused" in returned and not returned & deleted
+
+    def test_ids_for_rows_follows_upserts_and_deletes(self, tmp_path, vectors):
+        index = LocalVectorIndex(str(tmp_path / "index"), dim=DIM)
+        index.upsert(["a", "b", "c"], vectors[:3], [{"source_row_id": 1}, {"source_row_id": 1}, {"source_row_id": 2}])
+        index.upsert(["b"], vectors[1:2], [{"source_row_id": 2}])
+        index.delete(["c"])
+
+        assert index.ids_for_rows([1]) == {"a"}
+        assert index.ids_for_rows([2]) == {"b"}
+        assert LocalVectorIndex(str(index.index_dir), dim=DIM).ids_for_rows([1, 2, 3]) == {"a", "b"}
+
+    def test_reload_rejects_other_dtype(self, index):
+        index.save()
+
+        with pytest.raises(ValueError):
+            LocalVectorIndex(str(index.index_dir), dim=DIM, dtype="int8")
+
+
+class TestLocalDenseBatchIngestor:
+
+    def test_sync_and_search(self, tmp_path):
+        index = LocalVectorIndex(str(tmp_path / "index"), dim=DIM)
+        ingestor = LocalDenseBatchIngestor("articles_dense_collection", index=index)
+        dense_vectors = np.eye(DIM, dtype=np.float32)[:4]
+
+        ingestor.sync_chunk_batch(_batch([1, 1, 2, 2], dense_vectors))
+        ingestor.sync_chunk_batch(_batch([1], dense_vectors[:1]))
+        ingestor.delete_rows([2])
+
+        service = LocalVectorRetrievalService(
+            LocalVectorIndex(str(tmp_path / "index"), dim=DIM), with_payload=["chunk_id"]
+        )
+        results = service.similarity_search_batch(dense_vectors, k=3)
+
+        assert [[result["metadata"]["chunk_id"] for result in hits] for hits in results] == [
+            ["row1-chunk0"], [], [], []
+        ]
+        assert service.hydrate(results[0])[0]["metadata"]["chunk_text"] == "text 0 of row 1"
+
+    def test_sync_updates_payload_of_unchanged_chunks(self, tmp_path):
+        index = LocalVectorIndex(str(tmp_path / "index"), dim=DIM)
+        ingestor = LocalDenseBatchIngestor("articles_dense_collection", index=index)
+        dense_vectors = np.eye(DIM, dtype=np.float32)[:2]
+
+        ingestor.sync_chunk_batch(_batch([1, 1], dense_vectors))
+        renamed = _batch([1, 1], dense_vectors)
+        renamed.metadata = [{"source": "s", "title": "new title"}] * 2
+        ingestor.sync_chunk_batch(renamed)
+
+        assert {payload["title"] for _, payload in index.retrieve(batch_point_ids(renamed))} == {"new title"}
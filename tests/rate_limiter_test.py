@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.generation import rate_limiter as rate_limiter_module
+from app.generation.rate_limiter import AsyncTokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fixture to provide a fake clock that only advances while the bucket sleeps."""
+    state = SimpleNamespace(now=0.0, sleeps=[])
+
+    async def sleep(seconds):
+        state.sleeps.append(seconds)
+        state.now += seconds
+
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(monotonic=lambda: state.now))
+    monkeypatch.setattr(rate_limiter_module, "asyncio", SimpleNamespace(sleep=sleep, Lock=asyncio.Lock))
+    return state
+
+
+class TestAsyncTokenBucket:
+
+    def test_burst_is_granted_without_waiting(self, clock):
+        bucket = AsyncTokenBucket(rate=1.0, capacity=3)
+
+        async def run():
+            for _ in range(3):
+                await bucket.acquire()
+
+        asyncio.run(run())
+
+        assert clock.sleeps == []
+
+    def test_acquire_waits_for_refill_at_rate(self, clock):
+        bucket = AsyncTokenBucket.per_minute(120, burst=1)  # one token every 0.5s
+
+        async def run():
+            for _ in range(4):
+                await bucket.acquire()
+
+        asyncio.run(run())
+
+        assert clock.sleeps == pytest.approx([0.5, 0.5, 0.5])
+        assert clock.now == pytest.approx(1.5)
+
+    def test_concurrent_callers_share_the_rate(self, clock):
+        bucket = AsyncTokenBucket(rate=2.0, capacity=2)
+
+        async def run():
+            await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+
+        asyncio.run(run())
+
+        # Two from the burst, then four more at two per second
+        assert clock.now == pytest.approx(2.0)
+
+    def test_tokens_never_exceed_capacity(self, clock):
+        bucket = AsyncTokenBucket(rate=1.0, capacity=2)
+        clock.now = 100.0
+
+        async def run():
+            for _ in range(3):
+                await bucket.acquire()
+
+        asyncio.run(run())
+
+        assert clock.sleeps == pytest.approx([1.0])
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            AsyncTokenBucket(rate=0, capacity=1)
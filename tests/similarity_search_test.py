@@ -1,13 +1,15 @@
 import csv
+import time
 from pathlib import Path
 from typing import List, Dict, Any
 
 import pytest
-from fastembed import SparseTextEmbedding
 from qdrant_client import QdrantClient
-from sentence_transformers import SentenceTransformer
 
+from app.ingestion.vectorstore.local_vector_index import LocalVectorIndex
+from app.model_registry import model_registry
 from app.retrieval.dense_vector_retrieval_service import DenseVectorRetrievalService
+from app.retrieval.local_vector_retrieval_service import LocalVectorRetrievalService
 from app.retrieval.hybrid_vector_retrieval_service import HybridQueryService
 
 
@@ -76,6 +78,15 @@ def qdrant_client():
     return QdrantClient(url="http://localhost:6333")
 
 
+@pytest.fixture
+def local_index():
+    """Fixture to provide the index written by `ingestion_runner --backend local`."""
+    index_dir = Path(__file__).parent.parent / "data" / "local_index"
+    if not (index_dir / "points.jsonl").exists():
+        pytest.skip("No local index; run `python -m app.ingestion_runner --backend local` first.")
+    return LocalVectorIndex(str(index_dir))
+
+
 @pytest.fixture
 def eval_dataset():
     """Fixture to load evaluation dataset."""
@@ -89,34 +100,36 @@ def eval_dataset():
 @pytest.fixture
 def dense_model():
     """Fixture to provide dense embedding model."""
-    return SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    return model_registry.dense("sentence-transformers/all-MiniLM-L6-v2")
 
 
 @pytest.fixture
 def sparse_model():
     """Fixture to provide sparse embedding model."""
-    return SparseTextEmbedding("Qdrant/bm25")
+    return model_registry.sparse("Qdrant/bm25")
 
 
 class TestDenseVectorRetrieval:
     
     def test_recall_at_k_dense_retrieval(self, qdrant_client, eval_dataset, dense_model):
 
-        service = DenseVectorRetrievalService(qdrant_client)
+        # Recall only needs chunk ids, so skip the rest of the payload
+        service = DenseVectorRetrievalService(qdrant_client, with_payload=["chunk_id"])
         k = 3
         recall_scores = []
         
         
         test_samples = eval_dataset[:10]
         
-        for sample in test_samples:
+        # Encode all questions in one model call and search them in one batched request
+        questions = [sample['question'] for sample in test_samples]
+        query_vectors = dense_model.encode(questions).tolist()
+        batch_results = service.similarity_search_batch(query_vectors, k=k)
+        
+        for sample, results in zip(test_samples, batch_results):
             question = sample['question']
             expected_chunk_id = sample['source_chunk_id']
             
-            # Encode query and perform similarity search
-            query_vector = dense_model.encode(question).tolist()
-            results = service.similarity_search(query_vector, k=k)
-            
             # Extract chunk IDs from results
             retrieved_chunk_ids = get_chunk_ids_from_results(results)
             
@@ -139,6 +152,38 @@ class TestDenseVectorRetrieval:
         return avg_recall
 
 
+class TestLocalDenseRetrieval:
+
+    def test_recall_at_k_over_full_dataset(self, local_index, eval_dataset, dense_model):
+        # Same search as the Qdrant dense collection, in process and over every question
+        service = LocalVectorRetrievalService(local_index, with_payload=["chunk_id"])
+        k = 3
+
+        query_vectors = dense_model.encode([sample['question'] for sample in eval_dataset])
+        started = time.perf_counter()
+        batch_results = service.similarity_search_batch(query_vectors, k=k)
+        search_seconds = time.perf_counter() - started
+
+        recall_scores = [
+            calculate_recall_at_k(get_chunk_ids_from_results(results), sample['source_chunk_id'], k)
+            for sample, results in zip(eval_dataset, batch_results)
+        ]
+        avg_recall = sum(recall_scores) / len(recall_scores) if recall_scores else 0.0
+        print(f"\nAverage Recall@{k} over {len(eval_dataset)} questions: {avg_recall} (search {search_seconds:.3f}s)")
+
+        assert len(batch_results) == len(eval_dataset)
+        assert all(len(results) <= k for results in batch_results)
+        assert all(
+            [result["score"] for result in results] == sorted((result["score"] for result in results), reverse=True)
+            for results in batch_results
+        )
+        # Batching is only a speed-up: each query gets the hits it gets on its own
+        for query_vector, results in list(zip(query_vectors, batch_results))[:5]:
+            assert [result["id"] for result in service.similarity_search(query_vector.tolist(), k=k)] == [
+                result["id"] for result in results
+            ]
+
+
 if __name__ == "__main__":
     test_dir = Path(__file__).parent
     project_root = test_dir.parent
@@ -146,19 +191,20 @@ if __name__ == "__main__":
     
     dataset = load_eval_dataset(str(dataset_path))
     client = QdrantClient(url="http://localhost:6333")
-    dense_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    dense_model = model_registry.dense("sentence-transformers/all-MiniLM-L6-v2")
     
-    service = DenseVectorRetrievalService(client)
+    service = DenseVectorRetrievalService(client, with_payload=["chunk_id"])
     k = 3
     recall_scores = []
     
-    for sample in dataset[:5]:
+    samples = dataset[:5]
+    query_vectors = dense_model.encode([sample['question'] for sample in samples]).tolist()
+    batch_results = service.similarity_search_batch(query_vectors, k=k)
+    
+    for sample, results in zip(samples, batch_results):
         question = sample['question']
         expected_chunk_id = sample['source_chunk_id']
         
-        query_vector = dense_model.encode(question).tolist()
-        results = service.similarity_search(query_vector, k=k)
-        
         retrieved_chunk_ids = get_chunk_ids_from_results(results)
         recall = calculate_recall_at_k(retrieved_chunk_ids, expected_chunk_id, k)
         recall_scores.append(recall)
@@ -0,0 +1,61 @@
+from typing import List
+
+import pytest
+
+from app.ingestion.models import RawDocument, ChunkedDocumentsOutput
+from app.ingestion.splitters.char_splitter import CharSplitter
+from app.ingestion.splitters.splitter_service import SplitterService
+
+
+@pytest.fixture
+def docs() -> List[RawDocument]:
+    """Fixture to provide documents of varying length, so batches differ in chunk count."""
+    return [
+        RawDocument(
+            row_id=row_id,
+            title=f"Title {row_id}",
+            author="Author",
+            source=f"https://example.org/{row_id}",
+            text=" ".join(f"word{row_id}-{i}" for i in range(10 * (row_id % 7) + 1)),
+            hash=str(row_id),
+        )
+        for row_id in range(50)
+    ]
+
+
+def _flatten(chunked_docs: List[ChunkedDocumentsOutput]):
+    return [
+        (doc.source_row_id, chunk.chunk_id, chunk.chunk_text, chunk.start_offset, chunk.end_offset)
+        for doc in chunked_docs
+        for chunk in doc.chunks
+    ]
+
+
+def _small_splitter() -> CharSplitter:
+    """Module level, so worker processes can unpickle it."""
+    return CharSplitter(chunk_size=30, chunk_overlap=5)
+
+
+class TestSplitterService:
+
+    def test_process_pool_matches_serial_chunking(self, docs):
+        serial = SplitterService(CharSplitter(chunk_size=60, chunk_overlap=10)).chunk(docs)
+
+        pooled_service = SplitterService(CharSplitter(chunk_size=60, chunk_overlap=10), processes=2, batch_size=4)
+        try:
+            pooled = pooled_service.chunk(docs)
+            assert pooled_service._pool is not None  # the pool path actually ran
+        finally:
+            pooled_service.close()
+
+        assert [doc.source_row_id for doc in pooled] == [doc.row_id for doc in docs]
+        assert _flatten(pooled) == _flatten(serial)
+
+    def test_factory_splitter_is_used_in_workers(self, docs):
+        service = SplitterService(CharSplitter(), processes=2, batch_size=4, splitter_factory=_small_splitter)
+        try:
+            pooled = service.chunk(docs)
+        finally:
+            service.close()
+
+        assert _flatten(pooled) == _flatten(SplitterService(_small_splitter()).chunk(docs))
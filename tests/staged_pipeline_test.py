@@ -0,0 +1,106 @@
+import threading
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.ingestion.dataloader.csv_loader_service import CsvLoaderService
+from app.ingestion.models import ChunkBatch, ChunkedDocumentModel
+from app.ingestion.splitters.base import BaseSplitter
+from app.ingestion.splitters.splitter_service import SplitterService
+from app.ingestion.staged_pipeline import StagedIngestionPipeline
+
+ROWS = 25
+
+
+class FakeSplitter(BaseSplitter):
+    """Splits on full stops, so the test needs no tokenizer download."""
+
+    def split(self, text: str) -> List[str]:
+        return [sentence.strip() + "." for sentence in text.split(".") if sentence.strip()]
+
+
+class FakeEmbeddingService:
+    """Embeds every chunk as a constant vector."""
+
+    def embed_batch(self, chunks: List[ChunkedDocumentModel], dense: bool = True, sparse: bool = True) -> ChunkBatch:
+        batch = ChunkBatch.from_chunks(chunks)
+        batch.dense_vectors = np.ones((len(chunks), 4), dtype=np.float32)
+        return batch
+
+
+class RecordingTarget:
+    requires_sparse = False
+
+    def __init__(self, fail_after: int = None):
+        self.collection_name = "recording"
+        self.created = False
+        self.chunk_ids: List[str] = []
+        self.row_ids: List[int] = []
+        self.fail_after = fail_after
+        self.parallel = set()
+        self._lock = threading.Lock()
+
+    def create_collection(self):
+        self.created = True
+
+    def sync_chunk_batch(self, batch: ChunkBatch, row_ids=None, parallel=3):
+        with self._lock:
+            if self.fail_after is not None and len(self.row_ids) >= self.fail_after:
+                raise RuntimeError("upload failed")
+            self.chunk_ids.extend(batch.chunk_ids)
+            self.row_ids.extend(row_ids)
+            self.parallel.add(parallel)
+
+
+@pytest.fixture
+def csv_loader(tmp_path):
+    """Fixture to provide a loader over a small CSV of two-sentence articles."""
+    lines = ["title,author,link,text"]
+    lines += [f"Title {i},Author,https://example.org/{i},First sentence {i}. Second sentence {i}." for i in range(ROWS)]
+    csv_path = tmp_path / "articles.csv"
+    csv_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return CsvLoaderService(str(csv_path))
+
+
+def _pipeline(csv_loader, target, **kwargs) -> StagedIngestionPipeline:
+    return StagedIngestionPipeline(
+        loader=csv_loader,
+        splitter_service=SplitterService(FakeSplitter()),
+        embedding_service=FakeEmbeddingService(),
+        targets=[target],
+        load_batch_size=4,
+        queue_size=2,
+        **kwargs,
+    )
+
+
+class TestStagedIngestionPipeline:
+
+    def test_ingests_every_row(self, csv_loader):
+        target = RecordingTarget()
+
+        stats = _pipeline(csv_loader, target, split_workers=2, embed_workers=2, upsert_workers=2).run()
+
+        assert target.created
+        assert sorted(target.row_ids) == list(range(ROWS))
+        assert len(target.chunk_ids) == 2 * ROWS
+        assert target.parallel == {1}
+        assert stats["load"].items == stats["upsert"].items == ROWS
+
+    def test_stage_error_is_raised_from_run(self, csv_loader):
+        target = RecordingTarget(fail_after=4)
+        result = {}
+
+        def run():
+            try:
+                _pipeline(csv_loader, target).run()
+            except RuntimeError as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        assert not thread.is_alive(), "run() deadlocked after a stage failed"
+        assert str(result["error"]) == "upload failed"
@@ -0,0 +1,142 @@
+import threading
+from typing import List
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from app.ingestion.models import ChunkBatch
+from app.ingestion.vectorstore.base import batch_point_ids
+from app.ingestion.vectorstore.dense_vector_store import DenseBatchIngestor
+from app.ingestion.vectorstore.streaming_upsert import StreamingUpserter, UpsertCheckpoint, input_fingerprint
+
+DIM = 4
+
+
+class SerializedClient:
+    """
+    In-memory Qdrant is not thread-safe, while the upserter reads on the caller
+    thread and uploads on its workers; a server handles that itself.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def ingestor():
+    """Fixture to provide a dense ingestor over an in-memory Qdrant collection."""
+    client = SerializedClient(QdrantClient(":memory:"))
+    ingestor = DenseBatchIngestor("streaming_test", client=client, dense_vector_size=DIM)
+    ingestor.create_collection()
+    return ingestor
+
+
+def _batch(chunks_per_row: dict, version: str = "v1") -> ChunkBatch:
+    row_ids = [row_id for row_id, count in chunks_per_row.items() for _ in range(count)]
+    n = len(row_ids)
+    return ChunkBatch(
+        chunk_ids=[f"row{row_id}-{i}" for i, row_id in enumerate(row_ids)],
+        chunk_hashes=[None] * n,
+        chunk_texts=[f"{version} chunk {i} of row {row_id}" for i, row_id in enumerate(row_ids)],
+        source_row_ids=np.array(row_ids, dtype=np.int64),
+        start_offsets=np.full(n, -1, dtype=np.int64),
+        end_offsets=np.full(n, -1, dtype=np.int64),
+        metadata=[{}] * n,
+        dense_vectors=np.ones((n, DIM), dtype=np.float32),
+    )
+
+
+def _stored_ids(ingestor) -> List[str]:
+    points, _ = ingestor.client.scroll(ingestor.collection_name, limit=1000)
+    return sorted(str(point.id) for point in points)
+
+
+class FailingIngestor(DenseBatchIngestor):
+    """Fails the upload of one numbered call, as an interrupted run would."""
+
+    fail_on_call = 2
+
+    def _upload_points(self, batch, parallel=3, batch_size=64):
+        self.calls = getattr(self, "calls", 0) + 1
+        if self.calls == self.fail_on_call:
+            raise ConnectionError("connection lost")
+        super()._upload_points(batch, parallel=parallel, batch_size=batch_size)
+
+
+class TestStreamingUpserter:
+
+    def test_resume_after_interruption(self, tmp_path, ingestor):
+        batches = [_batch({1: 2}), _batch({2: 2}), _batch({3: 2})]
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        failing = FailingIngestor(ingestor.collection_name, client=ingestor.client, dense_vector_size=DIM)
+        checkpoint = UpsertCheckpoint(checkpoint_path, ingestor.collection_name, batch_size=2, fingerprint="f")
+        with pytest.raises(ConnectionError):
+            with StreamingUpserter(failing, batch_size=2, parallel=1, checkpoint=checkpoint) as upserter:
+                for batch in batches:
+                    upserter.submit(batch)
+
+        resumed = UpsertCheckpoint(checkpoint_path, ingestor.collection_name, batch_size=2, fingerprint="f")
+        assert resumed.is_done(0) and not resumed.is_done(1)
+
+        with StreamingUpserter(ingestor, batch_size=2, parallel=1, checkpoint=resumed) as upserter:
+            for batch in batches:
+                upserter.submit(batch)
+
+        assert upserter.skipped_batches >= 1
+        assert _stored_ids(ingestor) == sorted(point_id for batch in batches for point_id in batch_point_ids(batch))
+        assert not (tmp_path / "checkpoint.json").exists()
+
+    def test_close_shuts_down_after_failed_upload(self, ingestor):
+        failing = FailingIngestor(ingestor.collection_name, client=ingestor.client, dense_vector_size=DIM)
+        failing.fail_on_call = 1
+        upserter = StreamingUpserter(failing, batch_size=2, parallel=1)
+        upserter.submit(_batch({1: 2}))
+
+        with pytest.raises(ConnectionError):
+            upserter.close()
+
+        with pytest.raises(RuntimeError):
+            upserter._executor.submit(print)
+
+    def test_checkpoint_with_other_fingerprint_is_discarded(self, tmp_path):
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+        UpsertCheckpoint(checkpoint_path, "collection", batch_size=2, fingerprint="old").mark_done(0)
+
+        checkpoint = UpsertCheckpoint(checkpoint_path, "collection", batch_size=2, fingerprint="new")
+
+        assert len(checkpoint) == 0
+
+    def test_input_fingerprint_follows_content_and_config(self, tmp_path):
+        csv_path = tmp_path / "articles.csv"
+        csv_path.write_text("title,text\na,b\n", encoding="utf-8")
+        before = input_fingerprint([str(csv_path)], {"chunk_size": 300})
+
+        assert input_fingerprint([str(csv_path)], {"chunk_size": 300}) == before
+        assert input_fingerprint([str(csv_path)], {"chunk_size": 200}) != before
+        csv_path.write_text("title,text\na,c\n", encoding="utf-8")
+        assert input_fingerprint([str(csv_path)], {"chunk_size": 300}) != before
+
+    def test_stale_points_of_shrunk_rows_are_removed(self, ingestor):
+        with StreamingUpserter(ingestor, batch_size=2, parallel=1) as upserter:
+            upserter.submit(_batch({1: 3, 2: 1}))
+
+        # Row 1 now has one (different) chunk and row 2 has none left
+        updated = _batch({1: 1}, version="v2")
+        with StreamingUpserter(ingestor, batch_size=2, parallel=1) as upserter:
+            upserter.submit(updated, row_ids=[1, 2])
+
+        assert _stored_ids(ingestor) == sorted(batch_point_ids(updated))
+        assert upserter.deleted_points == 4
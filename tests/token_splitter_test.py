@@ -0,0 +1,82 @@
+import pytest
+import tiktoken
+
+from app.ingestion.splitters import token_splitter as token_splitter_module
+from app.ingestion.splitters.token_splitter import TokenSplitter
+
+# Accents (2 bytes), CJK (3 bytes) and emoji (4 bytes) next to ASCII
+TEXT = (
+    "Café naïve résumé — 日本語のテキスト and 中文文本 🙂🚀 mixed with plain ASCII words, "
+    "then more: Ünïcödé, 한국어, emoji 👍🏽 and the end."
+)
+MULTI_BYTE_CHARS = sorted({char for char in TEXT if len(char.encode("utf-8")) > 1})
+
+
+def _byte_encoding() -> tiktoken.Encoding:
+    """One token per byte, so most multi-byte characters straddle a token boundary."""
+    return tiktoken.Encoding(
+        "test_bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+
+
+def _char_encoding() -> tiktoken.Encoding:
+    """Bytes plus every multi-byte character of TEXT (and its byte prefixes) as tokens."""
+    ranks = {bytes([i]): i for i in range(256)}
+    for char in MULTI_BYTE_CHARS:
+        raw = char.encode("utf-8")
+        for end in range(2, len(raw) + 1):
+            ranks.setdefault(raw[:end], len(ranks))
+    return tiktoken.Encoding("test_chars", pat_str=r"\S+|\s+", mergeable_ranks=ranks, special_tokens={})
+
+
+def _splitter(monkeypatch, encoding: tiktoken.Encoding, chunk_size: int = 7, chunk_overlap: int = 3):
+    monkeypatch.setattr(token_splitter_module.tiktoken, "encoding_for_model", lambda model_name: encoding)
+    return TokenSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+class TestTokenSplitterOffsets:
+
+    @pytest.mark.parametrize("encoding", [_byte_encoding(), _char_encoding()], ids=["bytes", "chars"])
+    @pytest.mark.parametrize("chunk_size,chunk_overlap", [(7, 3), (5, 0), (16, 15)])
+    def test_offsets_slice_the_chunk_out_of_the_text(self, monkeypatch, encoding, chunk_size, chunk_overlap):
+        splitter = _splitter(monkeypatch, encoding, chunk_size, chunk_overlap)
+
+        spans = splitter.split_with_offsets(TEXT)
+
+        assert spans
+        assert all(TEXT[span.start:span.end] == span.text for span in spans)
+        assert spans[0].start == 0 and spans[-1].end == len(TEXT)
+        # Consecutive windows overlap or touch, so no character is lost
+        assert all(right.start <= left.end for left, right in zip(spans, spans[1:]))
+
+    def test_chunks_match_decoded_token_windows(self, monkeypatch):
+        encoding = _char_encoding()
+        splitter = _splitter(monkeypatch, encoding)
+        tokens = encoding.encode(TEXT)
+
+        spans = splitter.split_with_offsets(TEXT)
+
+        step = splitter.chunk_size - splitter.chunk_overlap
+        expected = [encoding.decode(tokens[start:start + splitter.chunk_size]) for start in range(0, len(tokens), step)]
+        assert [span.text for span in spans] == expected
+
+    def test_boundary_inside_a_character_moves_to_its_end(self, monkeypatch):
+        splitter = _splitter(monkeypatch, _byte_encoding(), chunk_size=1, chunk_overlap=0)
+
+        spans = splitter.split_with_offsets("é")
+
+        # The first one-byte window ends mid-character, so it takes the whole "é"
+        assert tuple(spans[0]) == ("é", 0, 1)
+
+    def test_base_offset_shifts_every_span(self, monkeypatch):
+        splitter = _splitter(monkeypatch, _char_encoding())
+        tokens = splitter.encoder.encode(TEXT)
+
+        spans = splitter.spans_from_tokens(TEXT, tokens, base_offset=100)
+
+        assert [(span.start - 100, span.end - 100) for span in spans] == [
+            (span.start, span.end) for span in splitter.split_with_offsets(TEXT)
+        ]
@@ -1,9 +1,11 @@
+import asyncio
 import csv
 import json
 
 from qdrant_client import QdrantClient
 
 from app.generation.llm_client import LLMClient
+from app.generation.response_cache import LLMResponseCache
 
 
 def build_message(paragraph: str):
@@ -77,7 +79,28 @@ def generate_question_from_vector_store(max_docs=25):
 if __name__ == '__main__':
 
     paragraphs = generate_question_from_vector_store()
-    llm = LLMClient(model="openai/gpt-4o-mini", max_tokens=500)
+    # Re-running on unchanged paragraphs is served from disk; pass refresh=True to regenerate
+    llm = LLMClient(
+        model="openai/gpt-4o-mini",
+        max_tokens=500,
+        max_concurrency=16,
+        requests_per_minute=500,
+        response_cache=LLMResponseCache("../../data/llm_cache"),
+    )
+
+    # Generate for every paragraph concurrently; responses come back in paragraph order
+    responses = asyncio.run(
+        llm.agenerate_many([build_message(paragraph['text']) for paragraph in paragraphs], return_exceptions=True)
+    )
+
+    failures = [
+        (paragraph, response) for paragraph, response in zip(paragraphs, responses) if isinstance(response, Exception)
+    ]
+    for paragraph, error in failures:
+        print(f"Question generation failed for chunk {paragraph['chunk_id']}: {type(error).__name__}: {error}")
+    if responses and len(failures) == len(responses):
+        # Keep the existing dataset rather than overwrite it with an empty one
+        raise RuntimeError(f"All {len(responses)} question generation calls failed") from failures[0][1]
 
     # print(paragraphs.__len__())
     # print(rendered_prompt)
@@ -85,10 +108,9 @@ if __name__ == '__main__':
         writer = csv.writer(f)
         writer.writerow(["paragraph", "question", "answer", "source", "source_row_id", "source_chunk_id"])
 
-        for paragraph in paragraphs:
-
-            messages = build_message(paragraph['text'])
-            response = llm.generate_questions(messages)
+        for paragraph, response in zip(paragraphs, responses):
+            if isinstance(response, Exception):
+                continue  # failed after retries; logged above
 
             try:
                 data = json.loads(response)